@@ -1,6 +1,10 @@
-__all__ = ["log_reader", "performance_test_basic", "performance_test", "NodeopPluginArgs"]
+__all__ = ["log_reader", "prometheus_sampler", "resource_sampler", "cpu_profiler", "results_store", "performance_test_basic", "performance_test", "NodeopPluginArgs"]
 
-from .log_reader import blockData, trxData, chainData, scrapeTrxGenTrxSentDataLogs, JsonReportHandler, analyzeLogResults, TpsTestConfig, ArtifactPaths, LogAnalysis
+from .log_reader import blockData, trxData, trxTable, chainData, scrapeTrxGenTrxSentDataLogs, JsonReportHandler, analyzeLogResults, TpsTestConfig, ArtifactPaths, LogAnalysis
+from .prometheus_sampler import PrometheusSampler, parsePrometheusMetrics
+from .resource_sampler import ResourceSampler
+from .cpu_profiler import CpuProfiler, foldPerfScript
+from .results_store import ResultsStore
 from .NodeopPluginArgs import BasePluginArgs, ChainPluginArgs, HttpPluginArgs, NetPluginArgs, ProducerPluginArgs, ResourceMonitorPluginArgs, SignatureProviderPluginArgs, StateHistoryPluginArgs, TraceApiPluginArgs
 from .performance_test_basic import PerformanceTestBasic, PtbArgumentsHandler
 from .performance_test import PerformanceTest, PerfTestArgumentsHandler
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from pathlib import Path, PurePath
+sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
+
+from TestHarness import Utils
+from .resource_sampler import readStat, CLOCK_TICKS_PER_SEC, STAT_STATE, STAT_UTIME, STAT_STIME
+
+PROFILE_METHODS = ["auto", "perf", "proc"]
+
+# "<comm> <pid>/<tid> [<cpu>] <timestamp>: ..." heading each sample of `perf script` output, the comm may hold spaces
+PERF_SCRIPT_HEADER = re.compile(r"^(\S.*?)\s+\d+(?:/\d+)?\s")
+PERF_SCRIPT_SYMBOL_OFFSET = re.compile(r"\+0x[0-9a-fA-F]+$")
+
+def foldPerfScript(lines) -> dict:
+    """Folds the call chains of `perf script` output into "comm;outermost;...;innermost" -> sample count, the input of flamegraph.pl."""
+    stacks = {}
+    comm = None
+    frames = []
+
+    def flush():
+        if comm is not None:
+            stack = ";".join([comm] + list(reversed(frames)))
+            stacks[stack] = stacks.get(stack, 0) + 1
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            flush()
+            comm, frames = None, []
+        elif line[0] in " \t":
+            if comm is None:
+                continue
+            # "<address> <symbol>+<offset> (<dso>)"
+            parts = line.split(None, 1)
+            symbol = parts[1].rsplit(" (", 1)[0] if len(parts) > 1 else "[unknown]"
+            frames.append(PERF_SCRIPT_SYMBOL_OFFSET.sub("", symbol))
+        elif not line.startswith("#"):
+            flush()
+            match = PERF_SCRIPT_HEADER.match(line)
+            comm, frames = (match.group(1).replace(" ", "_") if match else "[unknown]"), []
+    flush()
+    return stacks
+
+def readProcText(path: Path) -> str:
+    """Contents of a /proc file, empty when it may not be read (a thread's kernel stack needs CAP_SYS_ADMIN) or the thread is gone."""
+    try:
+        with open(path, 'rt') as f:
+            return f.read()
+    except OSError:
+        return ""
+
+class CpuProfiler:
+    """Profiles where a running process spends its cpu for a window of a test run on a background thread, folding the sampled
+    stacks into a flamegraph ready file (one "frame;frame;... count" line per stack, see flamegraph.pl).
+
+    method selects the profiler:
+    perf -- `perf record -g` attached to the process, symbolized with `perf script`
+    proc -- a pure Python sampler of /proc/<pid>/task, charging the cpu ticks each thread used since the previous sample to
+            the thread's name.  It needs no privileges beyond reading /proc, but only attributes cpu to threads, not to
+            functions.  The kernel stack (or wait channel) each sleeping thread is blocked in is counted per sample in a
+            separate, cpu free, "<label>.wait.folded" file: the ticks a thread used were spent before it blocked, so they
+            are not charged to where it waits.
+    auto -- perf if installed, falling back to proc when it is not or fails to attach (e.g. kernel.perf_event_paranoid)"""
+
+    def __init__(self, label: str, pid: int, outputDir: Path, delaySec: float, durationSec: float, frequencyHz: int=99, method: str="auto"):
+        self.label = label
+        self.pid = pid
+        self.outputDir = Path(outputDir)
+        self.delaySec = delaySec
+        self.durationSec = durationSec
+        self.frequencyHz = frequencyHz
+        self.method = method
+        self.perfDataPath = self.outputDir/f"{label}.perf.data"
+        self.foldedStacksPath = self.outputDir/f"{label}.folded"
+        self.waitStacksPath = self.outputDir/f"{label}.wait.folded"
+        self.stacks = {}
+        # "label;thread;outermost;...;innermost" -> samples a sleeping thread was seen blocked in that kernel stack (proc only)
+        self.waitStacks = {}
+        self.profiledSec = 0
+        self.error = None
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.perfProc = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.__run, name=f"CpuProfiler-{self.label}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Ends the profile window early, if still open, and waits for the folded stacks to be written."""
+        self.stopEvent.set()
+        perfProc = self.perfProc
+        if perfProc is not None and perfProc.poll() is None:
+            # perf record writes out the data gathered so far on SIGINT
+            perfProc.send_signal(signal.SIGINT)
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __run(self):
+        if self.stopEvent.wait(self.delaySec):
+            return
+        method = self.method
+        if method == "auto":
+            method = "perf" if shutil.which("perf") is not None else "proc"
+        windowStart = time.monotonic()
+        if method == "perf" and not self.__recordPerf():
+            Utils.Print(f"perf record of {self.label} (pid {self.pid}) failed: {self.error}{', falling back to /proc sampling' if self.method == 'auto' else ''}")
+            if self.method == "perf":
+                return
+            method = "proc"
+        if method == "proc":
+            self.__sampleProc(max(0, self.durationSec - (time.monotonic() - windowStart)))
+        self.method = method
+        self.profiledSec = time.monotonic() - windowStart
+        self.__writeFoldedStacks()
+
+    def __recordPerf(self) -> bool:
+        cmd = ["perf", "record", "-F", str(self.frequencyHz), "-g", "-p", str(self.pid), "-o", str(self.perfDataPath), "--", "sleep", str(self.durationSec)]
+        if Utils.Debug: Utils.Print(f"cmd: {' '.join(cmd)}")
+        try:
+            self.perfProc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if self.stopEvent.is_set():
+                self.perfProc.send_signal(signal.SIGINT)
+            _, err = self.perfProc.communicate()
+            if not self.perfDataPath.exists() or self.perfDataPath.stat().st_size == 0:
+                self.error = err.strip().splitlines()[-1] if err.strip() else f"perf record exited with {self.perfProc.returncode}"
+                return False
+            script = subprocess.run(["perf", "script", "-i", str(self.perfDataPath)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError as error:
+            self.error = str(error)
+            return False
+        self.stacks = foldPerfScript(script.stdout.splitlines())
+        return True
+
+    def __sampleProc(self, durationSec: float):
+        taskPath = Path("/proc")/str(self.pid)/"task"
+        lastTicks = {}
+        intervalSec = 1 / min(self.frequencyHz, CLOCK_TICKS_PER_SEC)
+        windowEnd = time.monotonic() + durationSec
+        nextSample = time.monotonic()
+        while not self.stopEvent.is_set() and time.monotonic() < windowEnd:
+            try:
+                tids = [task.name for task in taskPath.iterdir()]
+            except OSError as error:
+                self.error = f"process exited: {error}"
+                break
+            for tid in tids:
+                try:
+                    name, stat = readStat(taskPath/tid/"stat")
+                except (OSError, ValueError):
+                    continue
+                ticks = int(stat[STAT_UTIME]) + int(stat[STAT_STIME])
+                # a thread's first sample only sets its baseline
+                usedTicks = ticks - lastTicks.get(tid, ticks)
+                lastTicks[tid] = ticks
+                thread = ";".join([self.label, name.replace(" ", "_")])
+                if usedTicks > 0:
+                    stack = f"{thread};[cpu]"
+                    self.stacks[stack] = self.stacks.get(stack, 0) + usedTicks
+                if stat[STAT_STATE] != "R":
+                    kernelFrames = [line.split()[1].split("+")[0] for line in readProcText(taskPath/tid/"stack").splitlines() if len(line.split()) > 1]
+                    wchan = readProcText(taskPath/tid/"wchan").strip()
+                    frames = list(reversed(kernelFrames)) if kernelFrames else [f"[{wchan}]" if wchan not in ("", "0") else f"[{stat[STAT_STATE]}]"]
+                    waitStack = ";".join([thread] + frames)
+                    self.waitStacks[waitStack] = self.waitStacks.get(waitStack, 0) + 1
+            nextSample += intervalSec
+            self.stopEvent.wait(max(0, min(nextSample, windowEnd) - time.monotonic()))
+
+    def __writeFoldedStacks(self):
+        try:
+            with open(self.foldedStacksPath, 'wt') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            if self.waitStacks:
+                with open(self.waitStacksPath, 'wt') as f:
+                    for stack, count in sorted(self.waitStacks.items()):
+                        f.write(f"{stack} {count}\n")
+        except OSError as error:
+            self.error = str(error)
+
+    def topFrames(self, count: int=10) -> dict:
+        """Innermost frames holding the most samples, as percent of all samples.  For /proc sampling these are the threads."""
+        total = sum(self.stacks.values())
+        frames = {}
+        for stack, samples in self.stacks.items():
+            frame = stack.removesuffix(";[cpu]").rsplit(";", 1)[-1]
+            frames[frame] = frames.get(frame, 0) + samples
+        return {frame: samples / total * 100 for frame, samples in sorted(frames.items(), key=lambda item: item[1], reverse=True)[:count]} if total > 0 else {}
+
+    def report(self) -> dict:
+        return {"pid": self.pid, "method": self.method, "frequencyHz": self.frequencyHz, "delaySec": self.delaySec, "profiledSec": self.profiledSec,
+                "samples": sum(self.stacks.values()), "foldedStacks": str(self.foldedStacksPath) if self.foldedStacksPath.exists() else None,
+                "waitStacks": str(self.waitStacksPath) if self.waitStacksPath.exists() else None,
+                "perfData": str(self.perfDataPath) if self.perfDataPath.exists() else None, "topFrames": self.topFrames(), "error": self.error}
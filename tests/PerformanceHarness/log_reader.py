@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 
 import sys
+import os
 import re
+import math
+import concurrent.futures
 import numpy as np
 import json
 import gzip
 
+from array import array
+
 from pathlib import Path, PurePath
 sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
 
@@ -20,11 +25,15 @@ errorExit = Utils.errorExit
 cmdError = Utils.cmdError
 
 COMPLETEPRODUCTIONWINDOWSIZE = 12
+DEFAULT_REPORT_PERCENTILES = [50, 95, 99, 99.9]
+DEFAULT_HISTOGRAM_SUB_BUCKETS = 8
 
 @dataclass
 class ArtifactPaths:
     nodeopLogDir: Path = Path("")
     nodeopLogPath: Path = Path("")
+    # node log path -> byte offset the test run's part of the log starts at, for logs of a cluster reused across runs
+    nodeopLogOffsets: dict = field(default_factory=dict)
     trxGenLogDirPath: Path = Path("")
     blockTrxDataPath: Path = Path("")
     blockDataPath: Path = Path("")
@@ -40,6 +49,8 @@ class TpsTestConfig:
     targetTpsPerGenList: List[int] = field(default_factory=list)
     quiet: bool = False
     printMissingTransactions: bool=True
+    percentiles: List[float] = field(default_factory=lambda: list(DEFAULT_REPORT_PERCENTILES))
+    histogramSubBuckets: int = DEFAULT_HISTOGRAM_SUB_BUCKETS
 
 @dataclass
 class stats():
@@ -49,6 +60,10 @@ class stats():
     sigma: float = 0
     emptyBlocks: int = 0
     numBlocks: int = 0
+    # "p<percentile>" -> value
+    percentiles: dict = field(default_factory=dict)
+    # [lower bound, upper bound, count] of each non-empty bucket
+    histogram: list = field(default_factory=list, repr=False)
 
 @dataclass
 class basicStats():
@@ -57,6 +72,61 @@ class basicStats():
     avg: float = 0
     sigma: float = 0
     samples: int = 0
+    # "p<percentile>" -> value
+    percentiles: dict = field(default_factory=dict)
+    # [lower bound, upper bound, count] of each non-empty bucket
+    histogram: list = field(default_factory=list, repr=False)
+
+class histogramSketch():
+    """Log-linear (HDR style) histogram of a set of values.
+
+    Each power of two range of magnitudes is split into subBuckets equal width buckets, so the bucket a value is counted in
+    bounds it to within 1/subBuckets of its magnitude at any scale."""
+    # keeps the bucket indices of the smallest float magnitudes positive
+    EXPONENT_BIAS = 1100
+
+    def __init__(self, subBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS):
+        assert subBuckets > 0 and subBuckets & (subBuckets - 1) == 0, f"subBuckets must be a power of two, not {subBuckets}"
+        self.subBuckets = subBuckets
+        self.counts = {}
+
+    def bucketIndices(self, values: np.ndarray) -> np.ndarray:
+        """Bucket of each value, 0 for zero and negated for negative values so that bucket indices order as their values do."""
+        mantissas, exponents = np.frexp(np.abs(values))
+        indices = (exponents.astype(np.int64) + histogramSketch.EXPONENT_BIAS) * self.subBuckets + np.floor((mantissas - 0.5) * 2 * self.subBuckets).astype(np.int64) + 1
+        return np.where(values == 0, 0, np.where(values < 0, -indices, indices))
+
+    def bucketBounds(self, index) -> tuple:
+        if index == 0:
+            return (0.0, 0.0)
+        exponent, subBucket = divmod(abs(index) - 1, self.subBuckets)
+        exponent -= histogramSketch.EXPONENT_BIAS
+        lower = math.ldexp(0.5 + subBucket / (2 * self.subBuckets), exponent)
+        upper = math.ldexp(0.5 + (subBucket + 1) / (2 * self.subBuckets), exponent)
+        return (lower, upper) if index > 0 else (-upper, -lower)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        indices, counts = np.unique(self.bucketIndices(values), return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist()):
+            self.counts[index] = self.counts.get(index, 0) + count
+
+    def histogram(self) -> list:
+        return [[*self.bucketBounds(index), count] for index, count in sorted(self.counts.items())]
+
+def calcDistribution(values, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS):
+    """Returns the percentiles and histogram of values, as reported in stats and basicStats.  Percentiles are exact
+    nearest rank values of values, only the histogram is bucketed."""
+    values = np.asarray(values, dtype=np.float64)
+    sketch = histogramSketch(histogramSubBuckets)
+    sketch.add(values)
+    if len(values) == 0:
+        return {}, sketch.histogram()
+    percentiles = sorted(percentiles)
+    ranked = np.percentile(values, percentiles, method="inverted_cdf")
+    return {f"p{percentile:g}": float(value) for percentile, value in zip(percentiles, ranked)}, sketch.histogram()
 
 @dataclass
 class trxData():
@@ -67,6 +137,9 @@ class trxData():
     latency: float = 0
     acknowledged: str = "NA"
     ackRespTimeUs: int = -1
+    signUs: int = -1
+    sendUs: int = -1
+    libLatency: float = -1
     _sentTimestamp: str = ""
     _calcdTimeEpoch: float = 0
 
@@ -90,6 +163,115 @@ class trxData():
         self._sentTimestamp = ""
         self._calcdTimeEpoch = 0
 
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+def timestampsToEpochs(timestamps: list) -> np.ndarray:
+    """Vectorised datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp() over a list of naive local timestamps."""
+    if len(timestamps) == 0:
+        return np.array([], dtype=np.float64)
+    instants = np.array(timestamps, dtype='datetime64[us]')
+    seconds = instants.astype('datetime64[s]')
+    micros = (instants - seconds).astype(np.int64)
+    seconds = seconds.astype(np.int64)
+    # numpy reads naive timestamps as UTC where datetime.timestamp() reads them as local time
+    localSeconds = lambda i: int(datetime.strptime(timestamps[i], TIMESTAMP_FORMAT).replace(microsecond=0).timestamp())
+    utcOffset = localSeconds(0) - int(seconds[0])
+    if localSeconds(-1) - int(seconds[-1]) != utcOffset:
+        # the timestamps span a change in the local utc offset
+        return np.array([datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp() for timestamp in timestamps], dtype=np.float64)
+    # same arithmetic as datetime.timestamp() so the epochs match it exactly
+    return (seconds + utcOffset).astype(np.float64) + micros / 1e6
+
+class trxTable():
+    """Columnar store of a test run's transactions, one row per trx id with each trxData field held in a numpy column.
+
+    Rows are appended while blocks are queried and consolidated into the columns on first read.  Trx ids are interned as
+    fixed width byte strings, and lookup() joins a batch of ids to their rows with one sort instead of a dict per trx."""
+    COLUMNS = {"blockNum": (np.int64, 0), "cpuUsageUs": (np.int64, 0), "netUsageUs": (np.int64, 0), "blockTime": (object, None),
+               "latency": (np.float64, 0), "acknowledged": (object, "NA"), "ackRespTimeUs": (np.int64, -1),
+               "signUs": (np.int64, -1), "sendUs": (np.int64, -1), "libLatency": (np.float64, -1),
+               "sentTimestamp": (object, ""), "calcdTimeEpoch": (np.float64, 0)}
+
+    def __init__(self):
+        self.ids = np.array([], dtype='S')
+        self.columns = {name: np.array([], dtype=dtype) for name, (dtype, _) in trxTable.COLUMNS.items()}
+        self._pendingIds = []
+        self._pendingBlockNums = array('q')
+        self._pendingCpuUsageUs = array('q')
+        self._pendingNetUsageUs = array('q')
+        self._pendingBlockTimes = []
+        self._sortedIds = None
+        self._sortOrder = None
+
+    def __len__(self):
+        return len(self.ids) + len(self._pendingIds)
+
+    def append(self, trxId: str, blockNum: int, cpuUsageUs: int, netUsageUs: int, blockTime=None):
+        self._pendingIds.append(trxId)
+        self._pendingBlockNums.append(int(blockNum))
+        self._pendingCpuUsageUs.append(int(cpuUsageUs))
+        self._pendingNetUsageUs.append(int(netUsageUs))
+        self._pendingBlockTimes.append(blockTime)
+
+    def extend(self, trxIds, blockNums, cpuUsageUs, netUsageUs, blockTimes):
+        """Append a batch of rows, given as sequences of equal length, with the remaining columns at their defaults."""
+        self._consolidate()
+        self.__extend(np.array(trxIds, dtype='S'), {"blockNum": blockNums, "cpuUsageUs": cpuUsageUs, "netUsageUs": netUsageUs, "blockTime": blockTimes})
+
+    def __extend(self, trxIds, values: dict):
+        if len(trxIds) == 0:
+            return
+        self.ids = np.concatenate((self.ids, trxIds))
+        for name, (dtype, default) in trxTable.COLUMNS.items():
+            column = np.array(values[name], dtype=dtype) if name in values else np.full(len(trxIds), default, dtype=dtype)
+            self.columns[name] = np.concatenate((self.columns[name], column))
+        self._sortedIds = None
+        self._sortOrder = None
+
+    def _consolidate(self):
+        if len(self._pendingIds) == 0:
+            return
+        trxIds = np.array(self._pendingIds, dtype='S')
+        blockTimes = np.empty(len(self._pendingBlockTimes), dtype=object)
+        blockTimes[:] = self._pendingBlockTimes
+        values = {"blockNum": np.frombuffer(self._pendingBlockNums, dtype=np.int64), "cpuUsageUs": np.frombuffer(self._pendingCpuUsageUs, dtype=np.int64),
+                  "netUsageUs": np.frombuffer(self._pendingNetUsageUs, dtype=np.int64), "blockTime": blockTimes}
+        self.__extend(trxIds, values)
+        self._pendingIds = []
+        self._pendingBlockNums = array('q')
+        self._pendingCpuUsageUs = array('q')
+        self._pendingNetUsageUs = array('q')
+        self._pendingBlockTimes = []
+
+    def column(self, name) -> np.ndarray:
+        self._consolidate()
+        return self.columns[name]
+
+    def lookup(self, trxIds) -> np.ndarray:
+        """Row of each of trxIds, -1 for ids not in the table.  An id added more than once resolves to its last row."""
+        self._consolidate()
+        trxIds = np.array(trxIds, dtype='S')
+        if len(self.ids) == 0:
+            return np.full(len(trxIds), -1, dtype=np.int64)
+        if self._sortedIds is None:
+            self._sortOrder = np.argsort(self.ids, kind='stable')
+            self._sortedIds = self.ids[self._sortOrder]
+        positions = np.searchsorted(self._sortedIds, trxIds, side='right') - 1
+        found = (positions >= 0) & (self._sortedIds[np.maximum(positions, 0)] == trxIds)
+        return np.where(found, self._sortOrder[np.maximum(positions, 0)], -1)
+
+    def rows(self):
+        """Yields (trx id, trxData) for each row in order."""
+        self._consolidate()
+        columns = [self.columns[name].tolist() for name in trxTable.COLUMNS]
+        for trxId, values in zip(self.ids.tolist(), zip(*columns)):
+            row = dict(zip(trxTable.COLUMNS, values))
+            trx = trxData(row["blockNum"], row["cpuUsageUs"], row["netUsageUs"], row["blockTime"], row["latency"], row["acknowledged"], row["ackRespTimeUs"],
+                          row["signUs"], row["sendUs"], row["libLatency"])
+            trx._sentTimestamp = row["sentTimestamp"]
+            trx._calcdTimeEpoch = row["calcdTimeEpoch"]
+            yield trxId.decode(), trx
+
 @dataclass
 class productionWindow():
     producer: str = ""
@@ -130,6 +312,8 @@ class blockData():
     status: str = ""
     _timestamp: str = field(init=True, repr=True, default='')
     _calcdTimeEpoch: float = 0
+    # epoch at which the validation node saw the block become irreversible, 0 when unknown
+    irreversibleEpoch: float = 0
 
     def __post_init__(self):
         self.timestamp = self._timestamp
@@ -159,7 +343,7 @@ class chainData():
     def __init__(self):
         self.blockList = []
         self.blockDict = {}
-        self.trxDict = {}
+        self.trxTable = trxTable()
         self.startBlock = None
         self.ceaseBlock = None
         self.totalTransactions = 0
@@ -179,6 +363,18 @@ class chainData():
          self.totalElapsed == other.totalElapsed and\
          self.totalTime == other.totalTime and\
          self.numNodes == other.numNodes
+    def blockColumn(self, name, dtype=np.int64) -> np.ndarray:
+        return np.fromiter((getattr(block, name) for block in self.blockList), dtype=dtype, count=len(self.blockList))
+    def blockRows(self, blockNums) -> np.ndarray:
+        """Index into blockList of each of blockNums."""
+        blockNums = np.asarray(blockNums, dtype=np.int64)
+        listedBlockNums = self.blockColumn("blockNum")
+        rows = np.searchsorted(listedBlockNums, blockNums)
+        missing = rows >= len(listedBlockNums)
+        missing[~missing] = listedBlockNums[rows[~missing]] != blockNums[~missing]
+        if missing.any():
+            raise KeyError(f"Blocks not in chain data: {np.unique(blockNums[missing]).tolist()}")
+        return rows
     def updateTotal(self, transactions, net, cpu, elapsed, time):
         self.totalTransactions += transactions
         self.totalNet += net
@@ -197,106 +393,251 @@ class LogAnalysis:
     guide: chainBlocksGuide
     tpsStats: stats
     blockSizeStats: stats
+    blockCpuStats: stats
     trxLatencyStats: basicStats
     trxCpuStats: basicStats
     trxNetStats: basicStats
     trxAckStatsApplicable: str
     trxAckStats: basicStats
+    # stage -> basicStats of the time each transaction spent in it, see calcTrxLatencyBreakdown
+    trxLatencyBreakdown: dict
     prodWindows: productionWindows
     notFound: list
 
 def selectedOpen(path):
     return gzip.open if path.suffix == '.gz' else open
 
-def scrapeLogBlockElapsedTime(data: chainData, path):
-    # node_XX/stderr.txt where XX is the first nonproducing node
+@dataclass
+class nodeopLogEvents():
+    # block num -> (elapsed, time) from "Received block" lines
+    blockElapsedTimes: dict = field(default_factory=dict)
+    # block num (str) -> block id of "dropped incoming block" lines
+    droppedBlocks: dict = field(default_factory=dict)
+    # number of blocks switched away from for each "switching forks" line
+    forkedBlocks: list = field(default_factory=list)
+    # block num -> (block timestamp, lib, ms from block timestamp to receipt) from "Received block" lines
+    blockLibs: dict = field(default_factory=dict)
+
+# Patterns applied line by line; each is only tried on lines containing its marker substring, which is much cheaper to
+# test for than running the regex over every line of a multi-GB log.
+RECEIVED_BLOCK_MARKER = 'Received block '
+RECEIVED_BLOCK_PATTERN = re.compile(r'Received block ([0-9a-fA-F]*).* #(\d+) .*trxs: (\d+)(.*)')
+BLOCK_ELAPSED_TIME_PATTERN = re.compile(r'elapsed: (\d+), time: (\d+)')
+BLOCK_LIB_PATTERN = re.compile(r'lib: (\d+),.*latency: (-?\d+) ms')
+BLOCK_TIMESTAMP_PATTERN = re.compile(r' @ (\S+) signed by ')
+DROPPED_BLOCK_MARKER = 'dropped incoming block #'
+DROPPED_BLOCK_PATTERN = re.compile(r'dropped incoming block #(\d+) id: ([0-9a-fA-F]+)')
+FORK_SWITCH_MARKER = 'switching forks from '
+FORK_SWITCH_PATTERN = re.compile(r'switching forks from ([0-9a-fA-F]+) \(block number (\d+)\) to ([0-9a-fA-F]+) \(block number (\d+)\)')
+
+def scrapeNodeopLog(path, startBlock=None, ceaseBlock=None, blockElapsedTimes=True, offset=0) -> nodeopLogEvents:
+    """Extract block elapsed times (if blockElapsedTimes, for blocks in [startBlock, ceaseBlock] when given), dropped blocks
+    and fork switches from a nodeop log in a single streaming pass, so memory use does not grow with the size of the log.
+    Along with the elapsed times, the lib and receipt latency of each block from startBlock on, including those received
+    after ceaseBlock which make the last blocks of the run irreversible, are extracted.
+    Only the part of the log from the first full line at or after byte offset is scraped."""
+    events = nodeopLogEvents()
     selectedopen = selectedOpen(path)
     with selectedopen(path, 'rt') as f:
-        line = f.read()
-        blockResult = re.findall(r'Received block ([0-9a-fA-F]*).* #(\d+) .*trxs: (\d+)(.*)', line)
-        for value in blockResult:
-            if int(value[1]) in range(data.startBlock, data.ceaseBlock + 1):
-                v3Logging = re.findall(r'elapsed: (\d+), time: (\d+)', value[3])
-                if v3Logging:
-                    data.blockDict[str(value[1])].elapsed = int(v3Logging[0][0])
-                    data.blockDict[str(value[1])].time = int(v3Logging[0][1])
+        if offset > 0:
+            # skip the rest of the line the offset falls in, nothing when it is the start of a line
+            f.seek(offset - 1)
+            f.readline()
+        for line in f:
+            if blockElapsedTimes and RECEIVED_BLOCK_MARKER in line:
+                blockResult = RECEIVED_BLOCK_PATTERN.search(line)
+                if blockResult is not None:
+                    blockNum = int(blockResult.group(2))
+                    if (startBlock is None or blockNum >= startBlock) and (ceaseBlock is None or blockNum <= ceaseBlock):
+                        v3Logging = BLOCK_ELAPSED_TIME_PATTERN.search(blockResult.group(4))
+                        if v3Logging is not None:
+                            events.blockElapsedTimes[blockNum] = (int(v3Logging.group(1)), int(v3Logging.group(2)))
+                    if startBlock is None or blockNum >= startBlock:
+                        libResult = BLOCK_LIB_PATTERN.search(blockResult.group(4))
+                        timestampResult = BLOCK_TIMESTAMP_PATTERN.search(line)
+                        if libResult is not None and timestampResult is not None:
+                            events.blockLibs[blockNum] = (timestampResult.group(1), int(libResult.group(1)), int(libResult.group(2)))
+            if DROPPED_BLOCK_MARKER in line:
+                for block in DROPPED_BLOCK_PATTERN.finditer(line):
+                    events.droppedBlocks[block.group(1)] = block.group(2)
+            if FORK_SWITCH_MARKER in line:
+                for fork in FORK_SWITCH_PATTERN.finditer(line):
+                    events.forkedBlocks.append(int(fork.group(2)) - int(fork.group(4)) + 1)
+    return events
+
+def applyBlockElapsedTimes(data: chainData, events: nodeopLogEvents):
+    for blockNum, (elapsed, time) in events.blockElapsedTimes.items():
+        data.blockDict[str(blockNum)].elapsed = elapsed
+        data.blockDict[str(blockNum)].time = time
+
+def applyBlockLibs(data: chainData, events: nodeopLogEvents):
+    """Sets the irreversibleEpoch of each block to the time the node received the first block whose lib reached it."""
+    if len(events.blockLibs) == 0 or len(data.blockList) == 0:
+        return
+    receivedBlockNums = sorted(events.blockLibs)
+    timestamps, libs, latenciesMs = zip(*(events.blockLibs[blockNum] for blockNum in receivedBlockNums))
+    receivedEpochs = timestampsToEpochs([timestamp.rstrip('Z') for timestamp in timestamps]) + np.array(latenciesMs, dtype=np.float64) / 1000
+    # lib only moves forward, the running max guards against a fork switch briefly reporting a lower one
+    maxLibs = np.maximum.accumulate(np.array(libs, dtype=np.int64))
+    positions = np.searchsorted(maxLibs, data.blockColumn("blockNum"), side='left')
+    for block, position in zip(data.blockList, positions.tolist()):
+        if position < len(maxLibs):
+            block.irreversibleEpoch = float(receivedEpochs[position])
+
+def applyDroppedForkedBlocks(data: chainData, nodeNum, events: nodeopLogEvents):
+    data.droppedBlocks[str(nodeNum).zfill(2)] = events.droppedBlocks
+    data.forkedBlocks[str(nodeNum).zfill(2)] = events.forkedBlocks
+
+def nodeopLogPath(nodeopLogDir, nodeNum):
+    return nodeopLogDir/f"node_{str(nodeNum).zfill(2)}"/"stderr.txt"
+
+def scrapeLogBlockElapsedTime(data: chainData, path):
+    # node_XX/stderr.txt where XX is the first nonproducing node
+    events = scrapeNodeopLog(path, data.startBlock, data.ceaseBlock)
+    applyBlockElapsedTimes(data, events)
+    applyBlockLibs(data, events)
 
 def scrapeLogDroppedForkedBlocks(data: chainData, path):
     for nodeNum in range(0, data.numNodes):
-        nodePath = path/f"node_{str(nodeNum).zfill(2)}"/"stderr.txt"
-        selectedopen = selectedOpen(path)
-        with selectedopen(nodePath, 'rt') as f:
-            line = f.read()
-            droppedBlocksByCurrentNode = {}
-            forkedBlocksByCurrentNode = []
-            droppedBlocks = re.findall(r'dropped incoming block #(\d+) id: ([0-9a-fA-F]+)', line)
-            for block in droppedBlocks:
-                droppedBlocksByCurrentNode[block[0]] = block[1]
-            forks = re.findall(r'switching forks from ([0-9a-fA-F]+) \(block number (\d+)\) to ([0-9a-fA-F]+) \(block number (\d+)\)', line)
-            for fork in forks:
-                forkedBlocksByCurrentNode.append(int(fork[1]) - int(fork[3]) + 1)
-            data.droppedBlocks[str(nodeNum).zfill(2)] = droppedBlocksByCurrentNode
-            data.forkedBlocks[str(nodeNum).zfill(2)] = forkedBlocksByCurrentNode
+        applyDroppedForkedBlocks(data, nodeNum, scrapeNodeopLog(nodeopLogPath(path, nodeNum), blockElapsedTimes=False))
+
+def createAnalysisExecutor(numFiles, processes=None):
+    """Returns a process pool for scraping numFiles log files, or None when a single process would do (one file or core)."""
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, numFiles)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+
+def mapLogFiles(executor, func, *iterables):
+    """map() func over log files in the executor's worker processes (or in this one with no executor), results in order."""
+    return map(func, *iterables) if executor is None else executor.map(func, *iterables)
+
+def scrapeNodeopLogs(data: chainData, elapsedTimeLogPath, nodeopLogDir, executor=None, offsets=None):
+    """Scrape every node's log once, taking block elapsed times from elapsedTimeLogPath and dropped/forked blocks from all.
+    Logs are scraped in parallel over executor when given, each worker returning just the nodeopLogEvents of its log.
+    offsets maps log paths to the byte offset to start scraping them from (see scrapeNodeopLog)."""
+    paths = [nodeopLogPath(nodeopLogDir, nodeNum) for nodeNum in range(0, data.numNodes)]
+    isElapsedTimeLog = [Path(path) == Path(elapsedTimeLogPath) for path in paths]
+    if not any(isElapsedTimeLog):
+        paths.append(elapsedTimeLogPath)
+        isElapsedTimeLog.append(True)
+    numLogs = len(paths)
+    offsets = offsets if offsets is not None else {}
+    allEvents = mapLogFiles(executor, scrapeNodeopLog, paths, [data.startBlock] * numLogs, [data.ceaseBlock] * numLogs, isElapsedTimeLog,
+                            [offsets.get(Path(path), 0) for path in paths])
+    for nodeNum, (events, elapsedTimeLog) in enumerate(zip(allEvents, isElapsedTimeLog)):
+        if elapsedTimeLog:
+            applyBlockElapsedTimes(data, events)
+            applyBlockLibs(data, events)
+        if nodeNum < data.numNodes:
+            applyDroppedForkedBlocks(data, nodeNum, events)
 
 @dataclass
 class sentTrx():
     sentTime: str = ""
     acked: str = ""
     ackResponseTimeUs: int = -1
+    signUs: int = -1
+    sendUs: int = -1
 
 @dataclass
 class sentTrxExtTrace():
     sentTime: str = ""
     acked: str = ""
     ackResponseTimeUs: int = -1
+    signUs: int = -1
+    sendUs: int = -1
     blockNum: int = -1
     cpuUsageUs: int = -1
     netUsageWords: int = -1
     blockTime: str = ""
 
+def parseSentTrx(fields: list):
+    """trx id and sentTrx of a trx_data_output line: id,sentTime,acked,ackUs,signUs,sendUs followed by blockNum,cpuUsageUs,
+    netUsageWords,blockTime when the generator traced the trx itself.  Generators predating signUs and sendUs omit them."""
+    if len(fields) in (4, 8):
+        fields[4:4] = [-1, -1]
+    return fields[0], sentTrx(*fields[1:6]) if len(fields) == 6 else sentTrxExtTrace(*fields[1:10])
+
 def scrapeTrxGenLog(trxSent: dict, path):
     #trxGenLogs/trx_data_output_*.txt
     selectedopen = selectedOpen(path)
     with selectedopen(path, 'rt') as f:
-        trxSent.update(dict([(x[0], sentTrx(x[1], x[2], x[3]) if len(x) == 4 else sentTrxExtTrace(x[1], x[2], x[3], x[4], x[5], x[6], x[7])) for x in (line.rstrip('\n').split(',') for line in f)]))
+        trxSent.update(dict(parseSentTrx(line.rstrip('\n').split(',')) for line in f))
+
+def readTrxGenLog(path) -> dict:
+    trxSent = {}
+    scrapeTrxGenLog(trxSent, path)
+    return trxSent
 
-def scrapeTrxGenTrxSentDataLogs(trxSent: dict, trxGenLogDirPath, quiet):
-    filesScraped = []
-    for fileName in trxGenLogDirPath.glob("trx_data_output_*.txt"):
-        filesScraped.append(fileName)
-        scrapeTrxGenLog(trxSent, fileName)
+def scrapeTrxGenTrxSentDataLogs(trxSent: dict, trxGenLogDirPath, quiet, executor=None):
+    filesScraped = list(trxGenLogDirPath.glob("trx_data_output_*.txt"))
+    for fileTrxSent in mapLogFiles(executor, readTrxGenLog, filesScraped):
+        trxSent.update(fileTrxSent)
 
     if not quiet:
         print(f"Transaction Log Files Scraped: {filesScraped}")
 
 def populateTrxSentAndAcked(trxSent: dict, data: chainData, notFound):
-    trxDict = data.trxDict
-    for sentTrxId in trxSent.keys():
-        if (isinstance(trxSent[sentTrxId], sentTrxExtTrace)):
-            trxDict[sentTrxId] = trxData(blockNum=trxSent[sentTrxId].blockNum, cpuUsageUs=trxSent[sentTrxId].cpuUsageUs, netUsageUs=trxSent[sentTrxId].netUsageWords, blockTime=trxSent[sentTrxId].blockTime, acknowledged=trxSent[sentTrxId].acked, ackRespTimeUs=trxSent[sentTrxId].ackResponseTimeUs)
-            trxDict[sentTrxId].sentTimestamp = trxSent[sentTrxId].sentTime
-            data.blockDict[str(trxSent[sentTrxId].blockNum)].transactions +=1
-        elif sentTrxId in trxDict.keys():
-            trxDict[sentTrxId].sentTimestamp = trxSent[sentTrxId].sentTime
-            trxDict[sentTrxId].acknowledged = trxSent[sentTrxId].acked
-            trxDict[sentTrxId].ackRespTimeUs = trxSent[sentTrxId].ackResponseTimeUs
-        else:
-            notFound.append(sentTrxId)
+    trxs = data.trxTable
+    sentIds = list(trxSent.keys())
+    sent = list(trxSent.values())
+    extTraced = [i for i, trx in enumerate(sent) if isinstance(trx, sentTrxExtTrace)]
+    if len(extTraced) > 0:
+        # the trx generator traced these itself, they replace any row queried from the blocks
+        extIds = [sentIds[i] for i in extTraced]
+        blockNums = np.array([int(sent[i].blockNum) for i in extTraced], dtype=np.int64)
+        cpuUsageUs = np.array([int(sent[i].cpuUsageUs) for i in extTraced], dtype=np.int64)
+        netUsageUs = np.array([int(sent[i].netUsageWords) for i in extTraced], dtype=np.int64)
+        blockTimes = np.empty(len(extTraced), dtype=object)
+        blockTimes[:] = [sent[i].blockTime for i in extTraced]
+        blockRows = data.blockRows(blockNums)
+        rows = trxs.lookup(extIds)
+        queried = rows >= 0
+        for name, values in (("blockNum", blockNums), ("cpuUsageUs", cpuUsageUs), ("netUsageUs", netUsageUs), ("blockTime", blockTimes)):
+            trxs.column(name)[rows[queried]] = values[queried]
+        added = np.flatnonzero(~queried)
+        trxs.extend([extIds[i] for i in added], blockNums[added], cpuUsageUs[added], netUsageUs[added], blockTimes[added])
+        blockTrxCounts = np.bincount(blockRows, minlength=len(data.blockList))
+        for blockRow in np.flatnonzero(blockTrxCounts):
+            data.blockList[blockRow].transactions += int(blockTrxCounts[blockRow])
+
+    rows = trxs.lookup(sentIds)
+    found = rows >= 0
+    notFound.extend(trxId for trxId, isFound in zip(sentIds, found.tolist()) if not isFound)
+    foundSent = [sent[i] for i in np.flatnonzero(found)]
+    foundRows = rows[found]
+    sentTimes = [trx.sentTime for trx in foundSent]
+    trxs.column("sentTimestamp")[foundRows] = sentTimes
+    trxs.column("calcdTimeEpoch")[foundRows] = timestampsToEpochs(sentTimes)
+    trxs.column("acknowledged")[foundRows] = [trx.acked for trx in foundSent]
+    trxs.column("ackRespTimeUs")[foundRows] = np.array([int(trx.ackResponseTimeUs) for trx in foundSent], dtype=np.int64)
+    trxs.column("signUs")[foundRows] = np.array([int(trx.signUs) for trx in foundSent], dtype=np.int64)
+    trxs.column("sendUs")[foundRows] = np.array([int(trx.sendUs) for trx in foundSent], dtype=np.int64)
 
 def populateTrxLatencies(data: chainData):
-    for trxId, trxData in data.trxDict.items():
-        if trxData.calcdTimeEpoch != 0:
-            data.trxDict[trxId].latency = data.blockDict[str(trxData.blockNum)].calcdTimeEpoch - trxData.calcdTimeEpoch
+    trxs = data.trxTable
+    sentEpochs = trxs.column("calcdTimeEpoch")
+    sentRows = np.flatnonzero(sentEpochs != 0)
+    blockEpochs = data.blockColumn("calcdTimeEpoch", dtype=np.float64)
+    blockRows = data.blockRows(trxs.column("blockNum")[sentRows])
+    trxs.column("latency")[sentRows] = blockEpochs[blockRows] - sentEpochs[sentRows]
+    irreversibleEpochs = data.blockColumn("irreversibleEpoch", dtype=np.float64)[blockRows]
+    irreversible = irreversibleEpochs != 0
+    trxs.column("libLatency")[sentRows[irreversible]] = irreversibleEpochs[irreversible] - blockEpochs[blockRows[irreversible]]
 
 def updateBlockTotals(data: chainData):
     for _, block in data.blockDict.items():
         data.updateTotal(transactions=block.transactions, net=block.net, cpu=block.cpu, elapsed=block.elapsed, time=block.time)
 
-def writeTransactionMetrics(trxDict: dict, path):
+def writeTransactionMetrics(trxs: trxTable, path):
     with open(path, 'wt') as transactionMetricsFile:
-        transactionMetricsFile.write("TransactionId,BlockNumber,BlockTime,CpuUsageUs,NetUsageUs,Latency,SentTimestamp,CalcdTimeEpoch,Acknowledged,SentToAckDurationUs\n")
-        for trxId, data in trxDict.items():
-            transactionMetricsFile.write(f"{trxId},{data.blockNum},{data.blockTime},{data.cpuUsageUs},{data.netUsageUs},{data.latency},{data._sentTimestamp},{data._calcdTimeEpoch}{data.acknowledged}{data.ackRespTimeUs}\n")
+        transactionMetricsFile.write("TransactionId,BlockNumber,BlockTime,CpuUsageUs,NetUsageUs,Latency,SentTimestamp,CalcdTimeEpoch,Acknowledged,SentToAckDurationUs,SignDurationUs,SendDurationUs,BlockToLibLatency\n")
+        for trxId, data in trxs.rows():
+            # rows never matched to a sent trx keep the integer defaults of trxData
+            latency, calcdTimeEpoch = (data.latency, data._calcdTimeEpoch) if data._calcdTimeEpoch != 0 else (0, 0)
+            transactionMetricsFile.write(f"{trxId},{data.blockNum},{data.blockTime},{data.cpuUsageUs},{data.netUsageUs},{latency},{data._sentTimestamp},{calcdTimeEpoch},{data.acknowledged},{data.ackRespTimeUs},"
+                                         f"{data.signUs},{data.sendUs},{data.libLatency}\n")
 
 def getProductionWindows(prodDict: dict, data: chainData):
     prod = ""
@@ -400,7 +741,7 @@ def pruneToSteadyState(data: chainData, guide: chainBlocksGuide):
 
     return data.blockList[guide.setupBlocksCnt + guide.leadingEmptyBlocksCnt + guide.configAddlDropCnt:-(guide.tearDownBlocksCnt + guide.trailingEmptyBlocksCnt + guide.configAddlDropCnt)]
 
-def scoreTransfersPerSecond(data: chainData, guide: chainBlocksGuide) -> stats:
+def scoreTransfersPerSecond(data: chainData, guide: chainBlocksGuide, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS) -> stats:
     """Analyzes a test scenario's steady state block data for statistics around transfers per second over every two-consecutive-block window"""
     prunedBlockDataLog = pruneToSteadyState(data, guide)
 
@@ -409,7 +750,7 @@ def scoreTransfersPerSecond(data: chainData, guide: chainBlocksGuide) -> stats:
         return stats()
     elif blocksToAnalyze == 1:
         onlyBlockTrxs = prunedBlockDataLog[0].transactions
-        return stats(onlyBlockTrxs, onlyBlockTrxs, onlyBlockTrxs, 0, int(onlyBlockTrxs == 0), 1)
+        return stats(onlyBlockTrxs, onlyBlockTrxs, onlyBlockTrxs, 0, int(onlyBlockTrxs == 0), 1, *calcDistribution([onlyBlockTrxs], percentiles, histogramSubBuckets))
     else:
         # Calculate the num trxs in each two-consecutive-block window and count any empty blocks in range.
         # for instance: given 4 blocks [1, 2, 3, 4], the two-consecutive-block windows analyzed would be [(1,2),(2,3),(3,4)]
@@ -418,9 +759,10 @@ def scoreTransfersPerSecond(data: chainData, guide: chainBlocksGuide) -> stats:
         npCBTAEC = np.array(consecBlkTrxsAndEmptyCnt, dtype=np.uint)
 
         # Note: numpy array slicing in use -> [:,0] -> from all elements return index 0
-        return stats(int(np.min(npCBTAEC[:,0])), int(np.max(npCBTAEC[:,0])), float(np.average(npCBTAEC[:,0])), float(np.std(npCBTAEC[:,0])), int(np.sum(npCBTAEC[:,1])), len(prunedBlockDataLog))
+        return stats(int(np.min(npCBTAEC[:,0])), int(np.max(npCBTAEC[:,0])), float(np.average(npCBTAEC[:,0])), float(np.std(npCBTAEC[:,0])), int(np.sum(npCBTAEC[:,1])), len(prunedBlockDataLog),
+                     *calcDistribution(npCBTAEC[:,0], percentiles, histogramSubBuckets))
 
-def calcBlockSizeStats(data: chainData, guide : chainBlocksGuide) -> stats:
+def calcBlockSizeStats(data: chainData, guide : chainBlocksGuide, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS) -> stats:
     """Analyzes a test scenario's steady state block data for block size statistics during the test window"""
     prunedBlockDataLog = pruneToSteadyState(data, guide)
 
@@ -429,32 +771,75 @@ def calcBlockSizeStats(data: chainData, guide : chainBlocksGuide) -> stats:
         return stats()
     elif blocksToAnalyze == 1:
         onlyBlockNetSize = prunedBlockDataLog[0].net
-        return stats(onlyBlockNetSize, onlyBlockNetSize, onlyBlockNetSize, 0, int(onlyBlockNetSize == 0), 1)
+        return stats(onlyBlockNetSize, onlyBlockNetSize, onlyBlockNetSize, 0, int(onlyBlockNetSize == 0), 1, *calcDistribution([onlyBlockNetSize], percentiles, histogramSubBuckets))
     else:
         blockSizeList = [(blk.net, int(blk.net == 0)) for blk in prunedBlockDataLog]
 
         npBlkSizeList = np.array(blockSizeList, dtype=np.uint)
 
         # Note: numpy array slicing in use -> [:,0] -> from all elements return index 0
-        return stats(int(np.min(npBlkSizeList[:,0])), int(np.max(npBlkSizeList[:,0])), float(np.average(npBlkSizeList[:,0])), float(np.std(npBlkSizeList[:,0])), int(np.sum(npBlkSizeList[:,1])), len(prunedBlockDataLog))
+        return stats(int(np.min(npBlkSizeList[:,0])), int(np.max(npBlkSizeList[:,0])), float(np.average(npBlkSizeList[:,0])), float(np.std(npBlkSizeList[:,0])), int(np.sum(npBlkSizeList[:,1])), len(prunedBlockDataLog),
+                     *calcDistribution(npBlkSizeList[:,0], percentiles, histogramSubBuckets))
+
+def calcBlockCpuStats(data: chainData, guide : chainBlocksGuide, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS) -> stats:
+    """Analyzes a test scenario's steady state block data for block cpu usage (microseconds) statistics during the test window"""
+    prunedBlockDataLog = pruneToSteadyState(data, guide)
 
-def calcTrxLatencyCpuNetStats(trxDict : dict):
+    if len(prunedBlockDataLog) == 0:
+        return stats()
+    npBlkCpuList = np.array([blk.cpu for blk in prunedBlockDataLog], dtype=np.uint)
+    return stats(int(np.min(npBlkCpuList)), int(np.max(npBlkCpuList)), float(np.average(npBlkCpuList)), float(np.std(npBlkCpuList)), int(np.sum(npBlkCpuList == 0)), len(prunedBlockDataLog),
+                 *calcDistribution(npBlkCpuList, percentiles, histogramSubBuckets))
+
+def calcTrxLatencyCpuNetStats(trxs: trxTable, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS):
     """Analyzes a test scenario's steady state block data for transaction latency statistics during the test window
 
     Keyword arguments:
-    trxDict -- the dictionary mapping trx id to trxData, wherein the trx sent timestamp has been populated from the trx generator at moment of send
+    trxs -- the trxTable of the test run, wherein the trx sent timestamp has been populated from the trx generator at moment of send
+    percentiles -- percentiles of each measurement to report
+    histogramSubBuckets -- number of histogram buckets each power of two range of a measurement is split into
 
     Returns:
-    transaction latency stats as a basicStats object
+    transaction latency, cpu, net and ack response time stats as basicStats objects
     """
-    trxLatencyCpuNetAckList = [(data.latency, data.cpuUsageUs, data.netUsageUs, data.ackRespTimeUs) for trxId, data in trxDict.items() if data.calcdTimeEpoch != 0]
+    sent = trxs.column("calcdTimeEpoch") != 0
+    numSent = int(np.count_nonzero(sent))
+
+    def columnStats(name):
+        values = trxs.column(name)[sent].astype(float)
+        return basicStats(float(np.min(values)), float(np.max(values)), float(np.average(values)), float(np.std(values)), numSent,
+                          *calcDistribution(values, percentiles, histogramSubBuckets))
+
+    return columnStats("latency"), columnStats("cpuUsageUs"), columnStats("netUsageUs"), columnStats("ackRespTimeUs")
 
-    npLatencyCpuNetAckList = np.array(trxLatencyCpuNetAckList, dtype=float)
+# stage -> (trxTable column, units) of calcTrxLatencyBreakdown, in the order a transaction passes through them
+TRX_LATENCY_STAGES = {"sign": ("signUs", "microseconds"), "send": ("sendUs", "microseconds"), "ack": ("ackRespTimeUs", "microseconds"),
+                      "block": ("latency", "seconds"), "lib": ("libLatency", "seconds")}
 
-    return basicStats(float(np.min(npLatencyCpuNetAckList[:,0])), float(np.max(npLatencyCpuNetAckList[:,0])), float(np.average(npLatencyCpuNetAckList[:,0])), float(np.std(npLatencyCpuNetAckList[:,0])), len(npLatencyCpuNetAckList)), \
-           basicStats(float(np.min(npLatencyCpuNetAckList[:,1])), float(np.max(npLatencyCpuNetAckList[:,1])), float(np.average(npLatencyCpuNetAckList[:,1])), float(np.std(npLatencyCpuNetAckList[:,1])), len(npLatencyCpuNetAckList)), \
-           basicStats(float(np.min(npLatencyCpuNetAckList[:,2])), float(np.max(npLatencyCpuNetAckList[:,2])), float(np.average(npLatencyCpuNetAckList[:,2])), float(np.std(npLatencyCpuNetAckList[:,2])), len(npLatencyCpuNetAckList)), \
-           basicStats(float(np.min(npLatencyCpuNetAckList[:,3])), float(np.max(npLatencyCpuNetAckList[:,3])), float(np.average(npLatencyCpuNetAckList[:,3])), float(np.std(npLatencyCpuNetAckList[:,3])), len(npLatencyCpuNetAckList))
+def calcTrxLatencyBreakdown(trxs: trxTable, percentiles=DEFAULT_REPORT_PERCENTILES, histogramSubBuckets=DEFAULT_HISTOGRAM_SUB_BUCKETS) -> dict:
+    """Splits the latency of the transactions found in blocks into the stages each passed through
+
+    sign -- trx generator re-signing the transaction
+    send -- trx generator packing and handing the transaction to its connection to the node
+    ack -- round trip from send to the node's acknowledgement (HTTP endpoints only)
+    block -- from send to the timestamp of the block including the transaction, the trx latency
+    lib -- from the timestamp of that block to the validation node receiving the block making it irreversible
+
+    Stages not measured for any transaction (e.g. ack over P2P or sign with an older trx generator) are left out.
+
+    Returns:
+    stage -> basicStats, over the transactions the stage was measured for
+    """
+    sent = trxs.column("calcdTimeEpoch") != 0
+    breakdown = {}
+    for stage, (name, _) in TRX_LATENCY_STAGES.items():
+        values = trxs.column(name)[sent].astype(float)
+        values = values[values >= 0]
+        if len(values) == 0:
+            continue
+        breakdown[stage] = basicStats(float(np.min(values)), float(np.max(values)), float(np.average(values)), float(np.std(values)), len(values),
+                                      *calcDistribution(values, percentiles, histogramSubBuckets))
+    return breakdown
 
 class LogReaderEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -485,12 +870,18 @@ class JsonReportHandler:
         with open(exportPath, 'wt') as f:
             f.write(report)
 
-def analyzeLogResults(data: chainData, tpsTestConfig: TpsTestConfig, artifacts: ArtifactPaths) -> LogAnalysis:
-    scrapeLogBlockElapsedTime(data, artifacts.nodeopLogPath)
-    scrapeLogDroppedForkedBlocks(data, artifacts.nodeopLogDir)
+def analyzeLogResults(data: chainData, tpsTestConfig: TpsTestConfig, artifacts: ArtifactPaths, processes=None) -> LogAnalysis:
+    """processes: number of worker processes the node and trx generator logs are scraped over, defaults to the cpu count."""
+    numLogFiles = data.numNodes + len(list(artifacts.trxGenLogDirPath.glob("trx_data_output_*.txt")))
+    executor = createAnalysisExecutor(numLogFiles, processes)
+    try:
+        scrapeNodeopLogs(data, artifacts.nodeopLogPath, artifacts.nodeopLogDir, executor, artifacts.nodeopLogOffsets)
 
-    trxSent = {}
-    scrapeTrxGenTrxSentDataLogs(trxSent, artifacts.trxGenLogDirPath, tpsTestConfig.quiet)
+        trxSent = {}
+        scrapeTrxGenTrxSentDataLogs(trxSent, artifacts.trxGenLogDirPath, tpsTestConfig.quiet, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     trxAckStatsApplicable="NOT APPLICABLE" if list(trxSent.values())[0].acked == "NA" else "APPLICABLE"
 
@@ -507,15 +898,18 @@ def analyzeLogResults(data: chainData, tpsTestConfig: TpsTestConfig, artifacts:
 
     updateBlockTotals(data)
     populateTrxLatencies(data)
-    writeTransactionMetrics(data.trxDict, artifacts.transactionMetricsDataPath)
+    writeTransactionMetrics(data.trxTable, artifacts.transactionMetricsDataPath)
     guide = calcChainGuide(data, tpsTestConfig.numBlocksToPrune)
-    trxLatencyStats, trxCpuStats, trxNetStats, trxAckStats = calcTrxLatencyCpuNetStats(data.trxDict)
-    tpsStats = scoreTransfersPerSecond(data, guide)
-    blkSizeStats = calcBlockSizeStats(data, guide)
+    trxLatencyStats, trxCpuStats, trxNetStats, trxAckStats = calcTrxLatencyCpuNetStats(data.trxTable, tpsTestConfig.percentiles, tpsTestConfig.histogramSubBuckets)
+    trxLatencyBreakdown = calcTrxLatencyBreakdown(data.trxTable, tpsTestConfig.percentiles, tpsTestConfig.histogramSubBuckets)
+    tpsStats = scoreTransfersPerSecond(data, guide, tpsTestConfig.percentiles, tpsTestConfig.histogramSubBuckets)
+    blkSizeStats = calcBlockSizeStats(data, guide, tpsTestConfig.percentiles, tpsTestConfig.histogramSubBuckets)
+    blkCpuStats = calcBlockCpuStats(data, guide, tpsTestConfig.percentiles, tpsTestConfig.histogramSubBuckets)
     prodWindows = calcProductionWindows(prodDict)
 
     if not tpsTestConfig.quiet:
-        print(f"Blocks Guide: {guide}\nTPS: {tpsStats}\nBlock Size: {blkSizeStats}\nTrx Latency: {trxLatencyStats}\nTrx CPU: {trxCpuStats}\nTrx Net: {trxNetStats}")
+        print(f"Blocks Guide: {guide}\nTPS: {tpsStats}\nBlock Size: {blkSizeStats}\nBlock CPU: {blkCpuStats}\nTrx Latency: {trxLatencyStats}\nTrx CPU: {trxCpuStats}\nTrx Net: {trxNetStats}")
+        print("Trx Latency Breakdown:\n" + "\n".join(f"  {stage}: avg {stats.avg} {TRX_LATENCY_STAGES[stage][1]}" for stage, stats in trxLatencyBreakdown.items()))
 
-    return LogAnalysis(guide=guide, tpsStats=tpsStats, blockSizeStats=blkSizeStats, trxLatencyStats=trxLatencyStats, trxCpuStats=trxCpuStats, trxNetStats=trxNetStats,
-                       trxAckStatsApplicable=trxAckStatsApplicable, trxAckStats=trxAckStats, prodWindows=prodWindows, notFound=notFound)
+    return LogAnalysis(guide=guide, tpsStats=tpsStats, blockSizeStats=blkSizeStats, blockCpuStats=blkCpuStats, trxLatencyStats=trxLatencyStats, trxCpuStats=trxCpuStats, trxNetStats=trxNetStats,
+                       trxAckStatsApplicable=trxAckStatsApplicable, trxAckStats=trxAckStats, trxLatencyBreakdown=trxLatencyBreakdown, prodWindows=prodWindows, notFound=notFound)
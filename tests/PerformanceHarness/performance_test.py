@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
 import argparse
+import concurrent.futures
 import copy
 import math
+import multiprocessing
 import os
 import sys
 import shutil
@@ -10,13 +12,15 @@ import shutil
 from pathlib import Path, PurePath
 sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
 
-from TestHarness import TestHelper, Utils, Account
+from TestHarness import TestHelper, Utils, Account, Cluster
 from .performance_test_basic import PerformanceTestBasic, PtbArgumentsHandler
 from platform import release, system
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from enum import Enum
-from .log_reader import JsonReportHandler
+from .log_reader import JsonReportHandler, DEFAULT_REPORT_PERCENTILES, DEFAULT_HISTOGRAM_SUB_BUCKETS
+from .prometheus_sampler import createAbortRules
+from .results_store import recordReport, studentTCritical
 
 try:
     from datetime import UTC
@@ -24,6 +28,20 @@ except ImportError:
     from datetime import timezone
     UTC = timezone.utc
 
+# floor on the ramp's baseline block latency, so jitter on an idle cluster does not trip the latency knee
+RAMP_MIN_BASELINE_LATENCY_MS = 50
+
+def confidenceBounds95(values: list):
+    """Mean of values and the bounds of its 95% confidence interval, which collapse to the mean for fewer than two values."""
+    if not values:
+        return 0, 0, 0
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, mean, mean
+    stdDev = math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1))
+    halfWidth = studentTCritical(0.05, len(values) - 1) * stdDev / math.sqrt(len(values))
+    return mean, mean - halfWidth, mean + halfWidth
+
 class PerformanceTest:
 
     @dataclass
@@ -34,6 +52,17 @@ class PerformanceTest:
         searchCeiling: int = 0
         basicTestResult: PerformanceTestBasic.PerfTestBasicResult = field(default_factory=PerformanceTestBasic.PerfTestBasicResult)
 
+    @dataclass
+    class PerfTestRampResult:
+        kneeTps: int = 0
+        baselineBlockLatencyMs: float = None
+        stages: list = field(default_factory=list) #PerformanceTestBasic.RampStageResult list
+        confirmedTps: int = 0
+        confirmationTps: list = field(default_factory=list)
+        maxTpsMean: float = 0
+        maxTpsLowerBound: float = 0
+        maxTpsUpperBound: float = 0
+
     @dataclass
     class PtConfig:
         testDurationSec: int=150
@@ -57,7 +86,26 @@ class PerformanceTest:
         opModeCmd: str=""
         trxGenerator: Path=Path(".")
         saveState: bool=False
-
+        reportPercentiles: list = field(default_factory=lambda: list(DEFAULT_REPORT_PERCENTILES))
+        histogramSubBuckets: int = DEFAULT_HISTOGRAM_SUB_BUCKETS
+        prometheusSampleIntervalSec: float=0
+        resourceSampleIntervalSec: float=0
+        abortMinTpsPct: float=0
+        abortLowTpsBlocks: int=20
+        abortEmptyBlocks: int=0
+        abortUnappliedGrowthSamples: int=0
+        reuseCluster: bool=False
+        searchStrategy: str="binary"
+        rampStepTps: int=0
+        rampStageDurationSec: int=10
+        rampMinEfficiencyPct: float=90
+        rampMaxLatencyFactor: float=3
+        confirmationRuns: int=3
+        threadOptParallelism: int=1
+        resultsDb: Path=None
+        trxGenCpus: str=None
+        trxGenRampUpSec: float=0
+        trxGenProgressIntervalSec: float=0
 
         def __post_init__(self):
             self.opModeDesc = "Block Producer Operational Mode" if self.opModeCmd == "testBpOpMode" else "API Node Operational Mode" if self.opModeCmd == "testApiOpMode" else "Undefined Operational Mode"
@@ -67,6 +115,15 @@ class PerformanceTest:
                 self.minTpsToTest = 1
             if self.maxTpsToTest < self.minTpsToTest:
                 self.minTpsToTest = self.maxTpsToTest
+            if self.rampStepTps <= 0:
+                self.rampStepTps = self.testIterationMinStep
+            if self.confirmationRuns < 1:
+                self.confirmationRuns = 1
+            if self.threadOptParallelism < 1:
+                self.threadOptParallelism = 1
+            # early abort criteria are evaluated on live prometheus samples
+            if self.prometheusSampleIntervalSec <= 0 and (self.abortMinTpsPct > 0 or self.abortEmptyBlocks > 0 or self.abortUnappliedGrowthSamples > 0):
+                self.prometheusSampleIntervalSec = 1
 
     @dataclass
     class TpsTestResult:
@@ -75,6 +132,7 @@ class PerformanceTest:
             maxTpsAchieved: int = 0
             searchResults: list = field(default_factory=list) #PerfTestSearchIndivResult list
             maxTpsReport: dict = field(default_factory=dict)
+            rampResults: "PerformanceTest.PerfTestRampResult" = None
 
         binSearchResults: PerfTestSearchResults = field(default_factory=PerfTestSearchResults)
         longRunningSearchResults: PerfTestSearchResults= field(default_factory=PerfTestSearchResults)
@@ -106,6 +164,20 @@ class PerformanceTest:
         self.loggingConfig = PerformanceTest.LoggingConfig(logDirBase=Path(self.ptConfig.logDirRoot)/f"PHSRLogs",
                                                            logDirTimestamp=f"{self.testsStart.strftime('%Y-%m-%d_%H-%M-%S')}")
 
+    def createSearchAbortRules(self) -> list:
+        return createAbortRules(minTpsPct=self.ptConfig.abortMinTpsPct, lowTpsBlocks=self.ptConfig.abortLowTpsBlocks,
+                                emptyBlocks=self.ptConfig.abortEmptyBlocks, unappliedGrowthSamples=self.ptConfig.abortUnappliedGrowthSamples)
+
+    def createSearchPtbConfig(self, targetTps: int, testDurationSec: int, logDirRoot: Path, delReport: bool, quiet: bool, delPerfLogs: bool, saveState: bool) -> PerformanceTestBasic.PtbConfig:
+        return PerformanceTestBasic.PtbConfig(targetTps=targetTps, testTrxGenDurationSec=testDurationSec, tpsLimitPerGenerator=self.ptConfig.tpsLimitPerGenerator,
+                                              numAddlBlocksToPrune=self.ptConfig.numAddlBlocksToPrune, logDirRoot=logDirRoot, delReport=delReport,
+                                              quiet=quiet, delPerfLogs=delPerfLogs, userTrxDataFile=self.ptConfig.userTrxDataFile, endpointMode=self.ptConfig.endpointMode,
+                                              trxGenerator=self.ptConfig.trxGenerator, saveState=saveState, reportPercentiles=self.ptConfig.reportPercentiles,
+                                              histogramSubBuckets=self.ptConfig.histogramSubBuckets, prometheusSampleIntervalSec=self.ptConfig.prometheusSampleIntervalSec,
+                                              resourceSampleIntervalSec=self.ptConfig.resourceSampleIntervalSec, resultsDb=self.ptConfig.resultsDb,
+                                              trxGenCpus=self.ptConfig.trxGenCpus, trxGenRampUpSec=self.ptConfig.trxGenRampUpSec,
+                                              trxGenProgressIntervalSec=self.ptConfig.trxGenProgressIntervalSec)
+
     def performPtbBinarySearch(self, clusterConfig: PerformanceTestBasic.ClusterConfig, logDirRoot: Path, delReport: bool, quiet: bool, delPerfLogs: bool, saveState: bool) -> TpsTestResult.PerfTestSearchResults:
         floor = self.ptConfig.minTpsToTest
         ceiling = self.ptConfig.maxTpsToTest
@@ -115,16 +187,16 @@ class PerformanceTest:
         maxTpsAchieved = 0
         maxTpsReport = {}
         searchResults = []
+        warmCluster = PerformanceTestBasic.WarmCluster() if self.ptConfig.reuseCluster else None
 
         while ceiling >= floor:
             print(f"Running scenario: floor {floor} binSearchTarget {binSearchTarget} ceiling {ceiling}")
             scenarioResult = PerformanceTest.PerfTestSearchIndivResult(success=False, searchTarget=binSearchTarget, searchFloor=floor, searchCeiling=ceiling)
-            ptbConfig = PerformanceTestBasic.PtbConfig(targetTps=binSearchTarget, testTrxGenDurationSec=self.ptConfig.testDurationSec, tpsLimitPerGenerator=self.ptConfig.tpsLimitPerGenerator,
-                                                       numAddlBlocksToPrune=self.ptConfig.numAddlBlocksToPrune, logDirRoot=logDirRoot, delReport=delReport,
-                                                       quiet=quiet, delPerfLogs=delPerfLogs, userTrxDataFile=self.ptConfig.userTrxDataFile, endpointMode=self.ptConfig.endpointMode,
-                                                       trxGenerator=self.ptConfig.trxGenerator, saveState=saveState)
+            ptbConfig = self.createSearchPtbConfig(targetTps=binSearchTarget, testDurationSec=self.ptConfig.testDurationSec, logDirRoot=logDirRoot,
+                                                   delReport=delReport, quiet=quiet, delPerfLogs=delPerfLogs, saveState=saveState)
 
-            myTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRun")
+            myTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRun", abortRules=self.createSearchAbortRules(),
+                                          warmCluster=warmCluster)
             myTest.runTest()
             if myTest.testResult.testPassed:
                 maxTpsAchieved = binSearchTarget
@@ -141,8 +213,100 @@ class PerformanceTest:
 
             binSearchTarget = floor + (math.ceil(((ceiling - floor) / minStep) / 2) * minStep)
 
+        if warmCluster is not None:
+            warmCluster.shutdown(logDirPath=Path(logDirRoot)/"warmClusterLogs", dumpErrorDetails=self.testHelperConfig.dumpErrorDetails, saveState=saveState)
+
         return PerformanceTest.TpsTestResult.PerfTestSearchResults(maxTpsAchieved=maxTpsAchieved, searchResults=searchResults, maxTpsReport=maxTpsReport)
 
+    def rampStagePasses(self, stage: PerformanceTestBasic.RampStageResult, baselineBlockLatencyMs: float) -> bool:
+        """A ramp stage is below the saturation knee while its generators ran cleanly, the chain kept up with rampMinEfficiencyPct
+        of the target, and block latency stayed within rampMaxLatencyFactor of the baseline."""
+        if not stage.completedRun or stage.achievedTps < stage.targetTps * self.ptConfig.rampMinEfficiencyPct / 100:
+            return False
+        if baselineBlockLatencyMs is None or stage.avgBlockLatencyMs is None:
+            return True
+        return stage.avgBlockLatencyMs <= max(baselineBlockLatencyMs, RAMP_MIN_BASELINE_LATENCY_MS) * self.ptConfig.rampMaxLatencyFactor
+
+    def findRampKnee(self, stages: list) -> int:
+        """Target TPS of the last ramp stage before the first one past the saturation knee, 0 if the first stage is already past it."""
+        kneeTps = 0
+        baselineBlockLatencyMs = stages[0].avgBlockLatencyMs if stages else None
+        for stage in stages:
+            if not self.rampStagePasses(stage, baselineBlockLatencyMs):
+                break
+            kneeTps = stage.targetTps
+        return kneeTps
+
+    def performPtbRampSearch(self, clusterConfig: PerformanceTestBasic.ClusterConfig, logDirRoot: Path, delReport: bool, quiet: bool, delPerfLogs: bool, saveState: bool) -> TpsTestResult.PerfTestSearchResults:
+        """Ramp the target TPS in rampStepTps steps within a single run to find the saturation knee from live throughput and
+        block latency, then confirm it with confirmationRuns fixed rate runs, stepping down by testIterationMinStep until all
+        of them pass.  The max TPS is reported with the 95% confidence bounds of the confirmation runs' average TPS."""
+        floor = self.ptConfig.minTpsToTest
+        step = self.ptConfig.rampStepTps
+        rampTargets = list(range(max(floor, step), self.ptConfig.maxTpsToTest + 1, step))
+        if not rampTargets or rampTargets[-1] != self.ptConfig.maxTpsToTest:
+            rampTargets.append(self.ptConfig.maxTpsToTest)
+
+        warmCluster = PerformanceTestBasic.WarmCluster()
+        ptbConfig = self.createSearchPtbConfig(targetTps=rampTargets[-1], testDurationSec=self.ptConfig.rampStageDurationSec, logDirRoot=logDirRoot,
+                                               delReport=delReport, quiet=quiet, delPerfLogs=delPerfLogs, saveState=saveState)
+        rampTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRamp", warmCluster=warmCluster)
+        stages = rampTest.runRampTest(rampTargets=rampTargets, stageDurationSec=self.ptConfig.rampStageDurationSec,
+                                      continueRamp=lambda stages: self.rampStagePasses(stages[-1], stages[0].avgBlockLatencyMs))
+        rampResults = PerformanceTest.PerfTestRampResult(kneeTps=self.findRampKnee(stages), stages=stages,
+                                                         baselineBlockLatencyMs=stages[0].avgBlockLatencyMs if stages else None)
+        print(f"Ramp search saturation knee: {rampResults.kneeTps}")
+        if not self.ptConfig.reuseCluster:
+            warmCluster.shutdown(logDirPath=Path(logDirRoot)/"warmClusterLogs", dumpErrorDetails=self.testHelperConfig.dumpErrorDetails, saveState=saveState)
+
+        ceiling = max(rampResults.kneeTps, floor)
+        searchTarget = ceiling
+        maxTpsAchieved = 0
+        maxTpsReport = {}
+        searchResults = []
+        while True:
+            print(f"Running confirmation scenario: floor {floor} searchTarget {searchTarget} ceiling {ceiling} runs {self.ptConfig.confirmationRuns}")
+            confirmationTps = []
+            for run in range(self.ptConfig.confirmationRuns):
+                scenarioResult = PerformanceTest.PerfTestSearchIndivResult(success=False, searchTarget=searchTarget, searchFloor=floor, searchCeiling=ceiling)
+                ptbConfig = self.createSearchPtbConfig(targetTps=searchTarget, testDurationSec=self.ptConfig.testDurationSec, logDirRoot=logDirRoot,
+                                                       delReport=delReport, quiet=quiet, delPerfLogs=delPerfLogs, saveState=saveState)
+                myTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRun",
+                                              abortRules=self.createSearchAbortRules(), warmCluster=warmCluster if self.ptConfig.reuseCluster else None)
+                myTest.runTest()
+                scenarioResult.success = myTest.testResult.testPassed
+                scenarioResult.basicTestResult = myTest.testResult
+                searchResults.append(scenarioResult)
+                if not self.ptConfig.quiet:
+                    print(f"confirmation run {run} result -- target: {searchTarget} | result: {searchResults[-1]}")
+                if not scenarioResult.success:
+                    break
+                confirmationTps.append(myTest.testResult.resultAvgTps)
+                maxTpsReport = myTest.report
+            else:
+                maxTpsAchieved = searchTarget
+                rampResults.confirmedTps = searchTarget
+                rampResults.confirmationTps = confirmationTps
+                rampResults.maxTpsMean, rampResults.maxTpsLowerBound, rampResults.maxTpsUpperBound = confidenceBounds95(confirmationTps)
+                break
+            if searchTarget <= floor:
+                # already failed at the floor, nothing left to confirm
+                maxTpsReport = {}
+                break
+            searchTarget = max(searchTarget - self.ptConfig.testIterationMinStep, floor)
+
+        if warmCluster.isRunning():
+            warmCluster.shutdown(logDirPath=Path(logDirRoot)/"warmClusterLogs", dumpErrorDetails=self.testHelperConfig.dumpErrorDetails, saveState=saveState)
+
+        if rampResults.confirmedTps:
+            print(f"Ramp search max TPS: {maxTpsAchieved} mean: {rampResults.maxTpsMean:.1f} 95% confidence bounds: [{rampResults.maxTpsLowerBound:.1f}, {rampResults.maxTpsUpperBound:.1f}]")
+        return PerformanceTest.TpsTestResult.PerfTestSearchResults(maxTpsAchieved=maxTpsAchieved, searchResults=searchResults, maxTpsReport=maxTpsReport, rampResults=rampResults)
+
+    def performPtbSearch(self, clusterConfig: PerformanceTestBasic.ClusterConfig, logDirRoot: Path, delReport: bool, quiet: bool, delPerfLogs: bool, saveState: bool) -> TpsTestResult.PerfTestSearchResults:
+        if self.ptConfig.searchStrategy == "ramp":
+            return self.performPtbRampSearch(clusterConfig=clusterConfig, logDirRoot=logDirRoot, delReport=delReport, quiet=quiet, delPerfLogs=delPerfLogs, saveState=saveState)
+        return self.performPtbBinarySearch(clusterConfig=clusterConfig, logDirRoot=logDirRoot, delReport=delReport, quiet=quiet, delPerfLogs=delPerfLogs, saveState=saveState)
+
     def performPtbReverseLinearSearch(self, tpsInitial: int) -> TpsTestResult.PerfTestSearchResults:
 
         # Default - Decrementing Max TPS in range [minTpsToTest (def=1), tpsInitial]
@@ -158,16 +322,16 @@ class PerformanceTest:
         maxTpsReport = {}
         searchResults = []
         maxFound = False
+        warmCluster = PerformanceTestBasic.WarmCluster() if self.ptConfig.reuseCluster else None
 
         while not maxFound:
             print(f"Running scenario: floor {absFloor} searchTarget {searchTarget} ceiling {absCeiling}")
             scenarioResult = PerformanceTest.PerfTestSearchIndivResult(success=False, searchTarget=searchTarget, searchFloor=absFloor, searchCeiling=absCeiling)
-            ptbConfig = PerformanceTestBasic.PtbConfig(targetTps=searchTarget, testTrxGenDurationSec=self.ptConfig.testDurationSec, tpsLimitPerGenerator=self.ptConfig.tpsLimitPerGenerator,
-                                                    numAddlBlocksToPrune=self.ptConfig.numAddlBlocksToPrune, logDirRoot=self.loggingConfig.ptbLogsDirPath, delReport=self.ptConfig.delReport,
-                                                    quiet=self.ptConfig.quiet, delPerfLogs=self.ptConfig.delPerfLogs, userTrxDataFile=self.ptConfig.userTrxDataFile, endpointMode=self.ptConfig.endpointMode,
-                                                    trxGenerator=self.ptConfig.trxGenerator, saveState=self.ptConfig.saveState)
+            ptbConfig = self.createSearchPtbConfig(targetTps=searchTarget, testDurationSec=self.ptConfig.testDurationSec, logDirRoot=self.loggingConfig.ptbLogsDirPath,
+                                                   delReport=self.ptConfig.delReport, quiet=self.ptConfig.quiet, delPerfLogs=self.ptConfig.delPerfLogs, saveState=self.ptConfig.saveState)
 
-            myTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=self.clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRun")
+            myTest = PerformanceTestBasic(testHelperConfig=self.testHelperConfig, clusterConfig=self.clusterConfig, ptbConfig=ptbConfig, testNamePath="PHSRun", abortRules=self.createSearchAbortRules(),
+                                          warmCluster=warmCluster)
             myTest.runTest()
             if myTest.testResult.testPassed:
                 maxTpsAchieved = searchTarget
@@ -185,6 +349,10 @@ class PerformanceTest:
             if not self.ptConfig.quiet:
                 print(f"reverse linear search result -- target: {searchTarget} | result: {searchResults[-1]}")
 
+        if warmCluster is not None:
+            warmCluster.shutdown(logDirPath=Path(self.loggingConfig.ptbLogsDirPath)/"warmClusterLogs", dumpErrorDetails=self.testHelperConfig.dumpErrorDetails,
+                                 saveState=self.ptConfig.saveState)
+
         return PerformanceTest.TpsTestResult.PerfTestSearchResults(maxTpsAchieved=maxTpsAchieved, searchResults=searchResults, maxTpsReport=maxTpsReport)
 
     class PluginThreadOpt(Enum):
@@ -210,34 +378,58 @@ class PerformanceTest:
 
         threadToMaxTpsDict: dict = {}
 
-        clusterConfig = copy.deepcopy(self.clusterConfig)
         analysisStart = datetime.now(UTC)
 
         with open(resultsFile, 'w') as log:
             log.write(f"{optPlugin.value}Threads, maxTpsAchieved\n")
 
-        lastMaxTpsAchieved = 0
-        for threadCount in range(minThreadCount, maxThreadCount+1):
-            print(f"Running {optPlugin.value} thread count optimization check with {threadCount} {optPlugin.value} threads")
-
-            setattr(getattr(clusterConfig.extraNodeopArgs, optPlugin.value + 'PluginArgs'), f"{optPlugin.value}Threads", threadCount)
-
-            binSearchResults = self.performPtbBinarySearch(clusterConfig=clusterConfig, logDirRoot=self.loggingConfig.pluginThreadOptLogsDirPath,
-                                                            delReport=True, quiet=False, delPerfLogs=True, saveState=False)
+        # thread counts are searched in batches of concurrent, isolated searches, each pinned to its own share of the cpus
+        parallelism = min(self.ptConfig.threadOptParallelism, len(os.sched_getaffinity(0)))
+        cpuSets = partitionCpus(parallelism) if parallelism > 1 else [None]
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=parallelism, mp_context=multiprocessing.get_context("spawn")) if parallelism > 1 else None
 
-            threadToMaxTpsDict[threadCount] = binSearchResults.maxTpsAchieved
-            if not self.ptConfig.quiet:
-                print("Search Results:")
-                for i in range(len(binSearchResults.searchResults)):
-                    print(f"Search scenario {optPlugin.value} thread count {threadCount}: {i} result: {binSearchResults.searchResults[i]}")
-
-            with open(resultsFile, 'a') as log:
-                log.write(f"{threadCount},{binSearchResults.maxTpsAchieved}\n")
-
-            if optType == PerformanceTest.PluginThreadOptRunType.LOCAL_MAX:
-                if binSearchResults.maxTpsAchieved <= lastMaxTpsAchieved:
+        threadCounts = list(range(minThreadCount, maxThreadCount+1))
+        lastMaxTpsAchieved = 0
+        try:
+            for batchStart in range(0, len(threadCounts), parallelism):
+                searches = {}
+                for threadCount, cpus in zip(threadCounts[batchStart:batchStart + parallelism], cpuSets):
+                    print(f"Running {optPlugin.value} thread count optimization check with {threadCount} {optPlugin.value} threads" + (f" on cpus {sorted(cpus)}" if cpus is not None else ""))
+
+                    clusterConfig = copy.deepcopy(self.clusterConfig)
+                    setattr(getattr(clusterConfig.extraNodeopArgs, optPlugin.value + 'PluginArgs'), f"{optPlugin.value}Threads", threadCount)
+
+                    if executor is None:
+                        searches[threadCount] = self.performPtbSearch(clusterConfig=clusterConfig, logDirRoot=self.loggingConfig.pluginThreadOptLogsDirPath,
+                                                                      delReport=True, quiet=False, delPerfLogs=True, saveState=False)
+                    else:
+                        searches[threadCount] = executor.submit(runIsolatedPtbSearch, self, clusterConfig,
+                                                                self.loggingConfig.pluginThreadOptLogsDirPath/Path(f"{optPlugin.value}Threads{threadCount}"), cpus)
+
+                localMaxFound = False
+                for threadCount, search in searches.items():
+                    binSearchResults = search if executor is None else search.result()
+
+                    threadToMaxTpsDict[threadCount] = binSearchResults.maxTpsAchieved
+                    if not self.ptConfig.quiet:
+                        print("Search Results:")
+                        for i in range(len(binSearchResults.searchResults)):
+                            print(f"Search scenario {optPlugin.value} thread count {threadCount}: {i} result: {binSearchResults.searchResults[i]}")
+
+                    with open(resultsFile, 'a') as log:
+                        log.write(f"{threadCount},{binSearchResults.maxTpsAchieved}\n")
+
+                    if optType == PerformanceTest.PluginThreadOptRunType.LOCAL_MAX:
+                        if binSearchResults.maxTpsAchieved <= lastMaxTpsAchieved:
+                            localMaxFound = True
+                            break
+                    lastMaxTpsAchieved = binSearchResults.maxTpsAchieved
+
+                if localMaxFound:
                     break
-            lastMaxTpsAchieved = binSearchResults.maxTpsAchieved
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
         analysisFinish = datetime.now(UTC)
 
@@ -259,6 +451,7 @@ class PerformanceTest:
 
     def createTpsTestReport(self, tpsTestResult: TpsTestResult) -> dict:
         report = {}
+        report['InitialSearchStrategy'] = self.ptConfig.searchStrategy
         report['InitialMaxTpsAchieved'] = tpsTestResult.binSearchResults.maxTpsAchieved
         report['LongRunningMaxTpsAchieved'] = tpsTestResult.longRunningSearchResults.maxTpsAchieved
         report['tpsTestStart'] = tpsTestResult.tpsTestStart
@@ -268,6 +461,8 @@ class PerformanceTest:
         report['LongRunningSearchScenariosSummary'] =  {tpsTestResult.longRunningSearchResults.searchResults[x].searchTarget : "PASS" if tpsTestResult.longRunningSearchResults.searchResults[x].success else "FAIL" for x in range(len(tpsTestResult.longRunningSearchResults.searchResults))}
         report['InitialSearchResults'] =  {x: asdict(tpsTestResult.binSearchResults.searchResults[x]) for x in range(len(tpsTestResult.binSearchResults.searchResults))}
         report['InitialMaxTpsReport'] =  tpsTestResult.binSearchResults.maxTpsReport
+        if tpsTestResult.binSearchResults.rampResults is not None:
+            report['InitialRampSearch'] = asdict(tpsTestResult.binSearchResults.rampResults)
         report['LongRunningSearchResults'] =  {x: asdict(tpsTestResult.longRunningSearchResults.searchResults[x]) for x in range(len(tpsTestResult.longRunningSearchResults.searchResults))}
         report['LongRunningMaxTpsReport'] =  tpsTestResult.longRunningSearchResults.maxTpsReport
         return report
@@ -341,8 +536,8 @@ class PerformanceTest:
         tpsTestStart = datetime.now(UTC)
         perfRunSuccessful = False
 
-        binSearchResults = self.performPtbBinarySearch(clusterConfig=self.clusterConfig, logDirRoot=self.loggingConfig.ptbLogsDirPath,
-                                                       delReport=self.ptConfig.delReport, quiet=self.ptConfig.quiet, delPerfLogs=self.ptConfig.delPerfLogs,
+        binSearchResults = self.performPtbSearch(clusterConfig=self.clusterConfig, logDirRoot=self.loggingConfig.ptbLogsDirPath,
+                                                 delReport=self.ptConfig.delReport, quiet=self.ptConfig.quiet, delPerfLogs=self.ptConfig.delPerfLogs,
                                                        saveState=self.ptConfig.saveState)
 
         print(f"Successful rate of: {binSearchResults.maxTpsAchieved}")
@@ -428,12 +623,40 @@ class PerformanceTest:
         if not self.ptConfig.delReport:
             JsonReportHandler.exportReportAsJSON(jsonReport, self.loggingConfig.logDirPath/Path("report.json"))
 
+        if self.ptConfig.resultsDb is not None:
+            recordReport(self.ptConfig.resultsDb, self.report, kind="pt", testName="PHSR",
+                         reportPath=None if self.ptConfig.delReport else self.loggingConfig.logDirPath/Path("report.json"))
+
         if self.ptConfig.delPerfLogs:
             print(f"Cleaning up logs directory: {self.loggingConfig.logDirPath}")
             self.testDirsCleanup()
 
         return testSuccessful
 
+def partitionCpus(numSets: int) -> list:
+    """Split the cpus this process may run on into numSets disjoint, equally sized sets of adjacent cpus."""
+    cpus = sorted(os.sched_getaffinity(0))
+    setSize = len(cpus) // numSets
+    return [set(cpus[i * setSize:(i + 1) * setSize]) for i in range(numSets)]
+
+# set once a worker process of a parallel plugin thread count sweep moved into its own network namespace, workers are
+# reused across the sweep's batches of searches
+workerNetworkUnshared = False
+
+def runIsolatedPtbSearch(perfTest: PerformanceTest, clusterConfig: PerformanceTestBasic.ClusterConfig, logDirRoot: Path, cpus: set) -> PerformanceTest.TpsTestResult.PerfTestSearchResults:
+    """Run one search of a parallel plugin thread count sweep in a spawned worker process, so it gets its own test data
+    directories.  The worker and the nodes and generators it launches are pinned to cpus, and its clusters are launched
+    in their own network namespace so concurrent searches do not collide on ports."""
+    global workerNetworkUnshared
+    os.sched_setaffinity(0, cpus)
+    # the worker moves into its namespace once, before any of its clusters starts a thread, as the kernel refuses the
+    # unprivileged unshare to a process with threads.  Its clusters then launch in that namespace.
+    if not workerNetworkUnshared:
+        Cluster.unshareNetwork()
+        workerNetworkUnshared = True
+    perfTest.testHelperConfig.unshared = False
+    return perfTest.performPtbSearch(clusterConfig=clusterConfig, logDirRoot=logDirRoot, delReport=True, quiet=False, delPerfLogs=True, saveState=False)
+
 class PerfTestArgumentsHandler(object):
 
 
@@ -463,7 +686,11 @@ class PerfTestArgumentsHandler(object):
                                                                         In \"full\" mode producer threads will incrementally be tested from plugin default..num logical processors, recording each performance and choosing the local max performance (same value as would be discovered in \"lmax\" mode). \
                                                                         Useful for graphing the full performance impact of each available thread.",
                                                                         choices=["none", "lmax", "full"], default="none")
+            ptParserGroup.add_argument("--thread-opt-parallelism", type=int, help=argparse.SUPPRESS if suppressHelp else "Number of thread counts searched concurrently by the --calc-*-threads optimizations. \
+                                                                        Each concurrent search runs its clusters in their own network namespace, pinned to an equal, disjoint share of the available cpus.", default=1)
             ptParserGroup.add_argument("--del-test-report", help=argparse.SUPPRESS if suppressHelp else "Whether to save json reports from each test scenario.", action='store_true')
+            ptParserGroup.add_argument("--reuse-cluster", help=argparse.SUPPRESS if suppressHelp else "Whether to keep one cluster, wallet and set of funded accounts running across the iterations of each TPS search, \
+                                                                        draining it to empty blocks between iterations instead of relaunching and setting it up for every iteration.", action='store_true')
 
             ptTpsGrpTitle="Performance Harness - TPS Test Config"
             ptTpsGrpDescription="TPS Performance Test configuration items."
@@ -474,6 +701,20 @@ class PerfTestArgumentsHandler(object):
             ptTpsParserGroup.add_argument("--test-iteration-duration-sec", type=int, help=argparse.SUPPRESS if suppressHelp else "The duration of transfer trx generation for each iteration of the test during the initial search (seconds)", default=150)
             ptTpsParserGroup.add_argument("--test-iteration-min-step", type=int, help=argparse.SUPPRESS if suppressHelp else "The step size determining granularity of tps result during initial search", default=500)
             ptTpsParserGroup.add_argument("--final-iterations-duration-sec", type=int, help=argparse.SUPPRESS if suppressHelp else "The duration of transfer trx generation for each final longer run iteration of the test during the final search (seconds)", default=300)
+            ptTpsParserGroup.add_argument("--abort-min-tps-pct", type=float, help=argparse.SUPPRESS if suppressHelp else "Abort a search iteration early when its live TPS stays below this percent of its target for --abort-low-tps-blocks blocks. 0 disables.", default=0)
+            ptTpsParserGroup.add_argument("--abort-low-tps-blocks", type=int, help=argparse.SUPPRESS if suppressHelp else "Number of blocks the live TPS must stay below --abort-min-tps-pct of target before a search iteration is aborted", default=20)
+            ptTpsParserGroup.add_argument("--abort-empty-blocks", type=int, help=argparse.SUPPRESS if suppressHelp else "Abort a search iteration early after this many consecutive empty or missed blocks once transactions started arriving. 0 disables.", default=0)
+            ptTpsParserGroup.add_argument("--abort-unapplied-growth-samples", type=int, help=argparse.SUPPRESS if suppressHelp else "Abort a search iteration early when a producer's unapplied transaction queue grows for this many consecutive prometheus samples. 0 disables.", default=0)
+            ptTpsParserGroup.add_argument("--search-strategy", type=str, help=argparse.SUPPRESS if suppressHelp else "Strategy of the initial max TPS search (\"binary\", \"ramp\"). \
+                                                                \"binary\" binary searches fixed rate runs between --min-tps-to-test and --max-tps-to-test. \
+                                                                \"ramp\" steps the target TPS up within a single run to find the saturation knee from live throughput and block latency, \
+                                                                then confirms it with --confirmation-runs fixed rate runs.",
+                                                                choices=["binary", "ramp"], default="binary")
+            ptTpsParserGroup.add_argument("--ramp-step-tps", type=int, help=argparse.SUPPRESS if suppressHelp else "Target TPS step between the stages of a ramp search. 0 uses --test-iteration-min-step.", default=0)
+            ptTpsParserGroup.add_argument("--ramp-stage-duration-sec", type=int, help=argparse.SUPPRESS if suppressHelp else "The duration of transaction generation at each stage of a ramp search (seconds)", default=10)
+            ptTpsParserGroup.add_argument("--ramp-min-efficiency-pct", type=float, help=argparse.SUPPRESS if suppressHelp else "A ramp stage is past the saturation knee when its achieved TPS falls below this percent of its target", default=90)
+            ptTpsParserGroup.add_argument("--ramp-max-latency-factor", type=float, help=argparse.SUPPRESS if suppressHelp else "A ramp stage is past the saturation knee when its average block latency exceeds this multiple of the first stage's", default=3)
+            ptTpsParserGroup.add_argument("--confirmation-runs", type=int, help=argparse.SUPPRESS if suppressHelp else "Number of fixed rate runs confirming the knee found by a ramp search, whose average TPS give the confidence bounds of the max TPS", default=3)
             return ptParser
 
         # Create 2 versions of the PT Parser, one with help suppressed to go on the top level parser where the help message is pared down
@@ -8,12 +8,19 @@ import sys
 import shutil
 import signal
 import json
+import math
+import threading
+import time
 import traceback
 
 from pathlib import Path, PurePath
 sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
 
-from .log_reader import blockData, trxData, chainData, scrapeTrxGenTrxSentDataLogs, JsonReportHandler, analyzeLogResults, TpsTestConfig, ArtifactPaths, LogAnalysis
+from .log_reader import blockData, chainData, scrapeTrxGenTrxSentDataLogs, JsonReportHandler, analyzeLogResults, TpsTestConfig, ArtifactPaths, LogAnalysis, DEFAULT_REPORT_PERCENTILES, DEFAULT_HISTOGRAM_SUB_BUCKETS, TRX_LATENCY_STAGES, nodeopLogPath
+from .results_store import recordReport, DEFAULT_RESULTS_DB
+from .prometheus_sampler import PrometheusSampler, TRXS_INCOMING_METRIC, BLOCKS_INCOMING_METRIC, BLOCK_LATENCY_METRIC, BLOCK_INTERVAL_SEC
+from .resource_sampler import ResourceSampler
+from .cpu_profiler import CpuProfiler, PROFILE_METHODS
 from .NodeopPluginArgs import ChainPluginArgs, HttpPluginArgs, NetPluginArgs, ProducerPluginArgs, ResourceMonitorPluginArgs, SignatureProviderPluginArgs, StateHistoryPluginArgs, TraceApiPluginArgs
 from TestHarness import Account, Cluster, TestHelper, Utils, WalletMgr, TransactionGeneratorsLauncher, TpsTrxGensConfig
 from TestHarness.TestHelper import AppArgs
@@ -35,6 +42,17 @@ class PerformanceTestBasic:
         numGeneratorsUsed: int = 0
         targetTpsPerGenList: list = field(default_factory=list)
         trxGenExitCodes: list = field(default_factory=list)
+        abortReason: str = None
+
+    @dataclass
+    class RampStageResult:
+        targetTps: int = 0
+        achievedTps: float = 0
+        avgBlockLatencyMs: float = None
+        stageStartSec: float = 0
+        stageEndSec: float = 0
+        completedRun: bool = False
+        trxGenExitCodes: list = field(default_factory=list)
 
     @dataclass
     class PerfTestBasicResult:
@@ -51,6 +69,7 @@ class PerformanceTestBasic:
         expectedTxns: int = 0
         resultTxns: int = 0
         testAnalysisBlockCnt: int = 0
+        abortReason: str = None
         logsDir: Path = Path("")
 
         def __post_init__(self):
@@ -110,6 +129,7 @@ class PerformanceTestBasic:
         loggingLevel: str = "info"
         loggingDict: dict = field(default_factory=lambda: { "bios": "off" })
         prodsEnableTraceApi: bool = False
+        parallelLaunch: bool = False
         nodeopVers: str = ""
         specificExtraNodeopArgs: dict = field(default_factory=dict)
         _totalNodes: int = 2
@@ -161,11 +181,11 @@ class PerformanceTestBasic:
             if "v2" in self.nodeopVers:
                 self.writeTrx = lambda trxDataFile, blockNum, trx: [trxDataFile.write(f"{trx['trx']['id']},{blockNum},{trx['cpu_usage_us']},{trx['net_usage_words']}\n")]
                 self.createBlockData = lambda block, blockTransactionTotal, blockNetTotal, blockCpuTotal: blockData(blockId=block["payload"]["id"], blockNum=block['payload']['block_num'], transactions=blockTransactionTotal, net=blockNetTotal, cpu=blockCpuTotal, producer=block["payload"]["producer"], status=block["payload"]["confirmed"], _timestamp=block["payload"]["timestamp"])
-                self.updateTrxDict = lambda blockNum, transaction, trxDict: trxDict.update(dict([(transaction['trx']['id'], trxData(blockNum, transaction['cpu_usage_us'], transaction['net_usage_words']))]))
+                self.appendTrx = lambda blockNum, transaction, trxTable: trxTable.append(transaction['trx']['id'], blockNum, transaction['cpu_usage_us'], transaction['net_usage_words'])
             else:
                 self.writeTrx = lambda trxDataFile, blockNum, trx:[ trxDataFile.write(f"{trx['id']},{trx['block_num']},{trx['block_time']},{trx['cpu_usage_us']},{trx['net_usage_words']},{trx['actions']}\n") ]
                 self.createBlockData = lambda block, blockTransactionTotal, blockNetTotal, blockCpuTotal: blockData(blockId=block["payload"]["id"], blockNum=block['payload']['number'], transactions=blockTransactionTotal, net=blockNetTotal, cpu=blockCpuTotal, producer=block["payload"]["producer"], status=block["payload"]["status"], _timestamp=block["payload"]["timestamp"])
-                self.updateTrxDict = lambda blockNum, transaction, trxDict: trxDict.update(dict([(transaction["id"], trxData(blockNum=transaction["block_num"], cpuUsageUs=transaction["cpu_usage_us"], netUsageUs=transaction["net_usage_words"], blockTime=transaction["block_time"]))]))
+                self.appendTrx = lambda blockNum, transaction, trxTable: trxTable.append(transaction["id"], blockNum=transaction["block_num"], cpuUsageUs=transaction["cpu_usage_us"], netUsageUs=transaction["net_usage_words"], blockTime=transaction["block_time"])
     @dataclass
     class PtbConfig:
         targetTps: int=8000
@@ -178,11 +198,24 @@ class PerformanceTestBasic:
         delPerfLogs: bool=False
         expectedTransactionsSent: int = field(default_factory=int, init=False)
         printMissingTransactions: bool=True
+        reportPercentiles: list = field(default_factory=lambda: list(DEFAULT_REPORT_PERCENTILES))
+        histogramSubBuckets: int = DEFAULT_HISTOGRAM_SUB_BUCKETS
+        prometheusSampleIntervalSec: float=0
+        resourceSampleIntervalSec: float=0
+        resultsDb: Path=None
+        # cpu list ("8-11,14") the transaction generators are pinned to, the nodes are then pinned to the remaining cpus
+        trxGenCpus: str=None
+        trxGenRampUpSec: float=0
+        trxGenProgressIntervalSec: float=0
         userTrxDataFile: Path=None
         endpointMode: str="p2p"
         apiEndpoint: str=None
         trxGenerator: Path=Path(".")
         saveState: bool=False
+        # node ids whose cpu is profiled during the steady state window of the run, see cpu_profiler.py
+        profileNodes: list = field(default_factory=list)
+        profileMethod: str="auto"
+        profileFrequencyHz: int=99
 
         def __post_init__(self):
             self.expectedTransactionsSent = self.testTrxGenDurationSec * self.targetTps
@@ -199,10 +232,57 @@ class PerformanceTestBasic:
         def __post_init__(self):
             self.logDirPath = self.logDirBase/Path(f"{self.logDirTimestamp}{self.logDirTimestampedOptSuffix}")
 
-    def __init__(self, testHelperConfig: TestHelperConfig=TestHelperConfig(), clusterConfig: ClusterConfig=ClusterConfig(), ptbConfig=PtbConfig(), testNamePath="performance_test_basic"):
+    @dataclass
+    class WarmCluster:
+        """Cluster, wallet and funded accounts kept running across PerformanceTestBasic runs.  The first run given an empty
+        WarmCluster launches and sets up the cluster as usual and leaves it running in here instead of shutting it down;
+        later runs skip straight to draining the cluster to empty blocks, so each only pays for its load window."""
+        cluster: Cluster = None
+        walletMgr: WalletMgr = None
+        wallet: object = None
+        accountNames: list = field(default_factory=list)
+        accountPrivKeys: list = field(default_factory=list)
+
+        def isRunning(self) -> bool:
+            return self.cluster is not None
+
+        def shutdown(self, logDirPath: Path=None, testSuccessful: bool=True, dumpErrorDetails: bool=False, saveState: bool=True):
+            """Shut the cluster down, moving its nodes' logs (and state directories if saveState) into logDirPath when given."""
+            if self.cluster is None:
+                return
+            self.cluster.shutdown()
+            self.walletMgr.shutdown()
+            if logDirPath is not None:
+                try:
+                    os.makedirs(logDirPath, exist_ok=True)
+                    shutil.move(f"{self.cluster.nodeopLogPath}", f"{logDirPath}")
+                    if not saveState:
+                        for stateDirPath in list(Path(logDirPath).rglob("node_*/**/state")):
+                            shutil.rmtree(stateDirPath)
+                except Exception as e:
+                    print(f"Failed to move '{self.cluster.nodeopLogPath}' to '{logDirPath}': {type(e)}: {e}")
+            TestHelper.shutdown(cluster=self.cluster, walletMgr=self.walletMgr, testSuccessful=testSuccessful, dumpErrorDetails=dumpErrorDetails)
+            self.cluster = None
+            self.walletMgr = None
+            self.wallet = None
+            self.accountNames = []
+            self.accountPrivKeys = []
+
+    def __init__(self, testHelperConfig: TestHelperConfig=TestHelperConfig(), clusterConfig: ClusterConfig=ClusterConfig(), ptbConfig=PtbConfig(), testNamePath="performance_test_basic", abortRules: list=None,
+                 warmCluster: WarmCluster=None):
         self.testHelperConfig = testHelperConfig
         self.clusterConfig = clusterConfig
         self.ptbConfig = ptbConfig
+        # callables evaluated by the PrometheusSampler against live metrics, see prometheus_sampler.py
+        self.abortRules = abortRules if abortRules is not None else []
+        self.sampler = None
+        self.resourceSampler = None
+        self.profilers = []
+        # when given the cluster is left running in warmCluster after the test, and reused if it already holds one
+        self.warmCluster = warmCluster
+        self.reuseCluster = warmCluster is not None and warmCluster.isRunning()
+        self.nodeopLogOffsets = {}
+        self.rampStages = []
 
         #Results
         self.ptbTpsTestResult = PerformanceTestBasic.PtbTpsTestResult()
@@ -226,6 +306,7 @@ class PerformanceTestBasic:
         self.etcLogsDirPath = self.loggingConfig.logDirPath/Path("etc")
         self.etcSysioLogsDirPath = self.etcLogsDirPath/Path("sysio")
         self.blockDataLogDirPath = self.loggingConfig.logDirPath/Path("blockDataLogs")
+        self.profileLogDirPath = self.loggingConfig.logDirPath/Path("profileLogs")
         self.blockDataPath = self.blockDataLogDirPath/Path("blockData.txt")
         self.transactionMetricsDataPath = self.blockDataLogDirPath/Path("transaction_metrics.csv")
         self.blockTrxDataPath = self.blockDataLogDirPath/Path("blockTrxData.txt")
@@ -239,11 +320,18 @@ class PerformanceTestBasic:
         self.nodeopLogPath = self.nodeopLogDir/f"node_{str(self.validationNodeId).zfill(2)}"/"stderr.txt"
 
         # Setup cluster and its wallet manager
-        self.walletMgr=WalletMgr(True)
-        self.cluster=Cluster(loggingLevel=self.clusterConfig.loggingLevel, loggingLevelDict=self.clusterConfig.loggingDict,
-                             nodeopVers=self.clusterConfig.nodeopVers,unshared=self.testHelperConfig.unshared,
-                             keepRunning=self.clusterConfig.dontKill, keepLogs=self.clusterConfig.keepLogs)
-        self.cluster.setWalletMgr(self.walletMgr)
+        if self.reuseCluster:
+            self.walletMgr=self.warmCluster.walletMgr
+            self.cluster=self.warmCluster.cluster
+            # the running cluster's logs are only moved into the test's log directory when it is shut down
+            self.nodeopLogDir = Path(self.cluster.nodeopLogPath)
+            self.nodeopLogPath = nodeopLogPath(self.nodeopLogDir, self.validationNodeId)
+        else:
+            self.walletMgr=WalletMgr(True)
+            self.cluster=Cluster(loggingLevel=self.clusterConfig.loggingLevel, loggingLevelDict=self.clusterConfig.loggingDict,
+                                 nodeopVers=self.clusterConfig.nodeopVers,unshared=self.testHelperConfig.unshared,
+                                 keepRunning=self.clusterConfig.dontKill, keepLogs=self.clusterConfig.keepLogs)
+            self.cluster.setWalletMgr(self.walletMgr)
 
     def testDirsCleanup(self, delReport: bool=False):
         try:
@@ -259,6 +347,9 @@ class PerformanceTestBasic:
                 removeArtifacts(self.etcSysioLogsDirPath)
                 removeArtifacts(self.etcLogsDirPath)
                 removeArtifacts(self.blockDataLogDirPath)
+                # the folded stacks are kept alongside the report, only the raw perf recordings go
+                for perfDataPath in Path(self.profileLogDirPath).glob("*.perf.data"):
+                    perfDataPath.unlink()
 
             if not delReport:
                 removeAllArtifactsExceptFinalReport()
@@ -301,6 +392,8 @@ class PerformanceTestBasic:
             createArtifactsDir(self.etcLogsDirPath)
             createArtifactsDir(self.etcSysioLogsDirPath)
             createArtifactsDir(self.blockDataLogDirPath)
+            if self.ptbConfig.profileNodes:
+                createArtifactsDir(self.profileLogDirPath)
 
         except OSError as error:
             print(error)
@@ -322,24 +415,20 @@ class PerformanceTestBasic:
         return True
 
     def queryBlockTrxData(self, node, blockDataPath, blockTrxDataPath, startBlockNum, endBlockNum):
-        for blockNum in range(startBlockNum, endBlockNum + 1):
-            blockCpuTotal, blockNetTotal, blockTransactionTotal = 0, 0, 0
-            block = node.fetchBlock(blockNum)
-            btdf_append_write = self.fileOpenMode(blockTrxDataPath)
-            with open(blockTrxDataPath, btdf_append_write) as trxDataFile:
+        with open(blockTrxDataPath, self.fileOpenMode(blockTrxDataPath)) as trxDataFile, open(blockDataPath, self.fileOpenMode(blockDataPath)) as blockDataFile:
+            for blockNum, block in node.fetchBlocks(range(startBlockNum, endBlockNum + 1)):
+                blockCpuTotal, blockNetTotal, blockTransactionTotal = 0, 0, 0
                 for transaction in block['payload']['transactions']:
                     if not self.isOnBlockTransaction(transaction):
-                        self.clusterConfig.updateTrxDict(blockNum, transaction, self.data.trxDict)
+                        self.clusterConfig.appendTrx(blockNum, transaction, self.data.trxTable)
                         self.clusterConfig.writeTrx(trxDataFile, blockNum, transaction)
                         blockCpuTotal += transaction["cpu_usage_us"]
                         blockNetTotal += transaction["net_usage_words"]
                         blockTransactionTotal += 1
-            blockData = self.clusterConfig.createBlockData(block=block, blockTransactionTotal=blockTransactionTotal,
-                                                           blockNetTotal=blockNetTotal, blockCpuTotal=blockCpuTotal)
-            self.data.blockList.append(blockData)
-            self.data.blockDict[str(blockNum)] = blockData
-            bdf_append_write = self.fileOpenMode(blockDataPath)
-            with open(blockDataPath, bdf_append_write) as blockDataFile:
+                blockData = self.clusterConfig.createBlockData(block=block, blockTransactionTotal=blockTransactionTotal,
+                                                               blockNetTotal=blockNetTotal, blockCpuTotal=blockCpuTotal)
+                self.data.blockList.append(blockData)
+                self.data.blockDict[str(blockNum)] = blockData
                 blockDataFile.write(f"{blockData.blockNum},{blockData.blockId},{blockData.producer},{blockData.status},{blockData._timestamp}\n")
 
     def waitForEmptyBlocks(self, node, numEmptyToWaitOn):
@@ -355,15 +444,20 @@ class PerformanceTestBasic:
         return node.getHeadBlockNum()
 
     def launchCluster(self):
+        extraNodeopArgs = str(self.clusterConfig.extraNodeopArgs)
+        if self.ptbConfig.prometheusSampleIntervalSec > 0:
+            extraNodeopArgs += " --plugin sysio::prometheus_plugin"
         return self.cluster.launch(
             pnodes=self.clusterConfig._pNodes,
             totalNodes=self.clusterConfig._totalNodes,
             genesisPath=self.clusterConfig.genesisPath,
             maximumP2pPerHost=self.clusterConfig.maximumP2pPerHost,
             maximumClients=self.clusterConfig.maximumClients,
-            extraNodeopArgs=str(self.clusterConfig.extraNodeopArgs),
+            extraNodeopArgs=extraNodeopArgs,
             prodsEnableTraceApi=self.clusterConfig.prodsEnableTraceApi,
-            specificExtraNodeopArgs=self.clusterConfig.specificExtraNodeopArgs
+            specificExtraNodeopArgs=self.clusterConfig.specificExtraNodeopArgs,
+            parallelLaunch=self.clusterConfig.parallelLaunch,
+            useBootstrapCache=True
             )
 
     def setupWalletAndAccounts(self, accountCnt: int=2, accountNames: list=None):
@@ -418,8 +512,8 @@ class PerformanceTestBasic:
                     ownerPrivateKey: {self.clusterConfig.specifiedContract.account.ownerPrivateKey} \
                     ownerPublicKey: {self.clusterConfig.specifiedContract.account.ownerPublicKey}")
 
-    def runTpsTest(self) -> PtbTpsTestResult:
-        completedRun = False
+    def prepareTpsTest(self):
+        """Set up the wallet, contract and accounts (unless reusing a warm cluster) and what the transaction generators need."""
         self.producerNode = self.cluster.getNode(self.producerNodeId)
         self.connectionPairList = []
 
@@ -433,30 +527,36 @@ class PerformanceTestBasic:
 
         configureConnections()
         self.validationNode = self.cluster.getNode(self.validationNodeId)
-        self.wallet = self.walletMgr.create('default')
-        self.setupContract()
+        if self.reuseCluster:
+            self.wallet = self.warmCluster.wallet
+        else:
+            self.wallet = self.walletMgr.create('default')
+            self.setupContract()
         info = self.producerNode.getInfo()
-        chainId = info['chain_id']
-        lib_id = info['last_irreversible_block_id']
+        self.chainId = info['chain_id']
+        self.libId = info['last_irreversible_block_id']
         self.data = chainData()
         self.data.numNodes = self.clusterConfig._totalNodes
 
-        abiFile=None
-        actionsDataJson=None
-        actionsAuthsJson=None
+        self.abiFile=None
+        self.actionsDataJson=None
+        self.actionsAuthsJson=None
         self.accountNames=[]
         self.accountPrivKeys=[]
+        if self.reuseCluster:
+            self.accountNames = list(self.warmCluster.accountNames)
+            self.accountPrivKeys = list(self.warmCluster.accountPrivKeys)
         if (self.ptbConfig.userTrxDataFile is not None):
             self.readUserTrxDataFromFile(self.ptbConfig.userTrxDataFile)
-            if self.userTrxDataDict['initAccounts']:
+            if self.userTrxDataDict['initAccounts'] and not self.reuseCluster:
                 print(f"Creating accounts specified in userTrxData: {self.userTrxDataDict['initAccounts']}")
                 self.setupWalletAndAccounts(accountCnt=len(self.userTrxDataDict['initAccounts']), accountNames=self.userTrxDataDict['initAccounts'])
-            abiFile = self.userTrxDataDict['abiFile']
+            self.abiFile = self.userTrxDataDict['abiFile']
             if 'apiEndpoint' in self.userTrxDataDict:
                 self.ptbConfig.apiEndpoint = self.userTrxDataDict['apiEndpoint']
                 print(f'API Endpoint specified: {self.ptbConfig.apiEndpoint}')
 
-            actionsDataJson = json.dumps(self.userTrxDataDict['actions'])
+            self.actionsDataJson = json.dumps(self.userTrxDataDict['actions'])
 
             authorizations={}
             for act in self.userTrxDataDict['actions']:
@@ -472,22 +572,122 @@ class PerformanceTestBasic:
 
                 if actionAuthPrivKey is not None:
                     authorizations[actionAuthAcct]=actionAuthPrivKey
-            actionsAuthsJson = json.dumps(authorizations)
-        else:
+            self.actionsAuthsJson = json.dumps(authorizations)
+        elif not self.reuseCluster:
             self.setupWalletAndAccounts()
 
-        self.cluster.biosNode.kill(signal.SIGTERM)
+        if self.ptbConfig.trxGenCpus is not None:
+            self.pinNodes()
+
+        if self.reuseCluster:
+            # only this run's part of the node logs is analyzed
+            self.nodeopLogOffsets = {nodeopLogPath(self.nodeopLogDir, nodeId): os.path.getsize(nodeopLogPath(self.nodeopLogDir, nodeId))
+                                     for nodeId in range(0, self.clusterConfig._totalNodes)}
+        else:
+            self.cluster.biosNode.kill(signal.SIGTERM)
+            if self.warmCluster is not None:
+                self.warmCluster.cluster = self.cluster
+                self.warmCluster.walletMgr = self.walletMgr
+                self.warmCluster.wallet = self.wallet
+                self.warmCluster.accountNames = list(self.accountNames)
+                self.warmCluster.accountPrivKeys = list(self.accountPrivKeys)
+
+    def pinNodes(self):
+        """Pin every node process to the cpus left over once the transaction generators' cpus are set aside, so the
+        generators do not compete with the nodes under test for cpu."""
+        nodeCpus = os.sched_getaffinity(0) - set(Utils.parseCpuList(self.ptbConfig.trxGenCpus))
+        if not nodeCpus:
+            print(f"WARNING: not pinning nodes, no cpus are left over from transaction generator cpus {self.ptbConfig.trxGenCpus}")
+            return
+        for nodeId in range(0, self.clusterConfig._totalNodes):
+            Utils.setProcessAffinity(self.cluster.getNode(nodeId).pid, nodeCpus)
+
+    def createTrxGenLauncher(self, tpsTrxGensConfig: TpsTrxGensConfig, trxGenDurationSec: int, logDir: Path, rampUpSec: float=0) -> TransactionGeneratorsLauncher:
+        return TransactionGeneratorsLauncher(trxGenerator=self.ptbConfig.trxGenerator, chainId=self.chainId, lastIrreversibleBlockId=self.libId, contractOwnerAccount=self.clusterConfig.specifiedContract.account.name,
+                                             accts=','.join(map(str, self.accountNames)), privateKeys=','.join(map(str, self.accountPrivKeys)),
+                                             trxGenDurationSec=trxGenDurationSec, logDir=logDir,
+                                             abiFile=self.abiFile, actionsData=self.actionsDataJson, actionsAuths=self.actionsAuthsJson,
+                                             tpsTrxGensConfig=tpsTrxGensConfig, endpointMode=self.ptbConfig.endpointMode, apiEndpoint=self.ptbConfig.apiEndpoint,
+                                             cpus=Utils.parseCpuList(self.ptbConfig.trxGenCpus) if self.ptbConfig.trxGenCpus is not None else None,
+                                             rampUpSec=rampUpSec, progressIntervalSec=self.ptbConfig.trxGenProgressIntervalSec)
+
+    def startSampler(self, intervalSec: float, abortRules: list=None) -> PrometheusSampler:
+        endpoints = {nodeId: self.cluster.getNode(nodeId).endpointHttp for nodeId in range(0, self.clusterConfig._totalNodes)}
+        self.sampler = PrometheusSampler(endpoints=endpoints, tpsNodeId=self.validationNodeId, intervalSec=intervalSec,
+                                         abortRules=abortRules, targetTps=self.ptbConfig.targetTps, quiet=self.ptbConfig.quiet)
+        self.sampler.start()
+        return self.sampler
+
+    def startResourceSampler(self, intervalSec: float) -> ResourceSampler:
+        self.resourceSampler = ResourceSampler(intervalSec=intervalSec)
+        for nodeId in range(0, self.clusterConfig._totalNodes):
+            self.resourceSampler.addProcess(f"nodeop_{str(nodeId).zfill(2)}", self.cluster.getNode(nodeId).pid)
+        self.resourceSampler.addProcess("kiod", self.walletMgr.walletPid)
+        self.resourceSampler.start()
+        return self.resourceSampler
+
+    def launchTrxGens(self, abortEvent: threading.Event=None, labelPrefix: str="trx_generator"):
+        """Launch the configured transaction generators, registering each with the resource sampler, and wait for them to
+        complete.  Returns None when abortEvent fired first."""
+        self.cluster.trxGenLauncher.launch(waitToComplete=False)
+        if self.resourceSampler is not None:
+            for genId, popen in enumerate(self.cluster.trxGenLauncher.subprocess_ret_codes):
+                self.resourceSampler.addProcess(f"{labelPrefix}_{str(genId).zfill(2)}", popen.pid)
+        return self.cluster.trxGenLauncher.waitForCompletion(abortEvent=abortEvent)
+
+    def numBlocksToPrune(self) -> int:
+        """Blocks calcChainGuide drops at each end of the blocks holding transactions: numAddlBlocksToPrune plus, with a
+        ramp up, the blocks produced while the generators are still starting (and, as each runs for the test duration, stopping)."""
+        return self.ptbConfig.numAddlBlocksToPrune + math.ceil(self.ptbConfig.trxGenRampUpSec / BLOCK_INTERVAL_SEC)
+
+    def steadyStateWindowSec(self) -> tuple:
+        """Offset from the transaction generators' launch and length in seconds of the window calcChainGuide will treat as the
+        steady state of the run.  It drops numBlocksToPrune blocks at each end of the blocks holding transactions, plus a
+        block at each end for the generators' start up and the first and last partially filled blocks."""
+        edgeSec = (self.numBlocksToPrune() + 1) * BLOCK_INTERVAL_SEC
+        return edgeSec, max(self.ptbConfig.testTrxGenDurationSec + self.ptbConfig.trxGenRampUpSec - 2 * edgeSec, BLOCK_INTERVAL_SEC)
+
+    def startProfilers(self):
+        delaySec, durationSec = self.steadyStateWindowSec()
+        for nodeId in self.ptbConfig.profileNodes:
+            if nodeId < 0 or nodeId >= self.clusterConfig._totalNodes:
+                print(f"WARNING: not profiling node {nodeId}, the cluster has nodes 0 to {self.clusterConfig._totalNodes - 1}")
+                continue
+            profiler = CpuProfiler(label=f"nodeop_{str(nodeId).zfill(2)}", pid=self.cluster.getNode(nodeId).pid, outputDir=self.profileLogDirPath,
+                                   delaySec=delaySec, durationSec=durationSec, frequencyHz=self.ptbConfig.profileFrequencyHz, method=self.ptbConfig.profileMethod)
+            profiler.start()
+            self.profilers.append(profiler)
+
+    def stopSamplers(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.resourceSampler is not None:
+            self.resourceSampler.stop()
+        for profiler in self.profilers:
+            profiler.stop()
+
+    def runTpsTest(self) -> PtbTpsTestResult:
+        completedRun = False
+        self.prepareTpsTest()
 
         self.data.startBlock = self.waitForEmptyBlocks(self.validationNode, self.emptyBlockGoal)
         tpsTrxGensConfig = TpsTrxGensConfig(targetTps=self.ptbConfig.targetTps, tpsLimitPerGenerator=self.ptbConfig.tpsLimitPerGenerator, connectionPairList=self.connectionPairList)
 
-        self.cluster.trxGenLauncher = TransactionGeneratorsLauncher(trxGenerator=self.ptbConfig.trxGenerator, chainId=chainId, lastIrreversibleBlockId=lib_id, contractOwnerAccount=self.clusterConfig.specifiedContract.account.name,
-                                                       accts=','.join(map(str, self.accountNames)), privateKeys=','.join(map(str, self.accountPrivKeys)),
-                                                       trxGenDurationSec=self.ptbConfig.testTrxGenDurationSec, logDir=self.trxGenLogDirPath,
-                                                       abiFile=abiFile, actionsData=actionsDataJson, actionsAuths=actionsAuthsJson,
-                                                       tpsTrxGensConfig=tpsTrxGensConfig, endpointMode=self.ptbConfig.endpointMode, apiEndpoint=self.ptbConfig.apiEndpoint)
-
-        trxGenExitCodes = self.cluster.trxGenLauncher.launch()
+        self.cluster.trxGenLauncher = self.createTrxGenLauncher(tpsTrxGensConfig, self.ptbConfig.testTrxGenDurationSec, self.trxGenLogDirPath, rampUpSec=self.ptbConfig.trxGenRampUpSec)
+
+        if self.ptbConfig.resourceSampleIntervalSec > 0:
+            self.startResourceSampler(self.ptbConfig.resourceSampleIntervalSec)
+        if self.ptbConfig.prometheusSampleIntervalSec > 0:
+            self.startSampler(self.ptbConfig.prometheusSampleIntervalSec, self.abortRules)
+        self.startProfilers()
+        trxGenExitCodes = self.launchTrxGens(abortEvent=self.sampler.aborted if self.sampler is not None else None)
+        if trxGenExitCodes is None:
+            # doomed run, skip draining the generated transactions and go straight to reporting
+            self.stopSamplers()
+            self.data.ceaseBlock = self.validationNode.getHeadBlockNum()
+            print(f"Transaction Generators killed, test run aborted: {self.sampler.abortReason}")
+            return PerformanceTestBasic.PtbTpsTestResult(completedRun=False, numGeneratorsUsed=tpsTrxGensConfig.numGenerators,
+                                                         targetTpsPerGenList=tpsTrxGensConfig.targetTpsPerGenList, abortReason=self.sampler.abortReason)
         print(f"Transaction Generator exit codes: {trxGenExitCodes}")
         for exitCode in trxGenExitCodes:
             if exitCode != 0:
@@ -504,10 +704,119 @@ class PerformanceTestBasic:
             print(f"ERROR: Transactions generated: {len(trxSent)} does not match the expected number of transactions: {self.ptbConfig.expectedTransactionsSent}")
         trxNotFound = self.validationNode.waitForTransactionsInBlockRange(trxSent, self.data.startBlock, endBlock)
         self.data.ceaseBlock = self.validationNode.getHeadBlockNum()
+        self.stopSamplers()
 
         return PerformanceTestBasic.PtbTpsTestResult(completedRun=completedRun, numGeneratorsUsed=tpsTrxGensConfig.numGenerators,
                                                      targetTpsPerGenList=tpsTrxGensConfig.targetTpsPerGenList, trxGenExitCodes=trxGenExitCodes)
 
+    def runRampStage(self, targetTps: int, durationSec: int) -> RampStageResult:
+        tpsTrxGensConfig = TpsTrxGensConfig(targetTps=targetTps, tpsLimitPerGenerator=self.ptbConfig.tpsLimitPerGenerator, connectionPairList=self.connectionPairList)
+        stageLogDirPath = self.trxGenLogDirPath/Path(f"stage_{targetTps}")
+        os.makedirs(stageLogDirPath, exist_ok=True)
+        self.cluster.trxGenLauncher = self.createTrxGenLauncher(tpsTrxGensConfig, durationSec, stageLogDirPath)
+
+        self.sampler.targetTps = targetTps
+        stageStartSec = self.sampler.elapsedSec()
+        trxGenExitCodes = self.launchTrxGens(labelPrefix=f"trx_generator_stage_{targetTps}")
+        stageEndSec = self.sampler.elapsedSec()
+        # wait for the sample closing the stage, then measure over its second half so the generators' start up and the
+        # transactions still in flight from the previous stage do not count
+        time.sleep(self.sampler.intervalSec)
+        measureStartSec = stageStartSec + (stageEndSec - stageStartSec) / 2
+        stage = PerformanceTestBasic.RampStageResult(targetTps=targetTps, stageStartSec=stageStartSec, stageEndSec=stageEndSec,
+                                                     completedRun=all(exitCode == 0 for exitCode in trxGenExitCodes), trxGenExitCodes=trxGenExitCodes)
+        trxs = self.sampler.delta(self.validationNodeId, TRXS_INCOMING_METRIC, measureStartSec, stageEndSec + self.sampler.intervalSec)
+        if trxs is not None:
+            stage.achievedTps = trxs[0] / trxs[1]
+        blocks = self.sampler.delta(self.validationNodeId, BLOCKS_INCOMING_METRIC, measureStartSec, stageEndSec + self.sampler.intervalSec)
+        latency = self.sampler.delta(self.validationNodeId, BLOCK_LATENCY_METRIC, measureStartSec, stageEndSec + self.sampler.intervalSec)
+        if blocks is not None and latency is not None and blocks[0] > 0:
+            stage.avgBlockLatencyMs = latency[0] / blocks[0] / 1000
+        return stage
+
+    def runRampTest(self, rampTargets: list, stageDurationSec: int, continueRamp=None) -> list:
+        """Step the target TPS through rampTargets within a single cluster run, running the transaction generators for
+        stageDurationSec at each, and return a RampStageResult per stage measured from live prometheus samples.  After each
+        stage continueRamp(stages) decides whether to go on; ramping always stops at a stage whose generators failed."""
+        self.rampStages = []
+        try:
+            TestHelper.printSystemInfo("BEGIN")
+            self.preTestSpinup()
+            self.prepareTpsTest()
+
+            self.data.startBlock = self.waitForEmptyBlocks(self.validationNode, self.emptyBlockGoal)
+            if self.ptbConfig.resourceSampleIntervalSec > 0:
+                self.startResourceSampler(self.ptbConfig.resourceSampleIntervalSec)
+            self.startSampler(self.ptbConfig.prometheusSampleIntervalSec if self.ptbConfig.prometheusSampleIntervalSec > 0 else 1)
+            for targetTps in rampTargets:
+                print(f"Running ramp stage: target {targetTps} for {stageDurationSec}s")
+                stage = self.runRampStage(targetTps, stageDurationSec)
+                self.rampStages.append(stage)
+                latency = f"{stage.avgBlockLatencyMs:.1f}" if stage.avgBlockLatencyMs is not None else "NA"
+                print(f"Ramp stage result: target {stage.targetTps} achieved {stage.achievedTps:.1f} avgBlockLatencyMs {latency} exit codes {stage.trxGenExitCodes}")
+                if not stage.completedRun or (continueRamp is not None and not continueRamp(self.rampStages)):
+                    break
+            self.stopSamplers()
+            self.data.ceaseBlock = self.validationNode.getHeadBlockNum()
+
+            if self.warmCluster is None:
+                self.cluster.shutdown()
+                self.walletMgr.shutdown()
+            self.captureLowLevelArtifacts()
+
+            self.testEnd = datetime.now(UTC)
+            self.report = self.createRampReport(argsDict=self.prepArgs())
+            if not self.ptbConfig.delReport:
+                JsonReportHandler.exportReportAsJSON(JsonReportHandler.reportAsJSON(self.report), self.reportPath)
+
+        except:
+            traceback.print_exc()
+            self.shutdownWarmClusterOnError()
+
+        finally:
+            self.stopSamplers()
+
+            if self.warmCluster is None:
+                TestHelper.shutdown(
+                    cluster=self.cluster,
+                    walletMgr=self.walletMgr,
+                    testSuccessful=len(self.rampStages) > 0,
+                    dumpErrorDetails=self.testHelperConfig.dumpErrorDetails
+                    )
+
+            if self.ptbConfig.delPerfLogs:
+                print(f"Cleaning up logs directory: {self.loggingConfig.logDirPath}")
+                self.testDirsCleanup(self.ptbConfig.delReport)
+
+            if not self.ptbConfig.saveState:
+                print(f"Cleaning up state directories: {self.varLogsDirPath}")
+                self.testDirsCleanupState()
+
+            return self.rampStages
+
+    def createRampReport(self, argsDict: dict) -> dict:
+        report = {}
+        report['targetApiEndpointType'] = self.ptbConfig.endpointMode
+        report['targetApiEndpoint'] = self.ptbConfig.apiEndpoint if self.ptbConfig.apiEndpoint is not None else "NA for P2P"
+        report['testStart'] = self.testStart
+        report['testFinish'] = self.testEnd
+        report['RampStages'] = [asdict(stage) for stage in self.rampStages]
+        report['PrometheusSamples'] = self.sampler.report()
+        if self.resourceSampler is not None:
+            report['ProcessResources'] = self.resourceSampler.report()
+        report['args'] =  argsDict
+        report['args']['userTrxData'] = self.userTrxDataDict if self.ptbConfig.userTrxDataFile is not None else "NOT CONFIGURED"
+        report['env'] = {'system': system(), 'os': os.name, 'release': release(), 'logical_cpu_count': os.cpu_count()}
+        report['nodeopVersion'] = self.clusterConfig.nodeopVers
+        return report
+
+    def shutdownWarmClusterOnError(self):
+        if self.warmCluster is not None:
+            # the cluster may be in any state, shut it down (even if it was never handed over) so the next run launches a new one
+            self.warmCluster.cluster = self.cluster
+            self.warmCluster.walletMgr = self.walletMgr
+            self.warmCluster.shutdown(logDirPath=self.varLogsDirPath, testSuccessful=False, dumpErrorDetails=self.testHelperConfig.dumpErrorDetails)
+
     def prepArgs(self) -> dict:
         args = {}
         args.update({"rawCmdLine ": ' '.join(sys.argv[0:])})
@@ -518,6 +827,9 @@ class PerformanceTestBasic:
         return args
 
     def captureLowLevelArtifacts(self):
+        if self.warmCluster is not None:
+            print(f"Cluster left running, its logs in '{self.cluster.nodeopLogPath}' are captured when it is shut down")
+            return
         try:
             shutil.move(f"{self.cluster.nodeopLogPath}", f"{self.varLogsDirPath}")
         except Exception as e:
@@ -528,36 +840,46 @@ class PerformanceTestBasic:
         report['targetApiEndpointType'] = self.ptbConfig.endpointMode
         report['targetApiEndpoint'] = self.ptbConfig.apiEndpoint if self.ptbConfig.apiEndpoint is not None else "NA for P2P"
         report['Result'] = asdict(testResult)
-        report['Analysis'] = {}
-        report['Analysis']['BlockSize'] = asdict(logAnalysis.blockSizeStats)
-        report['Analysis']['BlocksGuide'] = asdict(logAnalysis.guide)
-        report['Analysis']['TPS'] = asdict(logAnalysis.tpsStats)
-        report['Analysis']['TPS']['configTps'] = tpsTestConfig.targetTps
-        report['Analysis']['TPS']['configTestDuration'] = tpsTestConfig.testDurationSec
-        report['Analysis']['TPS']['tpsPerGenerator'] = tpsTestConfig.targetTpsPerGenList
-        report['Analysis']['TPS']['generatorCount'] = tpsTestConfig.numTrxGensUsed
-        report['Analysis']['TrxCPU'] = asdict(logAnalysis.trxCpuStats)
-        report['Analysis']['TrxLatency'] = asdict(logAnalysis.trxLatencyStats)
-        report['Analysis']['TrxLatency']['units'] = "seconds"
-        report['Analysis']['TrxNet'] = asdict(logAnalysis.trxNetStats)
-        report['Analysis']['TrxAckResponseTime'] = asdict(logAnalysis.trxAckStats)
-        report['Analysis']['TrxAckResponseTime']['measurementApplicable'] = logAnalysis.trxAckStatsApplicable
-        report['Analysis']['TrxAckResponseTime']['units'] = "microseconds"
-        report['Analysis']['ExpectedTransactions'] = testResult.expectedTxns
-        report['Analysis']['DroppedTransactions'] = len(logAnalysis.notFound)
-        report['Analysis']['ProductionWindowsTotal'] = logAnalysis.prodWindows.totalWindows
-        report['Analysis']['ProductionWindowsAverageSize'] = logAnalysis.prodWindows.averageWindowSize
-        report['Analysis']['ProductionWindowsMissed'] = logAnalysis.prodWindows.missedWindows
-        report['Analysis']['ForkedBlocks'] = {}
-        report['Analysis']['ForksCount'] = {}
-        report['Analysis']['DroppedBlocks'] = {}
-        report['Analysis']['DroppedBlocksCount'] = {}
-        for nodeNum in range(0, self.data.numNodes):
-            formattedNodeNum = str(nodeNum).zfill(2)
-            report['Analysis']['ForkedBlocks'][formattedNodeNum] = self.data.forkedBlocks[formattedNodeNum]
-            report['Analysis']['ForksCount'][formattedNodeNum] = len(self.data.forkedBlocks[formattedNodeNum])
-            report['Analysis']['DroppedBlocks'][formattedNodeNum] = self.data.droppedBlocks[formattedNodeNum]
-            report['Analysis']['DroppedBlocksCount'][formattedNodeNum] = len(self.data.droppedBlocks[formattedNodeNum])
+        if logAnalysis is not None:
+            report['Analysis'] = {}
+            report['Analysis']['BlockSize'] = asdict(logAnalysis.blockSizeStats)
+            report['Analysis']['BlockCPU'] = asdict(logAnalysis.blockCpuStats)
+            report['Analysis']['BlockCPU']['units'] = "microseconds"
+            report['Analysis']['BlocksGuide'] = asdict(logAnalysis.guide)
+            report['Analysis']['TPS'] = asdict(logAnalysis.tpsStats)
+            report['Analysis']['TPS']['configTps'] = tpsTestConfig.targetTps
+            report['Analysis']['TPS']['configTestDuration'] = tpsTestConfig.testDurationSec
+            report['Analysis']['TPS']['tpsPerGenerator'] = tpsTestConfig.targetTpsPerGenList
+            report['Analysis']['TPS']['generatorCount'] = tpsTestConfig.numTrxGensUsed
+            report['Analysis']['TrxCPU'] = asdict(logAnalysis.trxCpuStats)
+            report['Analysis']['TrxLatency'] = asdict(logAnalysis.trxLatencyStats)
+            report['Analysis']['TrxLatency']['units'] = "seconds"
+            report['Analysis']['TrxLatencyBreakdown'] = {stage: {**asdict(stats), 'units': TRX_LATENCY_STAGES[stage][1]} for stage, stats in logAnalysis.trxLatencyBreakdown.items()}
+            report['Analysis']['TrxNet'] = asdict(logAnalysis.trxNetStats)
+            report['Analysis']['TrxAckResponseTime'] = asdict(logAnalysis.trxAckStats)
+            report['Analysis']['TrxAckResponseTime']['measurementApplicable'] = logAnalysis.trxAckStatsApplicable
+            report['Analysis']['TrxAckResponseTime']['units'] = "microseconds"
+            report['Analysis']['ExpectedTransactions'] = testResult.expectedTxns
+            report['Analysis']['DroppedTransactions'] = len(logAnalysis.notFound)
+            report['Analysis']['ProductionWindowsTotal'] = logAnalysis.prodWindows.totalWindows
+            report['Analysis']['ProductionWindowsAverageSize'] = logAnalysis.prodWindows.averageWindowSize
+            report['Analysis']['ProductionWindowsMissed'] = logAnalysis.prodWindows.missedWindows
+            report['Analysis']['ForkedBlocks'] = {}
+            report['Analysis']['ForksCount'] = {}
+            report['Analysis']['DroppedBlocks'] = {}
+            report['Analysis']['DroppedBlocksCount'] = {}
+            for nodeNum in range(0, self.data.numNodes):
+                formattedNodeNum = str(nodeNum).zfill(2)
+                report['Analysis']['ForkedBlocks'][formattedNodeNum] = self.data.forkedBlocks[formattedNodeNum]
+                report['Analysis']['ForksCount'][formattedNodeNum] = len(self.data.forkedBlocks[formattedNodeNum])
+                report['Analysis']['DroppedBlocks'][formattedNodeNum] = self.data.droppedBlocks[formattedNodeNum]
+                report['Analysis']['DroppedBlocksCount'][formattedNodeNum] = len(self.data.droppedBlocks[formattedNodeNum])
+        if self.sampler is not None:
+            report['PrometheusSamples'] = self.sampler.report()
+        if self.resourceSampler is not None:
+            report['ProcessResources'] = self.resourceSampler.report()
+        if self.profilers:
+            report['Profiles'] = {profiler.label: profiler.report() for profiler in self.profilers}
         report['args'] =  argsDict
         report['args']['userTrxData'] = self.userTrxDataDict if self.ptbConfig.userTrxDataFile is not None else "NOT CONFIGURED"
         report['env'] = {'system': system(), 'os': os.name, 'release': release(), 'logical_cpu_count': os.cpu_count()}
@@ -567,20 +889,34 @@ class PerformanceTestBasic:
     def analyzeResultsAndReport(self, testResult: PtbTpsTestResult):
         args = self.prepArgs()
         artifactsLocate = ArtifactPaths(nodeopLogDir=self.nodeopLogDir, nodeopLogPath=self.nodeopLogPath, trxGenLogDirPath=self.trxGenLogDirPath, blockTrxDataPath=self.blockTrxDataPath,
-                                                   blockDataPath=self.blockDataPath, transactionMetricsDataPath=self.transactionMetricsDataPath)
+                                                   blockDataPath=self.blockDataPath, transactionMetricsDataPath=self.transactionMetricsDataPath,
+                                                   nodeopLogOffsets=self.nodeopLogOffsets)
         tpsTestConfig = TpsTestConfig(targetTps=self.ptbConfig.targetTps, testDurationSec=self.ptbConfig.testTrxGenDurationSec, tpsLimitPerGenerator=self.ptbConfig.tpsLimitPerGenerator,
-                                                 numBlocksToPrune=self.ptbConfig.numAddlBlocksToPrune, numTrxGensUsed=testResult.numGeneratorsUsed, targetTpsPerGenList=testResult.targetTpsPerGenList,
-                                                 quiet=self.ptbConfig.quiet, printMissingTransactions=self.ptbConfig.printMissingTransactions)
-        self.logAnalysis = analyzeLogResults(data=self.data, tpsTestConfig=tpsTestConfig, artifacts=artifactsLocate)
-        self.testEnd = datetime.now(UTC)
+                                                 numBlocksToPrune=self.numBlocksToPrune(), numTrxGensUsed=testResult.numGeneratorsUsed, targetTpsPerGenList=testResult.targetTpsPerGenList,
+                                                 quiet=self.ptbConfig.quiet, printMissingTransactions=self.ptbConfig.printMissingTransactions,
+                                                 percentiles=self.ptbConfig.reportPercentiles, histogramSubBuckets=self.ptbConfig.histogramSubBuckets)
+        if testResult.abortReason is not None:
+            # the generators were killed before writing their trx logs, so there is nothing to analyze
+            self.logAnalysis = None
+            self.testEnd = datetime.now(UTC)
+            liveTps = self.sampler.rate(self.validationNodeId, TRXS_INCOMING_METRIC, windowSec=self.ptbConfig.testTrxGenDurationSec)
+            self.testResult = PerformanceTestBasic.PerfTestBasicResult(targetTPS=self.ptbConfig.targetTps, resultAvgTps=liveTps, expectedTxns=self.ptbConfig.expectedTransactionsSent,
+                                                                       testRunCompleted=False, abortReason=testResult.abortReason, logsDir=self.loggingConfig.logDirPath,
+                                                                       testStart=self.testStart, testEnd=self.testEnd)
+        else:
+            self.logAnalysis = analyzeLogResults(data=self.data, tpsTestConfig=tpsTestConfig, artifacts=artifactsLocate)
+            self.testEnd = datetime.now(UTC)
 
-        self.testResult = PerformanceTestBasic.PerfTestBasicResult(targetTPS=self.ptbConfig.targetTps, resultAvgTps=self.logAnalysis.tpsStats.avg, expectedTxns=self.ptbConfig.expectedTransactionsSent,
-                                                                   resultTxns=self.logAnalysis.trxLatencyStats.samples, testRunCompleted=self.ptbTpsTestResult.completedRun,
-                                                                   testAnalysisBlockCnt=self.logAnalysis.guide.testAnalysisBlockCnt, logsDir=self.loggingConfig.logDirPath,
-                                                                   testStart=self.testStart, testEnd=self.testEnd)
+            self.testResult = PerformanceTestBasic.PerfTestBasicResult(targetTPS=self.ptbConfig.targetTps, resultAvgTps=self.logAnalysis.tpsStats.avg, expectedTxns=self.ptbConfig.expectedTransactionsSent,
+                                                                       resultTxns=self.logAnalysis.trxLatencyStats.samples, testRunCompleted=self.ptbTpsTestResult.completedRun,
+                                                                       testAnalysisBlockCnt=self.logAnalysis.guide.testAnalysisBlockCnt, logsDir=self.loggingConfig.logDirPath,
+                                                                       testStart=self.testStart, testEnd=self.testEnd)
 
         print(f"targetTPS: {self.testResult.targetTPS} expectedTxns: {self.testResult.expectedTxns} resultAvgTps: {self.testResult.resultAvgTps} resultTxns: {self.testResult.resultTxns}")
 
+        if self.testResult.abortReason is not None:
+            print(f"Error: Test run aborted: {self.testResult.abortReason}")
+
         if not self.ptbTpsTestResult.completedRun:
             for exitCode in self.ptbTpsTestResult.trxGenExitCodes:
                 if exitCode != 0:
@@ -605,9 +941,14 @@ class PerformanceTestBasic:
         if not self.ptbConfig.delReport:
             JsonReportHandler.exportReportAsJSON(jsonReport, self.reportPath)
 
+        if self.ptbConfig.resultsDb is not None:
+            recordReport(self.ptbConfig.resultsDb, self.report, kind="ptb", testName=self.testNamePath, reportPath=None if self.ptbConfig.delReport else self.reportPath)
+
     def preTestSpinup(self):
         self.testDirsCleanup()
         self.testDirsSetup()
+        if self.reuseCluster:
+            return
 
         self.walletMgr.launch()
         if self.launchCluster() == False:
@@ -615,8 +956,9 @@ class PerformanceTestBasic:
 
     def postTpsTestSteps(self):
         self.queryBlockTrxData(self.validationNode, self.blockDataPath, self.blockTrxDataPath, self.data.startBlock, self.data.ceaseBlock)
-        self.cluster.shutdown()
-        self.walletMgr.shutdown()
+        if self.warmCluster is None:
+            self.cluster.shutdown()
+            self.walletMgr.shutdown()
 
     def runTest(self) -> bool:
 
@@ -634,16 +976,20 @@ class PerformanceTestBasic:
 
         except:
             traceback.print_exc()
+            self.shutdownWarmClusterOnError()
 
         finally:
+            self.stopSamplers()
+
             # Despite keepLogs being hardcoded to False, logs will still appear on test failure in TestLogs
             # due to testSuccessful being False
-            TestHelper.shutdown(
-                cluster=self.cluster,
-                walletMgr=self.walletMgr,
-                testSuccessful=self.testResult.testRunSuccessful,
-                dumpErrorDetails=self.testHelperConfig.dumpErrorDetails
-                )
+            if self.warmCluster is None:
+                TestHelper.shutdown(
+                    cluster=self.cluster,
+                    walletMgr=self.walletMgr,
+                    testSuccessful=self.testResult.testRunSuccessful,
+                    dumpErrorDetails=self.testHelperConfig.dumpErrorDetails
+                    )
 
             if self.ptbConfig.delPerfLogs:
                 print(f"Cleaning up logs directory: {self.loggingConfig.logDirPath}")
@@ -685,7 +1031,7 @@ class PerformanceTestBasic:
         specifiedContract=SC(contractDir=args.contract_dir, wasmFile=args.wasm_file, abiFile=args.abi_file, account=Account(args.account_name))
         return PerformanceTestBasic.ClusterConfig(dontKill=args.leave_running, keepLogs=not args.del_perf_logs,
                                                             producerNodeCount=args.producer_nodes, validationNodeCount=args.validation_nodes, apiNodeCount=args.api_nodes,
-                                                            genesisPath=args.genesis, prodsEnableTraceApi=args.prods_enable_trace_api, extraNodeopArgs=extraNodeopArgs,
+                                                            genesisPath=args.genesis, prodsEnableTraceApi=args.prods_enable_trace_api, parallelLaunch=args.parallel_launch, extraNodeopArgs=extraNodeopArgs,
                                                             specifiedContract=specifiedContract, loggingLevel=args.cluster_log_lvl,
                                                             nodeopVers=nodeopVers, nonProdsSysVmOcEnable=args.non_prods_sys_vm_oc_enable,
                                                             apiNodesReadOnlyThreadCount=args.api_nodes_read_only_threads)
@@ -739,6 +1085,15 @@ class PtbArgumentsHandler(object):
         ptbBaseParserGroup.add_argument("--save-state", help=argparse.SUPPRESS if suppressHelp else "Whether to save node state. (Warning: large disk usage)", action='store_true')
         ptbBaseParserGroup.add_argument("--quiet", help=argparse.SUPPRESS if suppressHelp else "Whether to quiet printing intermediate results and reports to stdout", action='store_true')
         ptbBaseParserGroup.add_argument("--prods-enable-trace-api", help=argparse.SUPPRESS if suppressHelp else "Determines whether producer nodes should have sysio::trace_api_plugin enabled", action='store_true')
+        ptbBaseParserGroup.add_argument("--parallel-launch", help=argparse.SUPPRESS if suppressHelp else "Only stagger producer node launches, start non-producing nodes together and probe node ports for readiness", action='store_true')
+        ptbBaseParserGroup.add_argument("--report-percentiles", type=float, nargs="+", help=argparse.SUPPRESS if suppressHelp else "Percentiles of transaction latency, cpu, net, ack response time, TPS and block size to report", default=DEFAULT_REPORT_PERCENTILES)
+        ptbBaseParserGroup.add_argument("--histogram-sub-buckets", type=int, help=argparse.SUPPRESS if suppressHelp else "Number of histogram buckets (a power of two) each power of two range of a reported measurement is split into", default=DEFAULT_HISTOGRAM_SUB_BUCKETS)
+        ptbBaseParserGroup.add_argument("--prometheus-sample-interval-sec", type=float, help=argparse.SUPPRESS if suppressHelp else "Interval in seconds at which each node's prometheus metrics are sampled during the test run, recording a time series in the report and printing live TPS. 0 disables sampling.", default=0)
+        ptbBaseParserGroup.add_argument("--resource-sample-interval-sec", type=float, help=argparse.SUPPRESS if suppressHelp else "Interval in seconds at which the cpu, memory, page faults, context switches, disk io and per thread cpu of each nodeop, kiod and trx_generator process are sampled from /proc during the test run, recording a time series in the report. 0 disables sampling.", default=0)
+        ptbBaseParserGroup.add_argument("--results-db", type=str, help=argparse.SUPPRESS if suppressHelp else "Path of the SQLite results store every test report is recorded in, for comparing runs across builds with PerformanceHarnessResults.py. An empty string disables recording.", default=str(DEFAULT_RESULTS_DB))
+        ptbBaseParserGroup.add_argument("--trx-gen-cpus", type=str, help=argparse.SUPPRESS if suppressHelp else "Cpu list (e.g. \"8-11,14\") the transaction generators are pinned to, split into a disjoint set of cpus per generator. The nodes are pinned to the remaining cpus.", default=None)
+        ptbBaseParserGroup.add_argument("--trx-gen-ramp-up-sec", type=float, help=argparse.SUPPRESS if suppressHelp else "Seconds over which the transaction generators' starts are spread evenly, rather than starting them all at once. The blocks produced during the ramp up and ramp down are pruned from the analysis.", default=0)
+        ptbBaseParserGroup.add_argument("--trx-gen-progress-interval-sec", type=float, help=argparse.SUPPRESS if suppressHelp else "Interval in seconds at which the aggregated progress of the transaction generators, parsed from their output, is printed during the test run. 0 disables monitoring.", default=0)
         ptbBaseParserGroup.add_argument("--print-missing-transactions", type=bool, help=argparse.SUPPRESS if suppressHelp else "Print missing transactions upon test completion.", default=True)
         ptbBaseParserGroup.add_argument("--account-name", type=str, help=argparse.SUPPRESS if suppressHelp else "Name of the account to create and assign a contract to", default="sysio")
         ptbBaseParserGroup.add_argument("--contract-dir", type=str, help=argparse.SUPPRESS if suppressHelp else "Path to contract dir", default="unittests/contracts/sysio.system")
@@ -783,6 +1138,9 @@ class PtbArgumentsHandler(object):
 
         ptbParserGroup.add_argument("--target-tps", type=int, help="The target transfers per second to send during test", default=8000)
         ptbParserGroup.add_argument("--test-duration-sec", type=int, help="The duration of transfer trx generation for the test in seconds", default=90)
+        ptbParserGroup.add_argument("--profile-nodes", type=int, nargs="+", help="Ids of the nodes whose cpu is profiled during the steady state window of the test, writing flamegraph ready folded stacks to profileLogs", default=[])
+        ptbParserGroup.add_argument("--profile-method", type=str, help="Profiler used for --profile-nodes: perf record, sampling of the cpu time of each thread from /proc, or perf falling back to /proc when perf is not installed or may not attach", choices=PROFILE_METHODS, default="auto")
+        ptbParserGroup.add_argument("--profile-frequency-hz", type=int, help="Frequency at which --profile-nodes are sampled. /proc sampling is limited to the kernel's clock tick rate.", default=99)
 
         return ptbParser
 
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+import http.client
+import re
+import sys
+import threading
+import time
+
+from pathlib import Path, PurePath
+sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
+
+from TestHarness import Utils
+from TestHarness.http_transport import HttpTransport
+from dataclasses import dataclass, field
+
+# nodeop_trxs_incoming_total counts the transactions of blocks a node receives, so on a non-producing node its rate is
+# the chain's TPS
+TRXS_INCOMING_METRIC = "nodeop_trxs_incoming_total"
+HEAD_BLOCK_METRIC = "nodeop_head_block_num"
+LIB_METRIC = "nodeop_last_irreversible"
+# incremented by the size of the unapplied transaction queue each time a block is produced
+UNAPPLIED_TRXS_METRIC = "nodeop_unapplied_transactions_total"
+BLOCKS_PRODUCED_METRIC = "nodeop_blocks_produced"
+BLOCKS_INCOMING_METRIC = "nodeop_blocks_incoming"
+# total microseconds between block timestamp and receipt of the incoming blocks
+BLOCK_LATENCY_METRIC = "nodeop_incoming_us_block_latency"
+
+BLOCK_INTERVAL_SEC = 0.5
+
+DEFAULT_SAMPLED_METRICS = [TRXS_INCOMING_METRIC, "nodeop_trxs_produced_total", BLOCKS_PRODUCED_METRIC, BLOCKS_INCOMING_METRIC,
+                           BLOCK_LATENCY_METRIC, UNAPPLIED_TRXS_METRIC, "nodeop_p2p_dropped_trxs_total", "nodeop_num_failed_trx_produced_block",
+                           HEAD_BLOCK_METRIC, LIB_METRIC]
+
+METRIC_LINE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)')
+
+def parsePrometheusMetrics(text: str, names=None) -> dict:
+    """Parse Prometheus text exposition format into metric name -> value, summing the series of a metric over its labels.
+    Only metrics in names are kept when given."""
+    metrics = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = METRIC_LINE_PATTERN.match(line)
+        if match is None:
+            continue
+        name = match.group(1)
+        if names is not None and name not in names:
+            continue
+        try:
+            value = float(match.group(3))
+        except ValueError:
+            continue
+        metrics[name] = metrics.get(name, 0) + value
+    return metrics
+
+@dataclass
+class MetricsSample:
+    elapsedSec: float = 0
+    metrics: dict = field(default_factory=dict)
+
+class PrometheusSampler:
+    """Polls /v1/prometheus/metrics of each node on a background thread every intervalSec while a test runs.
+
+    Samples are kept per node as a time series, and unless quiet the live TPS seen by tpsNodeId is printed after each round.
+    After each round every abort rule, a callable taking the sampler and returning a reason string or None, is evaluated;
+    the first reason returned is recorded in abortReason, sets the aborted event and stops sampling."""
+
+    def __init__(self, endpoints: dict, tpsNodeId, intervalSec: float=1.0, metrics=None, abortRules=None, targetTps=None, quiet=False):
+        self.endpoints = endpoints
+        self.tpsNodeId = tpsNodeId
+        self.intervalSec = intervalSec
+        self.metrics = set(metrics if metrics is not None else DEFAULT_SAMPLED_METRICS)
+        self.abortRules = abortRules if abortRules is not None else []
+        self.targetTps = targetTps
+        self.quiet = quiet
+        self.series = {nodeId: [] for nodeId in endpoints}
+        self.abortReason = None
+        self.aborted = threading.Event()
+        self.lock = threading.Lock()
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.startTime = None
+
+    def start(self):
+        self.startTime = time.monotonic()
+        self.thread = threading.Thread(target=self.__run, name="PrometheusSampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __run(self):
+        transports = {nodeId: HttpTransport(endpoint) for nodeId, endpoint in self.endpoints.items()}
+        try:
+            nextSample = time.monotonic()
+            while not self.stopEvent.is_set():
+                for nodeId, transport in transports.items():
+                    sample = self.__sample(transport)
+                    if sample is not None:
+                        with self.lock:
+                            self.series[nodeId].append(sample)
+                if not self.quiet:
+                    self.__printLive()
+                reason = self.__evaluateAbortRules()
+                if reason is not None:
+                    self.abortReason = reason
+                    Utils.Print(f"Aborting test run: {reason}")
+                    self.aborted.set()
+                    break
+                nextSample += self.intervalSec
+                self.stopEvent.wait(max(0, nextSample - time.monotonic()))
+        finally:
+            for transport in transports.values():
+                transport.close()
+
+    def __sample(self, transport):
+        try:
+            response = transport.request("/v1/prometheus/metrics")
+        except (OSError, http.client.HTTPException) as ex:
+            if Utils.Debug: Utils.Print(f"Failed to sample prometheus metrics from {transport.endpoint}: {ex}")
+            return None
+        if not response.ok():
+            if Utils.Debug: Utils.Print(f"Failed to sample prometheus metrics from {transport.endpoint}: {response.code} {response.reason}")
+            return None
+        return MetricsSample(elapsedSec=time.monotonic() - self.startTime, metrics=parsePrometheusMetrics(response.body.decode(), self.metrics))
+
+    def __evaluateAbortRules(self):
+        for rule in self.abortRules:
+            reason = rule(self)
+            if reason is not None:
+                return reason
+        return None
+
+    def __printLive(self):
+        latest = self.latest(self.tpsNodeId)
+        if latest is None:
+            return
+        tps = self.rate(self.tpsNodeId, TRXS_INCOMING_METRIC)
+        target = f" target: {self.targetTps}" if self.targetTps is not None else ""
+        Utils.Print(f"Live TPS: {tps:.1f}{target} head: {int(latest.metrics.get(HEAD_BLOCK_METRIC, 0))} lib: {int(latest.metrics.get(LIB_METRIC, 0))} "
+                    f"elapsed: {latest.elapsedSec:.1f}s")
+
+    def samples(self, nodeId) -> list:
+        with self.lock:
+            return list(self.series[nodeId])
+
+    def latest(self, nodeId) -> MetricsSample:
+        with self.lock:
+            samples = self.series[nodeId]
+            return samples[-1] if samples else None
+
+    def rate(self, nodeId, name, windowSec=None) -> float:
+        """Per second rate of counter name on nodeId between its latest sample and the one windowSec (default the previous
+        sample) earlier.  0 until there are two samples."""
+        with self.lock:
+            samples = self.series[nodeId]
+            if len(samples) < 2:
+                return 0.0
+            last = samples[-1]
+            first = samples[-2]
+            if windowSec is not None:
+                for sample in samples:
+                    if last.elapsedSec - sample.elapsedSec <= windowSec:
+                        first = sample
+                        break
+            if last.elapsedSec <= first.elapsedSec:
+                return 0.0
+            return (last.metrics.get(name, 0) - first.metrics.get(name, 0)) / (last.elapsedSec - first.elapsedSec)
+
+    def delta(self, nodeId, name, startSec: float, endSec: float=None):
+        """Change of counter name on nodeId and the seconds it took, between the first sample at or after startSec and the
+        last sample at or before endSec (default the latest sample).  None when fewer than two samples fall in the window."""
+        with self.lock:
+            window = [sample for sample in self.series[nodeId] if sample.elapsedSec >= startSec and (endSec is None or sample.elapsedSec <= endSec)]
+        if len(window) < 2 or window[-1].elapsedSec <= window[0].elapsedSec:
+            return None
+        return window[-1].metrics.get(name, 0) - window[0].metrics.get(name, 0), window[-1].elapsedSec - window[0].elapsedSec
+
+    def elapsedSec(self) -> float:
+        return time.monotonic() - self.startTime if self.startTime is not None else 0.0
+
+    def report(self) -> dict:
+        """Time series of the samples of every node, keyed by formatted node num as the rest of the report."""
+        with self.lock:
+            return {str(nodeId).zfill(2): [{"elapsedSec": sample.elapsedSec, **sample.metrics} for sample in samples] for nodeId, samples in self.series.items()}
+
+def trxsStarted(samples: list) -> int:
+    """Index of the first sample in which the node had seen transactions in incoming blocks, len(samples) if none yet.
+    Rules measuring throughput only start counting from there so the transaction generators' start up is not held against them."""
+    for index, sample in enumerate(samples):
+        if sample.metrics.get(TRXS_INCOMING_METRIC, 0) > samples[0].metrics.get(TRXS_INCOMING_METRIC, 0):
+            return index - 1
+    return len(samples)
+
+@dataclass
+class LowTpsAbortRule:
+    """Abort when the TPS seen by the sampler's tpsNodeId stays below minTpsPct percent of the target for blocks blocks."""
+    minTpsPct: float
+    blocks: int
+
+    def __call__(self, sampler: PrometheusSampler):
+        samples = sampler.samples(sampler.tpsNodeId)
+        windowSec = self.blocks * BLOCK_INTERVAL_SEC
+        start = trxsStarted(samples)
+        if start >= len(samples) or samples[-1].elapsedSec - samples[start].elapsedSec < windowSec:
+            return None
+        tps = sampler.rate(sampler.tpsNodeId, TRXS_INCOMING_METRIC, windowSec=windowSec)
+        if tps < sampler.targetTps * self.minTpsPct / 100:
+            return f"TPS {tps:.1f} below {self.minTpsPct}% of target {sampler.targetTps} for {self.blocks} blocks"
+        return None
+
+@dataclass
+class EmptyBlocksAbortRule:
+    """Abort when, after transactions started arriving, the sampler's tpsNodeId goes blocks consecutive blocks without
+    receiving a transaction, counting block intervals in which the head did not advance as missed blocks."""
+    blocks: int
+
+    def __call__(self, sampler: PrometheusSampler):
+        samples = sampler.samples(sampler.tpsNodeId)
+        start = trxsStarted(samples)
+        emptyBlocks = 0
+        for prev, cur in zip(samples[start:], samples[start + 1:]):
+            if cur.metrics.get(TRXS_INCOMING_METRIC, 0) > prev.metrics.get(TRXS_INCOMING_METRIC, 0):
+                emptyBlocks = 0
+                continue
+            headAdvance = cur.metrics.get(HEAD_BLOCK_METRIC, 0) - prev.metrics.get(HEAD_BLOCK_METRIC, 0)
+            emptyBlocks += headAdvance if headAdvance > 0 else (cur.elapsedSec - prev.elapsedSec) / BLOCK_INTERVAL_SEC
+        if emptyBlocks >= self.blocks:
+            return f"{int(emptyBlocks)} consecutive empty or missed blocks"
+        return None
+
+@dataclass
+class UnappliedTrxGrowthAbortRule:
+    """Abort when the unapplied transaction queue of any producing node grows for samples consecutive samples.  The queue
+    size is the per block average of nodeop_unapplied_transactions_total over the blocks produced between two samples."""
+    samples: int
+
+    def __call__(self, sampler: PrometheusSampler):
+        for nodeId in sampler.endpoints:
+            samples = sampler.samples(nodeId)
+            queueSizes = []
+            for prev, cur in zip(samples, samples[1:]):
+                blocksProduced = cur.metrics.get(BLOCKS_PRODUCED_METRIC, 0) - prev.metrics.get(BLOCKS_PRODUCED_METRIC, 0)
+                if blocksProduced > 0:
+                    queueSizes.append((cur.metrics.get(UNAPPLIED_TRXS_METRIC, 0) - prev.metrics.get(UNAPPLIED_TRXS_METRIC, 0)) / blocksProduced)
+            recent = queueSizes[-(self.samples + 1):]
+            if len(recent) == self.samples + 1 and all(earlier < later for earlier, later in zip(recent, recent[1:])):
+                return f"unapplied transaction queue of node {nodeId} grew for {self.samples} consecutive samples to {recent[-1]:.0f}"
+        return None
+
+def createAbortRules(minTpsPct: float=0, lowTpsBlocks: int=0, emptyBlocks: int=0, unappliedGrowthSamples: int=0) -> list:
+    """Abort rules for the enabled (non zero) criteria."""
+    rules = []
+    if minTpsPct > 0 and lowTpsBlocks > 0:
+        rules.append(LowTpsAbortRule(minTpsPct=minTpsPct, blocks=lowTpsBlocks))
+    if emptyBlocks > 0:
+        rules.append(EmptyBlocksAbortRule(blocks=emptyBlocks))
+    if unappliedGrowthSamples > 0:
+        rules.append(UnappliedTrxGrowthAbortRule(samples=unappliedGrowthSamples))
+    return rules
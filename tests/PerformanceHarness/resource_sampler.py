@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import threading
+import time
+
+from pathlib import Path, PurePath
+sys.path.append(str(PurePath(PurePath(Path(__file__).absolute()).parent).parent))
+
+from TestHarness import Utils
+from dataclasses import dataclass, field, asdict
+
+CLOCK_TICKS_PER_SEC = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# 0 based indices into the fields of /proc/<pid>/stat following the ") " closing the command name, see proc(5)
+STAT_STATE = 0
+STAT_MINFLT = 7
+STAT_MAJFLT = 9
+STAT_UTIME = 11
+STAT_STIME = 12
+STAT_NUM_THREADS = 17
+STAT_RSS = 21
+
+def readStat(statPath: Path):
+    """Command name and the fields following it in a /proc stat file.  The name is parsed up to the last ')' as it may itself hold spaces or parentheses."""
+    with open(statPath, 'rt') as f:
+        stat = f.read()
+    return stat[stat.index('(') + 1:stat.rindex(')')], stat[stat.rindex(')') + 2:].split()
+
+def readKeyValues(path: Path) -> dict:
+    """The "key: value" lines of a /proc status or io file, empty when the file may not be read (io needs ptrace access)."""
+    values = {}
+    try:
+        with open(path, 'rt') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                values[key] = value.split()[0] if value.split() else ""
+    except PermissionError:
+        pass
+    return values
+
+@dataclass
+class ProcessSample:
+    elapsedSec: float = 0
+    cpuUserSec: float = 0
+    cpuSysSec: float = 0
+    rssBytes: int = 0
+    minorFaults: int = 0
+    majorFaults: int = 0
+    voluntaryCtxtSwitches: int = 0
+    nonvoluntaryCtxtSwitches: int = 0
+    readBytes: int = 0
+    writeBytes: int = 0
+    numThreads: int = 0
+    # "<thread name>-<tid>" -> cpu seconds (user + system) of each thread
+    threadCpuSec: dict = field(default_factory=dict)
+
+def sampleProcess(pid: int, elapsedSec: float) -> ProcessSample:
+    """Sample /proc/<pid>/stat, status, io and the stat of each of its threads.  Raises OSError once the process is gone."""
+    procPath = Path("/proc")/str(pid)
+    _, stat = readStat(procPath/"stat")
+    status = readKeyValues(procPath/"status")
+    io = readKeyValues(procPath/"io")
+    sample = ProcessSample(elapsedSec=elapsedSec, cpuUserSec=int(stat[STAT_UTIME]) / CLOCK_TICKS_PER_SEC, cpuSysSec=int(stat[STAT_STIME]) / CLOCK_TICKS_PER_SEC,
+                           rssBytes=int(stat[STAT_RSS]) * PAGE_SIZE, minorFaults=int(stat[STAT_MINFLT]), majorFaults=int(stat[STAT_MAJFLT]),
+                           voluntaryCtxtSwitches=int(status.get("voluntary_ctxt_switches", 0)), nonvoluntaryCtxtSwitches=int(status.get("nonvoluntary_ctxt_switches", 0)),
+                           readBytes=int(io.get("read_bytes", 0)), writeBytes=int(io.get("write_bytes", 0)), numThreads=int(stat[STAT_NUM_THREADS]))
+    for taskPath in (procPath/"task").iterdir():
+        try:
+            name, taskStat = readStat(taskPath/"stat")
+        except OSError:
+            # thread exited since the directory was listed
+            continue
+        sample.threadCpuSec[f"{name}-{taskPath.name}"] = (int(taskStat[STAT_UTIME]) + int(taskStat[STAT_STIME])) / CLOCK_TICKS_PER_SEC
+    return sample
+
+class ResourceSampler:
+    """Samples the resource usage of the processes under test (nodeop, kiod, trx_generator) from /proc on a background thread
+    every intervalSec.  Processes may be added while sampling, e.g. the transaction generators once launched, and each is
+    sampled until it exits."""
+
+    def __init__(self, intervalSec: float=1.0):
+        self.intervalSec = intervalSec
+        self.processes = {}
+        self.series = {}
+        self.exited = set()
+        self.lock = threading.Lock()
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.startTime = None
+
+    def addProcess(self, label: str, pid: int):
+        if pid is None:
+            return
+        with self.lock:
+            self.processes[label] = pid
+            self.series.setdefault(label, [])
+            self.exited.discard(label)
+
+    def start(self):
+        self.startTime = time.monotonic()
+        self.thread = threading.Thread(target=self.__run, name="ResourceSampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __run(self):
+        nextSample = time.monotonic()
+        while not self.stopEvent.is_set():
+            with self.lock:
+                processes = {label: pid for label, pid in self.processes.items() if label not in self.exited}
+            for label, pid in processes.items():
+                try:
+                    sample = sampleProcess(pid, time.monotonic() - self.startTime)
+                except (OSError, ValueError, IndexError) as ex:
+                    if Utils.Debug: Utils.Print(f"Stopped sampling resources of {label} (pid {pid}): {ex}")
+                    with self.lock:
+                        self.exited.add(label)
+                    continue
+                with self.lock:
+                    self.series[label].append(sample)
+            nextSample += self.intervalSec
+            self.stopEvent.wait(max(0, nextSample - time.monotonic()))
+
+    def summary(self, label: str) -> dict:
+        """Averages over the sampled lifetime of a process: cpu and per thread cpu as percent of one core, peak rss and the
+        page faults, context switches and disk io it accrued."""
+        with self.lock:
+            samples = list(self.series[label])
+        if len(samples) < 2:
+            return {}
+        first, last = samples[0], samples[-1]
+        elapsedSec = last.elapsedSec - first.elapsedSec
+        pct = lambda cpuSec: cpuSec / elapsedSec * 100 if elapsedSec > 0 else 0
+        threadCpuPct = {}
+        for thread, cpuSec in last.threadCpuSec.items():
+            # threads started after the first sample are charged from 0
+            threadCpuPct[thread] = pct(cpuSec - first.threadCpuSec.get(thread, 0))
+        return {"elapsedSec": elapsedSec,
+                "cpuPct": pct(last.cpuUserSec + last.cpuSysSec - first.cpuUserSec - first.cpuSysSec),
+                "cpuUserPct": pct(last.cpuUserSec - first.cpuUserSec),
+                "cpuSysPct": pct(last.cpuSysSec - first.cpuSysSec),
+                "maxRssBytes": max(sample.rssBytes for sample in samples),
+                "minorFaults": last.minorFaults - first.minorFaults,
+                "majorFaults": last.majorFaults - first.majorFaults,
+                "voluntaryCtxtSwitches": last.voluntaryCtxtSwitches - first.voluntaryCtxtSwitches,
+                "nonvoluntaryCtxtSwitches": last.nonvoluntaryCtxtSwitches - first.nonvoluntaryCtxtSwitches,
+                "readBytes": last.readBytes - first.readBytes,
+                "writeBytes": last.writeBytes - first.writeBytes,
+                "threadCpuPct": dict(sorted(threadCpuPct.items(), key=lambda item: item[1], reverse=True))}
+
+    def report(self) -> dict:
+        with self.lock:
+            labels = {label: pid for label, pid in self.processes.items()}
+            series = {label: [asdict(sample) for sample in samples] for label, samples in self.series.items()}
+        return {label: {"pid": pid, "summary": self.summary(label), "samples": series[label]} for label, pid in labels.items()}
@@ -0,0 +1,377 @@
+import argparse
+import hashlib
+import json
+import math
+import re
+import socket
+import sqlite3
+
+from pathlib import Path
+from dataclasses import dataclass
+from datetime import datetime
+from .log_reader import LogReaderEncoder
+
+try:
+    from datetime import UTC
+except ImportError:
+    from datetime import timezone
+    UTC = timezone.utc
+
+DEFAULT_RESULTS_DB = Path("PHSRLogs")/"results.db"
+
+# args that name where a run logged rather than how it was configured, left out of the config hash
+VOLATILE_ARGS = {"rawCmdLine ", "logDirRoot", "logDirBase", "logDirTimestamp", "logDirTimestampedOptSuffix", "logDirPath", "ptbLogsDirPath",
+                 "pluginThreadOptLogsDirPath", "resultsDb"}
+
+# metric name prefixes for which a higher value is better, for all others (latency, cpu) lower is better
+HIGHER_IS_BETTER = ("tps.", "maxTps.")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    testName TEXT,
+    ingested TEXT NOT NULL,
+    testStart TEXT,
+    nodeopVersion TEXT,
+    commitHash TEXT,
+    host TEXT,
+    configHash TEXT,
+    targetTps INTEGER,
+    passed INTEGER,
+    reportPath TEXT,
+    report TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    runId INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    sigma REAL,
+    samples INTEGER,
+    PRIMARY KEY (runId, name)
+);
+CREATE INDEX IF NOT EXISTS runsCommit ON runs(commitHash);
+CREATE INDEX IF NOT EXISTS runsConfig ON runs(configHash);
+"""
+
+@dataclass
+class Metric:
+    name: str
+    value: float
+    sigma: float = None
+    samples: int = None
+
+@dataclass
+class MetricComparison:
+    name: str
+    baseline: float = 0
+    candidate: float = 0
+    changePct: float = 0
+    pValue: float = None
+    method: str = "change"
+    status: str = ""
+
+def configHash(args: dict) -> str:
+    """Hash of a report's args, less those only naming log locations, so runs of the same configuration share it."""
+    config = {key: value for key, value in args.items() if key not in VOLATILE_ARGS}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def commitFromVersion(nodeopVersion: str) -> str:
+    """Commit hash at the end of nodeop --full-version output (e.g. v5.0.0-rc1-<hash>), None if there is none."""
+    match = re.search(r'([0-9a-f]{7,40})$', nodeopVersion or "")
+    return match.group(1) if match else None
+
+def statsMetrics(prefix: str, stats: dict, samplesKey: str) -> list:
+    """Average (with its sigma and sample count) and percentiles of a stats or basicStats entry of a report's Analysis."""
+    if not stats:
+        return []
+    metrics = [Metric(name=f"{prefix}.avg", value=stats["avg"], sigma=stats.get("sigma"), samples=stats.get(samplesKey))]
+    metrics.extend(Metric(name=f"{prefix}.{percentile}", value=value) for percentile, value in stats.get("percentiles", {}).items())
+    return metrics
+
+def ptbReportMetrics(report: dict) -> list:
+    analysis = report.get("Analysis")
+    if not analysis:
+        return []
+    metrics = statsMetrics("tps", analysis.get("TPS"), "numBlocks") + statsMetrics("trxLatency", analysis.get("TrxLatency"), "samples") + \
+              statsMetrics("blockCpu", analysis.get("BlockCPU"), "numBlocks") + statsMetrics("trxCpu", analysis.get("TrxCPU"), "samples")
+    for stage, stats in analysis.get("TrxLatencyBreakdown", {}).items():
+        metrics += statsMetrics(f"trxLatencyBreakdown.{stage}", stats, "samples")
+    return metrics
+
+def ptReportMetrics(report: dict) -> list:
+    """Max TPS results of a performance test report, plus the analysis of its long running max TPS run."""
+    metrics = [Metric(name="maxTps.initial", value=report.get("InitialMaxTpsAchieved", 0)),
+               Metric(name="maxTps.longRunning", value=report.get("LongRunningMaxTpsAchieved", 0))]
+    rampSearch = report.get("InitialRampSearch")
+    if rampSearch and rampSearch.get("confirmationTps"):
+        confirmationTps = rampSearch["confirmationTps"]
+        mean = sum(confirmationTps) / len(confirmationTps)
+        sigma = math.sqrt(sum((tps - mean) ** 2 for tps in confirmationTps) / (len(confirmationTps) - 1)) if len(confirmationTps) > 1 else None
+        metrics.append(Metric(name="maxTps.rampMean", value=mean, sigma=sigma, samples=len(confirmationTps)))
+    return metrics + ptbReportMetrics(report.get("LongRunningMaxTpsReport") or {})
+
+def studentTSf(t: float, df: float) -> float:
+    """Two sided p-value of Student's t statistic t with df degrees of freedom."""
+    t = abs(t)
+    if df > 1000:
+        return math.erfc(t / math.sqrt(2))
+    return regularizedIncompleteBeta(df / (df + t * t), df / 2, 0.5)
+
+def studentTCritical(alpha: float, df: float, epsilon: float=1e-9) -> float:
+    """Two sided critical value of Student's t distribution with df degrees of freedom, the t whose studentTSf is alpha."""
+    assert 0 < alpha < 1, f"alpha must be in (0, 1), not {alpha}"
+    low, high = 0.0, 1.0
+    while studentTSf(high, df) > alpha:
+        low, high = high, high * 2
+    while high - low > epsilon * high:
+        mid = (low + high) / 2
+        if studentTSf(mid, df) > alpha:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def regularizedIncompleteBeta(x: float, a: float, b: float) -> float:
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    # the continued fraction converges quickly only below the mean of the distribution, use the symmetry otherwise
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - front * betaContinuedFraction(1 - x, b, a) / b
+    return front * betaContinuedFraction(x, a, b) / a
+
+def betaContinuedFraction(x: float, a: float, b: float, maxIterations: int=300, epsilon: float=1e-12) -> float:
+    """Continued fraction of the incomplete beta function by the modified Lentz method."""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, maxIterations + 1):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)), -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < epsilon:
+            break
+    return result
+
+def welchTTest(mean1: float, sigma1: float, n1: int, mean2: float, sigma2: float, n2: int) -> float:
+    """p-value of Welch's t-test that two samples, given by their mean, standard deviation and size, share a mean."""
+    var1 = sigma1 ** 2 / n1
+    var2 = sigma2 ** 2 / n2
+    if var1 + var2 == 0:
+        return 1.0 if mean1 == mean2 else 0.0
+    t = (mean2 - mean1) / math.sqrt(var1 + var2)
+    df = (var1 + var2) ** 2 / ((var1 ** 2 / (n1 - 1) if n1 > 1 else 0) + (var2 ** 2 / (n2 - 1) if n2 > 1 else 0))
+    return studentTSf(t, df)
+
+def meanAndSigma(values: list):
+    mean = sum(values) / len(values)
+    return mean, math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1)) if len(values) > 1 else 0.0
+
+def compareMetric(name: str, baseline: list, candidate: list, alpha: float, minChangePct: float) -> MetricComparison:
+    """Compare the Metrics of name in the baseline runs against those in the candidate runs.
+
+    With at least two runs on each side the per run values are tested, with one run on each side averages are tested on the
+    sigma and sample count they were measured over.  A worse change of at least minChangePct percent is a REGRESSION when
+    significant at alpha, and a possible regression when there is nothing to test it on."""
+    baseMean, baseSigma = meanAndSigma([metric.value for metric in baseline])
+    candMean, candSigma = meanAndSigma([metric.value for metric in candidate])
+    comparison = MetricComparison(name=name, baseline=baseMean, candidate=candMean)
+    comparison.changePct = (candMean - baseMean) / abs(baseMean) * 100 if baseMean != 0 else (0.0 if candMean == 0 else math.inf)
+    if len(baseline) > 1 and len(candidate) > 1:
+        comparison.method = "runs"
+        comparison.pValue = welchTTest(baseMean, baseSigma, len(baseline), candMean, candSigma, len(candidate))
+    elif len(baseline) == 1 and len(candidate) == 1 and all(metric.sigma is not None and (metric.samples or 0) > 1 for metric in baseline + candidate):
+        comparison.method = "samples"
+        comparison.pValue = welchTTest(baseline[0].value, baseline[0].sigma, baseline[0].samples, candidate[0].value, candidate[0].sigma, candidate[0].samples)
+
+    worse = comparison.changePct < 0 if name.startswith(HIGHER_IS_BETTER) else comparison.changePct > 0
+    if abs(comparison.changePct) < minChangePct:
+        return comparison
+    if comparison.pValue is None:
+        comparison.status = "possible regression" if worse else "possible improvement"
+    elif comparison.pValue < alpha:
+        comparison.status = "REGRESSION" if worse else "improvement"
+    return comparison
+
+class ResultsStore:
+    """SQLite store of PerformanceTestBasic and PerformanceTest reports and the metrics compared across runs: TPS, transaction
+    latency and cpu, and block cpu (average and percentiles) and the max TPS found by performance tests."""
+
+    def __init__(self, dbPath: Path):
+        self.dbPath = Path(dbPath)
+        self.dbPath.parent.mkdir(parents=True, exist_ok=True)
+        # concurrent runs (e.g. a parallel thread count sweep) may ingest at the same time
+        self.connection = sqlite3.connect(self.dbPath, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingestReport(self, report: dict, kind: str=None, testName: str=None, reportPath: Path=None, commitHash: str=None, host: str=None) -> int:
+        """Store report (as created by createReport or read back from its json) and its metrics, returning the run id.
+        kind is "pt" for a PerformanceTest report and "ptb" for a PerformanceTestBasic one, detected when not given."""
+        report = json.loads(json.dumps(report, cls=LogReaderEncoder))
+        if kind is None:
+            kind = "pt" if "perfTestsBegin" in report else "ptb"
+        args = report.get("args", {})
+        nodeopVersion = report.get("nodeopVersion")
+        if kind == "pt":
+            metrics = ptReportMetrics(report)
+            testStart = report.get("perfTestsBegin")
+            targetTps = args.get("maxTpsToTest")
+            passed = None
+        else:
+            metrics = ptbReportMetrics(report)
+            result = report.get("Result", {})
+            testStart = result.get("testStart")
+            targetTps = result.get("targetTPS")
+            passed = result.get("testPassed")
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (kind, testName, ingested, testStart, nodeopVersion, commitHash, host, configHash, targetTps, passed, reportPath, report) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, testName, datetime.now(UTC).isoformat(), testStart, nodeopVersion, commitHash if commitHash is not None else commitFromVersion(nodeopVersion),
+                 host if host is not None else socket.gethostname(), configHash(args), targetTps, passed, str(reportPath) if reportPath is not None else None,
+                 json.dumps(report)))
+            runId = cursor.lastrowid
+            self.connection.executemany("INSERT OR REPLACE INTO metrics (runId, name, value, sigma, samples) VALUES (?, ?, ?, ?, ?)",
+                                        [(runId, metric.name, metric.value, metric.sigma, metric.samples) for metric in metrics])
+        return runId
+
+    def ingestReportFile(self, reportPath: Path, commitHash: str=None, host: str=None) -> int:
+        with open(reportPath, 'rt') as f:
+            report = json.load(f)
+        return self.ingestReport(report, reportPath=Path(reportPath), commitHash=commitHash, host=host)
+
+    def runs(self, kind: str=None, commitHash: str=None, nodeopVersion: str=None, configHash: str=None, limit: int=None) -> list:
+        """Runs matching the given filters, newest first.  commitHash matches as a prefix."""
+        query = "SELECT id, kind, testName, ingested, testStart, nodeopVersion, commitHash, host, configHash, targetTps, passed, reportPath FROM runs WHERE 1=1"
+        params = []
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        if commitHash is not None:
+            query += " AND commitHash LIKE ?"
+            params.append(f"{commitHash}%")
+        if nodeopVersion is not None:
+            query += " AND nodeopVersion = ?"
+            params.append(nodeopVersion)
+        if configHash is not None:
+            query += " AND configHash = ?"
+            params.append(configHash)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def metrics(self, runIds: list) -> dict:
+        """Metric name -> list of Metric over runIds."""
+        metrics = {}
+        if not runIds:
+            return metrics
+        query = f"SELECT name, value, sigma, samples FROM metrics WHERE runId IN ({','.join('?' * len(runIds))}) ORDER BY runId"
+        for row in self.connection.execute(query, list(runIds)):
+            metrics.setdefault(row["name"], []).append(Metric(name=row["name"], value=row["value"], sigma=row["sigma"], samples=row["samples"]))
+        return metrics
+
+    def compare(self, baselineRunIds: list, candidateRunIds: list, alpha: float=0.05, minChangePct: float=2.0) -> list:
+        """MetricComparison of every metric recorded in both the baseline and the candidate runs."""
+        baseline = self.metrics(baselineRunIds)
+        candidate = self.metrics(candidateRunIds)
+        return [compareMetric(name, baseline[name], candidate[name], alpha, minChangePct) for name in sorted(baseline.keys() & candidate.keys())]
+
+    def selectRuns(self, selector: str, kind: str=None, configHash: str=None) -> list:
+        """Run ids named by selector: comma separated run ids, "latest", "commit:<hash prefix>" or "version:<nodeop version>"."""
+        if selector == "latest":
+            return [run["id"] for run in self.runs(kind=kind, configHash=configHash, limit=1)]
+        if selector.startswith("commit:"):
+            return [run["id"] for run in self.runs(kind=kind, commitHash=selector[len("commit:"):], configHash=configHash)]
+        if selector.startswith("version:"):
+            return [run["id"] for run in self.runs(kind=kind, nodeopVersion=selector[len("version:"):], configHash=configHash)]
+        return [int(runId) for runId in selector.split(",")]
+
+def recordReport(dbPath: Path, report: dict, kind: str, testName: str=None, reportPath: Path=None):
+    """Ingest report into the results store at dbPath, reporting rather than raising failures so they never fail a test run."""
+    try:
+        with ResultsStore(dbPath) as store:
+            runId = store.ingestReport(report, kind=kind, testName=testName, reportPath=reportPath)
+        print(f"Recorded results as run {runId} in results store: {dbPath}")
+    except (sqlite3.Error, OSError) as e:
+        print(f"Failed to record results in results store '{dbPath}': {type(e)}: {e}")
+
+class ResultsStoreArgumentsHandler(object):
+
+    @staticmethod
+    def createArgumentParser():
+        parser = argparse.ArgumentParser(add_help=True, formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                         description="Query the store of performance harness results and compare runs across builds.")
+        parser.add_argument("--results-db", type=str, help="Path to the results store", default=str(DEFAULT_RESULTS_DB))
+        subparsers = parser.add_subparsers(title="Commands", dest="command", required=True)
+
+        ingestParser = subparsers.add_parser("ingest", formatter_class=argparse.ArgumentDefaultsHelpFormatter, help="Ingest report json files written by earlier runs.")
+        ingestParser.add_argument("reports", type=str, nargs="+", help="Paths of report.json or data.json files")
+        ingestParser.add_argument("--commit", type=str, help="Commit the reports' nodeop was built from, by default taken from its version", default=None)
+        ingestParser.add_argument("--host", type=str, help="Host the reports were run on, by default this host", default=None)
+
+        listParser = subparsers.add_parser("list", formatter_class=argparse.ArgumentDefaultsHelpFormatter, help="List stored runs, newest first.")
+        listParser.add_argument("--kind", type=str, help="Only runs of this kind", choices=["pt", "ptb"], default=None)
+        listParser.add_argument("--commit", type=str, help="Only runs of commits starting with this", default=None)
+        listParser.add_argument("--config-hash", type=str, help="Only runs of this configuration", default=None)
+        listParser.add_argument("--limit", type=int, help="Maximum number of runs to list", default=20)
+
+        diffParser = subparsers.add_parser("diff", formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                           help="Compare candidate runs against baseline runs and flag significant regressions. Exits 1 when any is found.")
+        diffParser.add_argument("baseline", type=str, help="Baseline runs: comma separated run ids, \"latest\", \"commit:<hash prefix>\" or \"version:<nodeop version>\"")
+        diffParser.add_argument("candidate", type=str, help="Candidate runs, selected as the baseline runs")
+        diffParser.add_argument("--kind", type=str, help="Only select runs of this kind", choices=["pt", "ptb"], default=None)
+        diffParser.add_argument("--config-hash", type=str, help="Only select runs of this configuration", default=None)
+        diffParser.add_argument("--alpha", type=float, help="Significance level of the tests", default=0.05)
+        diffParser.add_argument("--min-change-pct", type=float, help="Smallest change, in percent, flagged as a regression or improvement", default=2.0)
+        return parser
+
+    @staticmethod
+    def parseArgs():
+        parser=ResultsStoreArgumentsHandler.createArgumentParser()
+        args=parser.parse_args()
+        return args
+
+def main():
+    args = ResultsStoreArgumentsHandler.parseArgs()
+    with ResultsStore(Path(args.results_db)) as store:
+        if args.command == "ingest":
+            for reportPath in args.reports:
+                print(f"{reportPath}: run {store.ingestReportFile(Path(reportPath), commitHash=args.commit, host=args.host)}")
+        elif args.command == "list":
+            for run in store.runs(kind=args.kind, commitHash=args.commit, configHash=args.config_hash, limit=args.limit):
+                print(f"{run['id']:>6} {run['kind']:<4} {run['testStart'] or '':<27} {run['commitHash'] or 'unknown':<12.12} {run['configHash']} "
+                      f"target: {run['targetTps']} passed: {run['passed']} host: {run['host']} {run['nodeopVersion'] or ''}")
+        elif args.command == "diff":
+            baseline = store.selectRuns(args.baseline, kind=args.kind, configHash=args.config_hash)
+            candidate = store.selectRuns(args.candidate, kind=args.kind, configHash=args.config_hash)
+            if not baseline or not candidate:
+                print(f"No runs selected, baseline: {baseline} candidate: {candidate}")
+                exit(2)
+            print(f"Baseline runs: {baseline} candidate runs: {candidate}")
+            comparisons = store.compare(baseline, candidate, alpha=args.alpha, minChangePct=args.min_change_pct)
+            print(f"{'metric':<24} {'baseline':>14} {'candidate':>14} {'change':>9} {'p-value':>9} {'method':<8} status")
+            for comparison in comparisons:
+                pValue = f"{comparison.pValue:.4f}" if comparison.pValue is not None else "NA"
+                print(f"{comparison.name:<24} {comparison.baseline:>14.3f} {comparison.candidate:>14.3f} {comparison.changePct:>8.2f}% {pValue:>9} {comparison.method:<8} {comparison.status}")
+            exit(1 if any(comparison.status == "REGRESSION" for comparison in comparisons) else 0)
@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+
+from PerformanceHarness import results_store
+
+if __name__ == '__main__':
+    results_store.main()
@@ -62,10 +62,21 @@ def main():
                                                 delReport=args.del_report, quiet=args.quiet,
                                                 delPerfLogs=args.del_perf_logs,
                                                 printMissingTransactions=args.print_missing_transactions,
+                                                reportPercentiles=args.report_percentiles,
+                                                histogramSubBuckets=args.histogram_sub_buckets,
+                                                prometheusSampleIntervalSec=args.prometheus_sample_interval_sec,
+                                                resourceSampleIntervalSec=args.resource_sample_interval_sec,
+                                                resultsDb=Path(args.results_db) if args.results_db else None,
+                                                trxGenCpus=args.trx_gen_cpus,
+                                                trxGenRampUpSec=args.trx_gen_ramp_up_sec,
+                                                trxGenProgressIntervalSec=args.trx_gen_progress_interval_sec,
                                                 userTrxDataFile=Path(args.user_trx_data_file) if args.user_trx_data_file is not None else None,
                                                 endpointMode=args.endpoint_mode,
                                                 trxGenerator=args.trx_generator,
-                                                saveState=args.save_state)
+                                                saveState=args.save_state,
+                                                profileNodes=args.profile_nodes,
+                                                profileMethod=args.profile_method,
+                                                profileFrequencyHz=args.profile_frequency_hz)
         Utils.Print(f"testNamePath: {PurePath(PurePath(__file__).name).stem}")
         myTest = performance_test_basic.PerformanceTestBasic(testHelperConfig=testHelperConfig, clusterConfig=testClusterConfig, ptbConfig=ptbConfig, testNamePath=f"{PurePath(PurePath(__file__).name).stem}")
     elif args.scenario_type_sub_cmd == "findMax":
@@ -89,7 +100,27 @@ def main():
                                             endpointMode=args.endpoint_mode,
                                             opModeCmd=args.op_mode_sub_cmd,
                                             trxGenerator=args.trx_generator,
-                                            saveState=args.save_state)
+                                            saveState=args.save_state,
+                                            reportPercentiles=args.report_percentiles,
+                                            histogramSubBuckets=args.histogram_sub_buckets,
+                                            prometheusSampleIntervalSec=args.prometheus_sample_interval_sec,
+                                            resourceSampleIntervalSec=args.resource_sample_interval_sec,
+                                            abortMinTpsPct=args.abort_min_tps_pct,
+                                            abortLowTpsBlocks=args.abort_low_tps_blocks,
+                                            abortEmptyBlocks=args.abort_empty_blocks,
+                                            abortUnappliedGrowthSamples=args.abort_unapplied_growth_samples,
+                                            reuseCluster=args.reuse_cluster,
+                                            searchStrategy=args.search_strategy,
+                                            rampStepTps=args.ramp_step_tps,
+                                            rampStageDurationSec=args.ramp_stage_duration_sec,
+                                            rampMinEfficiencyPct=args.ramp_min_efficiency_pct,
+                                            rampMaxLatencyFactor=args.ramp_max_latency_factor,
+                                            confirmationRuns=args.confirmation_runs,
+                                            threadOptParallelism=args.thread_opt_parallelism,
+                                            resultsDb=Path(args.results_db) if args.results_db else None,
+                                            trxGenCpus=args.trx_gen_cpus,
+                                            trxGenRampUpSec=args.trx_gen_ramp_up_sec,
+                                            trxGenProgressIntervalSec=args.trx_gen_progress_interval_sec)
 
         myTest = performance_test.PerformanceTest(testHelperConfig=testHelperConfig, clusterConfig=testClusterConfig, ptConfig=ptConfig)
     else:
@@ -29,7 +29,8 @@ from .Node import BlockType
 from .Node import Node
 from .WalletMgr import WalletMgr
 from .TransactionGeneratorsLauncher import TransactionGeneratorsLauncher, TpsTrxGensConfig
-from .launcher import cluster_generator
+from .launcher import cluster_generator, KeyStrings
+from .bootstrap_cache import BootstrapCache
 try:
     from .libc import unshare, CLONE_NEWNET
     from .interfaces import getInterfaceFlags, setInterfaceUp, IFF_LOOPBACK
@@ -125,10 +126,17 @@ class Cluster(object):
         self.unittestsContractsPath = Path(__file__).resolve().parents[2] / "unittests" / "contracts"
 
         if unshared:
-            unshare(CLONE_NEWNET)
-            for index, name in socket.if_nameindex():
-                if getInterfaceFlags(name) & IFF_LOOPBACK:
-                    setInterfaceUp(name)
+            Cluster.unshareNetwork()
+
+    @staticmethod
+    def unshareNetwork():
+        """Move this process, and the processes it launches from now on, into a new network namespace with its loopback
+        interface up.  Unprivileged, this first moves into a new user namespace, which the kernel refuses to a process
+        that has started threads, so it must be called before any (e.g. a node's BlockWatcher) is running."""
+        unshare(CLONE_NEWNET)
+        for index, name in socket.if_nameindex():
+            if getInterfaceFlags(name) & IFF_LOOPBACK:
+                setInterfaceUp(name)
 
     def setChainStrategy(self, chainSyncStrategy=Utils.SyncReplayTag):
         self.__chainSyncStrategy=self.__chainSyncStrategies.get(chainSyncStrategy)
@@ -175,7 +183,7 @@ class Cluster(object):
     def launch(self, pnodes=1, unstartedNodes=0, totalNodes=1, prodCount=21, topo="mesh", delay=2, onlyBios=False, dontBootstrap=False,
                totalProducers=None, sharedProducers=0, extraNodeopArgs="", specificExtraNodeopArgs=None, specificNodeopInstances=None, onlySetProds=False,
                pfSetupPolicy=PFSetupPolicy.FULL, alternateVersionLabelsFile=None, associatedNodeLabels=None, loadSystemContract=True, nodeopLogPath=Path(Utils.TestLogRoot) / Path(f'{Path(sys.argv[0]).stem}{os.getpid()}'), genesisPath=None,
-               maximumP2pPerHost=0, maximumClients=25, prodsEnableTraceApi=True):
+               maximumP2pPerHost=0, maximumClients=25, prodsEnableTraceApi=True, parallelLaunch=False, useBootstrapCache=False):
         """Launch cluster.
         pnodes: producer nodes count
         unstartedNodes: non-producer nodes that are configured into the launch, but not started.  Should be included in totalNodes.
@@ -200,6 +208,12 @@ class Cluster(object):
         maximumP2pPerHost:  Maximum number of client nodes from any single IP address. Defaults to totalNodes if not set.
         maximumClients: Maximum number of clients from which connections are accepted, use 0 for no limit. Defaults to 25.
         prodsEnableTraceApi: Determines whether producer nodes should have sysio::trace_api_plugin enabled. Defaults to True.
+        parallelLaunch: When true, delay is only applied after the bios and producer nodes (where producer handover needs it),
+          non-producing nodes are started together and every started node is probed until its http and p2p ports accept connections.
+        useBootstrapCache: When Utils.BootstrapCacheDir is set, start the nodes from a snapshot of a previous bootstrap with the same
+          inputs and store one after bootstrapping when there is none.  Only supported for fully bootstrapped launches of a single
+          nodeop version with every node started.  The block log of a cached launch starts after the bootstrap blocks, so only
+          tests that do not read the chain from genesis should pass True.  Defaults to False.
         """
         assert(isinstance(topo, str))
         assert PFSetupPolicy.isValid(pfSetupPolicy)
@@ -475,17 +489,54 @@ class Cluster(object):
 
         Cluster.__LauncherCmdArr = argsArr.copy()
 
+        bootstrapCache=None
+        bootstrapCacheKey=None
+        bootstrapCacheInputs=None
+        cacheEntry=None
+        if useBootstrapCache and Utils.BootstrapCacheDir and not dontBootstrap and not onlyBios and unstartedNodes == 0 and \
+           specificNodeopInstances is None and associatedNodeLabels is None and not self.staging and \
+           PFSetupPolicy.hasPreactivateFeature(pfSetupPolicy):
+            bootstrapCache=BootstrapCache(Utils.BootstrapCacheDir)
+            # every launch argument except the log location, as any of them may change the bootstrapped chain
+            bootstrapCacheInputs={"pnodes": pnodes, "totalNodes": totalNodes, "prodCount": prodCount, "topo": topo, "delay": delay,
+                                  "totalProducers": totalProducers, "sharedProducers": sharedProducers, "extraNodeopArgs": extraNodeopArgs,
+                                  "specificExtraNodeopArgs": specificExtraNodeopArgs, "onlySetProds": onlySetProds, "pfSetupPolicy": pfSetupPolicy,
+                                  "loadSystemContract": loadSystemContract, "maximumP2pPerHost": maximumP2pPerHost, "maximumClients": maximumClients,
+                                  "prodsEnableTraceApi": prodsEnableTraceApi, "parallelLaunch": parallelLaunch, "coreSymbol": CORE_SYMBOL,
+                                  "nodeopVers": self.nodeopVers}
+            bootstrapCacheKey=BootstrapCache.key(bootstrapCacheInputs, self.__bootstrapInputPaths(pfSetupPolicy, genesisPath))
+            cacheEntry=bootstrapCache.lookup(bootstrapCacheKey)
+
         launcher = cluster_generator(argsArr)
         launcher.define_network()
+        if cacheEntry is not None:
+            if set(cacheEntry.nodeKeys.keys()) == set(launcher.network.nodes.keys()):
+                Utils.Print("Launching from bootstrap cache entry %s" % (bootstrapCache.entryDir(cacheEntry.key)))
+                # nodes must sign with the keys the cached chain was bootstrapped with
+                for name, keys in cacheEntry.nodeKeys.items():
+                    launcher.network.nodes[name].keys=[KeyStrings(pubkey, privkey) for pubkey, privkey in keys]
+            else:
+                cacheEntry=None
         launcher.generate()
         self.nodes = []
+        readinessPorts = {}
         for instance in launcher.network.nodes.values():
             sysdcmd = launcher.construct_command_line(instance)
+            genesisStaleProduction = '--enable-stale-production' in sysdcmd
+            if cacheEntry is not None:
+                sysdcmd = Cluster.__snapshotStartCmd(sysdcmd, cacheEntry.snapshotPath, len(instance.producers) > 0)
 
             nodeNum = instance.index
             node = Node(self.host, self.port + nodeNum, nodeNum, Path(instance.data_dir_name),
                         Path(instance.config_dir_name), sysdcmd, unstarted=instance.dont_start,
                         launch_time=launcher.launch_time, walletMgr=self.walletMgr, nodeopVers=self.nodeopVers)
+            if cacheEntry is not None and node.popenProc:
+                # the snapshot only initializes the empty data dir, relaunches continue from the node's own state and
+                # produce like a node started from genesis
+                i = node.cmd.index('--snapshot')
+                node.cmd = node.cmd[:i] + node.cmd[i+2:]
+                if '--enable-stale-production' in node.cmd and not genesisStaleProduction:
+                    node.cmd.remove('--enable-stale-production')
             if nodeNum == Node.biosNodeId:
                 self.biosNode = node
             else:
@@ -493,7 +544,14 @@ class Cluster(object):
                     self.nodes.append(node)
                 else:
                     self.unstartedNodes.append(node)
-            time.sleep(delay)
+            if node.popenProc:
+                readinessPorts[node] = (instance.host_name, [instance.http_port, instance.p2p_port])
+            if not parallelLaunch or nodeNum == Node.biosNodeId or len(instance.producers) > 0:
+                time.sleep(delay)
+
+        if parallelLaunch and not self.waitForNodesReady(readinessPorts, Utils.systemWaitTimeout):
+            Utils.Print("ERROR: Not all %s instances started accepting connections" % (Utils.SysServerName))
+            return False
 
         self.startedNodesCount = totalNodes - unstartedNodes
         self.productionNodesCount = pnodes
@@ -511,13 +569,14 @@ class Cluster(object):
         if onlyBios:
             self.nodes=[self.biosNode]
 
-        # ensure cluster node are inter-connected by ensuring everyone has block 1
-        Utils.Print("Cluster viability smoke test. Validate every cluster node has block 1. ")
-        if not self.waitOnClusterBlockNumSync(1):
-            Utils.Print("ERROR: Cluster doesn't seem to be in sync. Some nodes missing block 1")
+        # ensure cluster node are inter-connected by ensuring everyone has block 1 (or the block after the cached snapshot)
+        syncBlockNum = 1 if cacheEntry is None else cacheEntry.headBlockNum + 1
+        Utils.Print("Cluster viability smoke test. Validate every cluster node has block %d. " % (syncBlockNum))
+        if not self.waitOnClusterBlockNumSync(syncBlockNum):
+            Utils.Print("ERROR: Cluster doesn't seem to be in sync. Some nodes missing block %d" % (syncBlockNum))
             return False
 
-        if PFSetupPolicy.hasPreactivateFeature(pfSetupPolicy):
+        if cacheEntry is None and PFSetupPolicy.hasPreactivateFeature(pfSetupPolicy):
             Utils.Print("Activate Preactivate Feature.")
             self.biosNode.activatePreactivateFeature()
 
@@ -525,10 +584,19 @@ class Cluster(object):
             Utils.Print("Skipping bootstrap.")
             return True
 
-        Utils.Print("Bootstrap cluster.")
-        if not self.bootstrap(self.biosNode, self.startedNodesCount, prodCount + sharedProducers, totalProducers, pfSetupPolicy, onlyBios, onlySetProds, loadSystemContract):
-            Utils.Print("ERROR: Bootstrap failed.")
-            return False
+        if cacheEntry is not None:
+            Utils.Print("Bootstrap cluster from cache.")
+            if not self.bootstrapFromCache(onlySetProds):
+                Utils.Print("ERROR: Bootstrap from cache failed.")
+                return False
+        else:
+            Utils.Print("Bootstrap cluster.")
+            if not self.bootstrap(self.biosNode, self.startedNodesCount, prodCount + sharedProducers, totalProducers, pfSetupPolicy, onlyBios, onlySetProds, loadSystemContract):
+                Utils.Print("ERROR: Bootstrap failed.")
+                return False
+
+            if bootstrapCache is not None:
+                self.storeBootstrapCache(bootstrapCache, bootstrapCacheKey, launcher, bootstrapCacheInputs)
 
         # validate iniX accounts can be retrieved
 
@@ -554,6 +622,107 @@ class Cluster(object):
 
         return True
 
+    @staticmethod
+    def waitForNodesReady(readinessPorts, timeout, minBackoff=0.05, maxBackoff=1):
+        """Wait for each node in readinessPorts (node -> (host, [ports])) to accept connections on all its ports
+        and answer get info, probing directly with an exponential backoff rather than a fixed delay."""
+        def isListening(host, port):
+            try:
+                with socket.create_connection((host, port), timeout=minBackoff):
+                    return True
+            except OSError:
+                return False
+
+        pending = dict(readinessPorts)
+        endTime = time.time() + timeout
+        backoff = minBackoff
+        while len(pending) > 0:
+            for node, (host, ports) in list(pending.items()):
+                ports = [port for port in ports if not isListening(host, port)]
+                pending[node] = (host, ports)
+                if len(ports) == 0 and node.checkPulse():
+                    if Utils.Debug: Utils.Print("%s is ready" % (node.name))
+                    del pending[node]
+            if len(pending) == 0 or time.time() >= endTime:
+                break
+            time.sleep(backoff)
+            backoff = min(backoff * 2, maxBackoff)
+
+        for node, (host, ports) in pending.items():
+            Utils.Print("ERROR: %s not ready, ports not accepting connections: %s" % (node.name, ports))
+        return len(pending) == 0
+
+    def __bootstrapInputPaths(self, pfSetupPolicy, genesisPath):
+        """Files the bootstrapped chain state depends on, beyond the launch arguments."""
+        if pfSetupPolicy == PFSetupPolicy.NONE:
+            biosContractDir=self.libTestingContractsPath / "old_versions" / "v1.6.0-rc3" / "sysio.bios"
+        else:
+            biosContractDir=self.libTestingContractsPath / "old_versions" / "v1.7.0-develop-preactivate_feature" / "sysio.bios"
+        # the bootstrap runs through Node, transactions and the rest of the harness, not only Cluster
+        harnessSources=sorted(Path(__file__).parent.rglob("*.py"))
+        paths=[Utils.SysServerPath, biosContractDir] + harnessSources
+        paths.extend(self.unittestsContractsPath / contract for contract in ["sysio.token", "sysio.system", "sysio.roa"])
+        if genesisPath is not None:
+            paths.append(genesisPath)
+        return paths
+
+    @staticmethod
+    def __snapshotStartCmd(cmd, snapshotPath, isProducer):
+        """Turn a genesis start command into one starting from snapshotPath."""
+        cmd=cmd[:]
+        for flag in ['--genesis-json', '--genesis-timestamp']:
+            if flag in cmd:
+                i=cmd.index(flag)
+                cmd=cmd[:i] + cmd[i+2:]
+        cmd.extend(['--snapshot', str(snapshotPath)])
+        # the snapshot head block is old, producers have to produce without first syncing to a recent block
+        if isProducer and '--enable-stale-production' not in cmd:
+            cmd.append('--enable-stale-production')
+        return cmd
+
+    def storeBootstrapCache(self, bootstrapCache, key, launcher, inputs=None):
+        """Snapshot the freshly bootstrapped chain on the bios node and store it, with the genesis and node keys, under key."""
+        Utils.Print("Create bootstrap snapshot.")
+        ret=self.biosNode.createSnapshot()
+        if ret is None or "payload" not in ret:
+            Utils.Print("WARNING: Failed to create bootstrap snapshot, not caching bootstrap.")
+            return False
+        with open(launcher.network.nodes['bios'].config_dir_name / 'genesis.json', 'r') as f:
+            genesis=json.load(f)
+        nodeKeys={name: [[keyStrings.pubkey, keyStrings.privkey] for keyStrings in node.keys] for name, node in launcher.network.nodes.items()}
+        return bootstrapCache.store(key, ret["payload"]["snapshot_name"], genesis, nodeKeys, ret["payload"]["head_block_num"], inputs)
+
+    def bootstrapFromCache(self, onlySetProds=False):
+        """Recreate the client side state bootstrap() leaves behind (ignition wallet, accounts) for a cluster started from
+        a bootstrap cache snapshot."""
+        producerKeys=Cluster.parseProducerKeys(Utils.getNodeDataDir("bios", "start.cmd"), Utils.nodeExtensionToName("bios"))
+        if producerKeys is None:
+            Utils.Print("ERROR: Failed to parse sysio private keys from bios start file.")
+            return None
+
+        if not self.walletMgr.launch():
+            Utils.Print("ERROR: Failed to launch bootstrap wallet.")
+            return None
+
+        ignWallet=self.walletMgr.create("ignition")
+
+        sysioKeys=producerKeys["sysio"]
+        sysioAccount=Account("sysio")
+        sysioAccount.ownerPrivateKey=sysioKeys["private"]
+        sysioAccount.ownerPublicKey=sysioKeys["public"]
+        sysioAccount.activePrivateKey=sysioKeys["private"]
+        sysioAccount.activePublicKey=sysioKeys["public"]
+
+        if not self.walletMgr.importKey(sysioAccount, ignWallet):
+            Utils.Print("ERROR: Failed to import %s account keys into ignition wallet." % (sysioAccount.name))
+            return None
+
+        if not onlySetProds:
+            self.carlAccount = copy.deepcopy(sysioAccount)
+            self.carlAccount.name = 'carl'
+
+        return True
+
     # Initialize the default nodes (at present just the root node)
     def initializeNodes(self, defproduceraPrvtKey=None, defproducerbPrvtKey=None, onlyBios=False):
         port=Cluster.__BiosPort if onlyBios else self.port
@@ -631,30 +800,55 @@ class Cluster(object):
         """Wait for all nodes to have targetBlockNum finalized."""
         assert(self.nodes)
 
-        def doNodesHaveBlockNum(nodes, targetBlockNum, blockType, printCount):
-            ret=True
-            for node in nodes:
-                try:
-                    if (not node.killed) and (not node.isBlockPresent(targetBlockNum, blockType=blockType)):
-                        ret=False
-                        break
-                except (TypeError) as _:
-                    # This can happen if client connects before server is listening
-                    ret=False
-                    break
+        # like Utils.waitForObj, only the default timeout raises on expiry
+        raiseOnTimeout=timeout is None
+        if timeout is None:
+            timeout=60
+        endTime=time.time()+timeout
+        # each node wakes its waiter as soon as it reports the block, so waiting on the nodes in turn is
+        # bounded by the slowest node rather than by a polling interval
+        for node in self.nodes:
+            if node.killed:
+                continue
+            # a node's watcher only learns its block numbers once waited on, so even once the timeout is used up each
+            # node gets long enough to report a block it already has
+            remaining=max(endTime-time.time(), 1)
+            try:
+                ret=node.waitForBlockNumCondition(lambda blockNum: blockNum >= targetBlockNum, remaining, blockType=blockType)
+            except RuntimeError:
+                ret=False
+            if not ret:
+                if Utils.Debug:
+                    blockNums=[str(n.blockWatcher.headBlockNum) for n in self.nodes]
+                    Utils.Print("Cluster still not in sync, head blocks for nodes: [ %s ]" % (", ".join(blockNums)))
+                if raiseOnTimeout:
+                    raise RuntimeError('waitOnClusterBlockNumSync reached 60 second timeout')
+                return False
 
-            printCount+=1
-            if Utils.Debug and not ret and printCount%5==0:
-                blockNums=[]
-                for i in range(0, len(nodes)):
-                    blockNums.append(nodes[i].getBlockNum())
-                Utils.Print("Cluster still not in sync, head blocks for nodes: [ %s ]" % (", ".join(blockNums)))
-            return ret
+        return True
 
-        printCount=0
-        lam = lambda: doNodesHaveBlockNum(self.nodes, targetBlockNum, blockType, printCount)
-        ret=Utils.waitForBool(lam, timeout)
-        return ret
+    def waitForTransactions(self, transIds, timeout=None, blockType=BlockType.head, nodes=None):
+        """Wait for all transIds to be in a head (or irreversible) block on every running node in nodes (defaults
+        to all cluster nodes).  Returns tuple of (all found on all nodes, dictionary of node id -> found dictionary
+        as returned by Node.waitForTransactions)."""
+        if nodes is None:
+            nodes=self.nodes
+        if timeout is None:
+            timeout=60
+        endTime=time.time()+timeout
+        status=True
+        foundByNode={}
+        for node in nodes:
+            if node.killed:
+                continue
+            remaining=max(endTime-time.time(), 1)
+            nodeStatus, found=node.waitForTransactions(transIds, timeout=remaining, blockType=blockType)
+            foundByNode[node.nodeId]=found
+            if not nodeStatus:
+                status=False
+                break
+
+        return (status, foundByNode)
 
     @staticmethod
     def getClientVersion(fullVersion=False):
@@ -700,27 +894,16 @@ class Cluster(object):
                 Utils.Print("Account keys creation failed.")
                 return False
 
-        if createProducerAccounts:
-            Utils.Print("Importing keys for account %s into wallet %s." % (self.defproduceraAccount.name, wallet.name))
-            if not self.walletMgr.importKey(self.defproduceraAccount, wallet):
-                Utils.Print("ERROR: Failed to import key for account %s" % (self.defproduceraAccount.name))
-                return False
-
-            Utils.Print("Importing keys for account %s into wallet %s." % (self.defproducerbAccount.name, wallet.name))
-            if not self.walletMgr.importKey(self.defproducerbAccount, wallet):
-                Utils.Print("ERROR: Failed to import key for account %s" % (self.defproducerbAccount.name))
-                return False
-
         if accountNames is not None:
             for idx, name in enumerate(accountNames):
                 accounts[idx].name =  name
 
-        for account in accounts:
-            Utils.Print("Importing keys for account %s into wallet %s." % (account.name, wallet.name))
-            if not self.walletMgr.importKey(account, wallet):
-                Utils.Print("ERROR: Failed to import key for account %s" % (account.name))
-                return False
-            self.accounts.append(account)
+        importAccounts=[self.defproduceraAccount, self.defproducerbAccount] if createProducerAccounts else []
+        importAccounts+=accounts if accounts is not None else []
+        if not self.walletMgr.importKeys(importAccounts, wallet):
+            Utils.Print("ERROR: Failed to import keys into wallet %s" % (wallet.name))
+            return False
+        self.accounts+=accounts if accounts is not None else []
 
         return True
 
@@ -758,7 +941,10 @@ class Cluster(object):
 
     # Spread funds across accounts with transactions spread through cluster nodes.
     #  Validate transactions are synchronized on root node
-    def spreadFunds(self, source, accounts, amount=1):
+    def spreadFunds(self, source, accounts, amount=1, parallel=False):
+        """Leave every account with amount more funds and source with amount*len(accounts) less.  By default funds trickle
+        down the accounts one transfer at a time, each waited on from the next node.  When parallel is set, source instead
+        transfers amount to every account directly in multi-action transactions which are waited on together."""
         assert(source)
         assert(isinstance(source, Account))
         assert(accounts)
@@ -766,6 +952,9 @@ class Cluster(object):
         assert(len(accounts) > 0)
         Utils.Print("len(accounts): %d" % (len(accounts)))
 
+        if parallel:
+            return self.spreadFundsParallel(source, accounts, amount)
+
         count=len(accounts)
         transferAmount=(count*amount)+amount
         transferAmountStr=Node.currencyIntToStr(transferAmount, CORE_SYMBOL)
@@ -827,6 +1016,27 @@ class Cluster(object):
 
         return True
 
+    def spreadFundsParallel(self, source, accounts, amount=1):
+        node=next((node for node in self.nodes if not node.killed), None)
+        if node is None:
+            Utils.Print("ERROR: No active nodes found.")
+            return False
+
+        amountStr=Node.currencyIntToStr(amount, CORE_SYMBOL)
+        Utils.Print("Transfer %s units from account %s to %d accounts on sys server port %d" % (
+            amountStr, source.name, len(accounts), node.port))
+        transactions=node.transferFundsBatched(source, accounts, amountStr, exitOnError=False)
+        if transactions is None:
+            return False
+
+        transIds=[Node.getTransId(trans) for trans in transactions]
+        status, _ = self.waitForTransactions(transIds)
+        if not status:
+            Utils.Print("ERROR: Failed to validate transactions %s got rolled into a block on every node." % (", ".join(transIds)))
+            return False
+
+        return True
+
     def validateSpreadFunds(self, initialBalances, transferAmount, source, accounts):
         """Given initial Balances, will validate each account has the expected balance based upon transferAmount.
         This validation is repeated against every node in the cluster."""
@@ -852,16 +1062,17 @@ class Cluster(object):
 
         return True
 
-    def spreadFundsAndValidate(self, transferAmount=1):
+    def spreadFundsAndValidate(self, transferAmount=1, parallel=False):
         """Sprays 'transferAmount' funds across configured accounts and validates action. The spray is done in a trickle down fashion with account 1
-        receiving transferAmount*n SYS and forwarding x-transferAmount funds. Transfer actions are spread round-robin across the cluster to vaidate system cohesiveness."""
+        receiving transferAmount*n SYS and forwarding x-transferAmount funds. Transfer actions are spread round-robin across the cluster to vaidate system cohesiveness.
+        parallel: fund every account directly from the source in batched transactions instead, see spreadFunds."""
 
         if Utils.Debug: Utils.Print("Get initial system balances.")
         initialBalances=self.nodes[0].getSysBalances([self.defproduceraAccount] + self.accounts)
         assert(initialBalances)
         assert(isinstance(initialBalances, dict))
 
-        if False == self.spreadFunds(self.defproduceraAccount, self.accounts, transferAmount):
+        if False == self.spreadFunds(self.defproduceraAccount, self.accounts, transferAmount, parallel=parallel):
             Utils.Print("ERROR: Failed to spread funds across nodes.")
             return False
 
@@ -1067,17 +1278,14 @@ class Cluster(object):
             initx.ownerPublicKey=keys["public"]
             initx.activePrivateKey=keys["private"]
             initx.activePublicKey=keys["public"]
-            trans=biosNode.createAccount(initx, sysioAccount, 0)
-            if trans is None:
-                Utils.Print("ERROR: Failed to create account %s" % (name))
-                return None
-            Node.validateTransaction(trans)
             accounts.append(initx)
 
-        transId=Node.getTransId(trans)
-        if not biosNode.waitForTransactionInBlock(transId):
-            Utils.Print("ERROR: Failed to validate transaction %s got rolled into a block on server port %d." % (transId, biosNode.port))
+        transactions=biosNode.createAccountsBatched(accounts, sysioAccount)
+        if transactions is None:
+            Utils.Print("ERROR: Failed to create accounts %s" % (", ".join(producerKeys.keys())))
             return None
+        for trans in transactions:
+            Node.validateTransaction(trans)
 
         Utils.Print("Validating system accounts within bootstrap")
         biosNode.validateAccounts(accounts)
@@ -1133,26 +1341,20 @@ class Cluster(object):
 
         if onlySetProds: return biosNode
 
-        def createSystemAccount(accountName):
+        def systemAccount(accountName):
             newAccount = copy.deepcopy(sysioAccount)
             newAccount.name = accountName
-            trans=biosNode.createAccount(newAccount, sysioAccount, 0)
-            if trans is None:
-                Utils.Print(f'ERROR: Failed to create account {newAccount.name}')
-                return None
-            return trans
+            return newAccount
 
         systemAccounts = ['sysio.bpay', 'sysio.msig', 'sysio.names', 'sysio.ram', 'sysio.ramfee', 'sysio.saving', 'sysio.stake', 'sysio.token', 'sysio.vpay', 'sysio.wrap', 'sysio.roa', 'carl']
-        acctTrans = list(map(createSystemAccount, systemAccounts))
+        acctTrans = biosNode.createAccountsBatched(list(map(systemAccount, systemAccounts)), sysioAccount)
+        if acctTrans is None:
+            Utils.Print('ERROR: Failed to validate creation of system accounts')
+            return None
 
         for trans in acctTrans:
             Node.validateTransaction(trans)
 
-        transIds = list(map(Node.getTransId, acctTrans))
-        if not biosNode.waitForTransactionsInBlock(transIds):
-            Utils.Print('ERROR: Failed to validate creation of system accounts')
-            return None
-
         sysioTokenAccount = copy.deepcopy(sysioAccount)
         sysioTokenAccount.name = 'sysio.token'
         contract="sysio.token"
@@ -1382,6 +1584,9 @@ class Cluster(object):
         else:
             Utils.Print('Cluster left running.')
 
+        for node in self.nodes + ([self.biosNode] if self.biosNode is not None else []):
+            node.blockWatcher.stop()
+
         # Make sure to cleanup all trx generators that may have been started and still generating trxs
         if self.trxGenLauncher is not None:
             self.trxGenLauncher.killAll()
@@ -1441,24 +1646,21 @@ class Cluster(object):
     def createAccounts(self, creator, waitForTransBlock=True, stakedDeposit=1000, validationNodeIndex=-1):
         if self.accounts is None:
             return True
-        transId=None
-        for account in self.accounts:
-            ret = self.biosNode.getSysioAccount(account.name)
-            if ret is None:
-                if Utils.Debug: Utils.Print("Create account %s." % (account.name))
-                if Utils.Debug: Utils.Print("Validation node %s" % validationNodeIndex)
-                trans=self.createAccountAndVerify(account, creator, stakedDeposit, nodeOwner=self.carlAccount, validationNodeIndex=validationNodeIndex)
-                if trans is None:
-                    Utils.Print("ERROR: Failed to create account %s." % (account.name))
-                    return False
-                if Utils.Debug: Utils.Print("Account %s created." % (account.name))
-                transId=Node.getTransId(trans)
-
-        if waitForTransBlock and transId is not None:
-            node=self.nodes[validationNodeIndex]
-            if Utils.Debug: Utils.Print("Wait for transaction id %s on server port %d." % ( transId, node.port))
-            if node.waitForTransactionInBlock(transId) is False:
-                Utils.Print("ERROR: Failed to validate transaction %s got rolled into a block on server port %d." % (transId, node.port))
+        accounts=[account for account in self.accounts if self.biosNode.getSysioAccount(account.name) is None]
+        if len(accounts) == 0:
+            return True
+
+        node=self.nodes[validationNodeIndex]
+        if Utils.Debug: Utils.Print("Create accounts %s on validation node %s." % (", ".join(account.name for account in accounts), validationNodeIndex))
+        # accounts are verified below, so always wait for the creation transactions
+        transactions=node.createAccountsBatched(accounts, creator, stakedDeposit, nodeOwner=self.carlAccount, waitForTransBlock=True)
+        if transactions is None:
+            Utils.Print("ERROR: Failed to create accounts on server port %d." % (node.port))
+            return False
+
+        for account in accounts:
+            if not node.verifyAccount(account):
+                Utils.Print("ERROR: Failed to verify account %s on server port %d." % (account.name, node.port))
                 return False
 
         return True
@@ -1,5 +1,7 @@
+import concurrent.futures
 import copy
 import decimal
+import itertools
 import subprocess
 import time
 import os
@@ -8,6 +10,7 @@ import json
 import shlex
 import signal
 import sys
+from collections import deque, namedtuple
 from pathlib import Path
 from typing import List
 
@@ -15,6 +18,7 @@ from datetime import datetime
 from datetime import timedelta
 from .core_symbol import CORE_SYMBOL
 from .queries import NodeopQueries, BlockType
+from .block_watcher import BlockWatcher
 from .transactions import Transactions
 from .accounts import Account
 from .testUtils import Utils
@@ -23,6 +27,8 @@ from .testUtils import ReturnType
 
 # pylint: disable=too-many-public-methods
 class Node(Transactions):
+    TransactionFound = namedtuple("TransactionFound", ["blockNum", "latency"])
+
     # Node number is used as an addend to determine the node listen ports.
     # This value extends that pattern to all nodes, not just the numbered nodes.
     biosNodeId = -100
@@ -66,20 +72,24 @@ class Node(Transactions):
         self.config_dir=config_dir
         self.launch_time=launch_time
         self.isProducer=False
+        self.blockWatcher=BlockWatcher(self.endpointHttp)
         self.configureVersion()
 
     def configureVersion(self):
         if 'v2' in self.nodeopVers:
             self.fetchTransactionCommand = lambda: "get transaction"
+            self.fetchTransactionRequest = lambda transId: ("history", "get_transaction", {"id":transId})
             self.fetchTransactionFromTrace = lambda trx: trx['trx']['id']
             self.fetchBlock = lambda blockNum: self.processUrllibRequest("chain", "get_block", {"block_num_or_id":blockNum}, silentErrors=False, exitOnError=True)
             self.fetchKeyCommand = lambda: "[trx][trx][ref_block_num]"
             self.fetchRefBlock = lambda trans: trans["trx"]["trx"]["ref_block_num"]
             self.fetchHeadBlock = lambda node, headBlock: node.processUrllibRequest("chain", "get_block", {"block_num_or_id":headBlock}, silentErrors=False, exitOnError=True)
             self.clioLimit = ""
+            self.tableTimeLimitMs = None
 
         else:
             self.fetchTransactionCommand = lambda: "get transaction_trace"
+            self.fetchTransactionRequest = lambda transId: ("trace_api", "get_transaction_trace", {"id":transId})
             self.fetchTransactionFromTrace = lambda trx: trx['id']
             self.fetchBlock = lambda blockNum: self.processUrllibRequest("trace_api", "get_block", {"block_num":blockNum}, silentErrors=False, exitOnError=True)
             self.fetchKeyCommand = lambda: "[transaction][transaction_header][ref_block_num]"
@@ -87,8 +97,10 @@ class Node(Transactions):
             self.fetchHeadBlock = lambda node, headBlock: node.processUrllibRequest("chain", "get_block_info", {"block_num":headBlock}, silentErrors=False, exitOnError=True)
             if 'v3.1' in self.nodeopVers:
                 self.clioLimit = ""
+                self.tableTimeLimitMs = None
             else:
                 self.clioLimit = "--time-limit 999"
+                self.tableTimeLimitMs = 999
 
     def __str__(self):
         return "Host: %s, Port:%d, NodeNum:%s, Pid:%s" % (self.host, self.port, self.nodeId, self.pid)
@@ -153,6 +165,22 @@ class Node(Transactions):
         ret=Utils.waitForBool(lam, timeout)
         return ret
 
+    def fetchBlocks(self, blockNums, maxInFlight=None):
+        """Generator yielding (blockNum, fetchBlock(blockNum)) for each of blockNums, in order.  Blocks are fetched ahead of
+        the consumer by up to maxInFlight (defaults to maxConcurrentQueries) worker threads, each issuing its requests on its
+        own kept-alive connection."""
+        if maxInFlight is None:
+            maxInFlight=self.maxConcurrentQueries
+        blockNums=iter(blockNums)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=maxInFlight) as executor:
+            window=deque((blockNum, executor.submit(self.fetchBlock, blockNum)) for blockNum in itertools.islice(blockNums, maxInFlight))
+            while window:
+                blockNum, future=window.popleft()
+                block=future.result()
+                for nextBlockNum in itertools.islice(blockNums, 1):
+                    window.append((nextBlockNum, executor.submit(self.fetchBlock, nextBlockNum)))
+                yield blockNum, block
+
     def checkBlockForTransactions(self, transIds, blockNum):
         block = self.fetchBlock(blockNum)
         if block['payload']['transactions']:
@@ -179,11 +207,77 @@ class Node(Transactions):
         return transIds
 
     def waitForTransactionsInBlock(self, transIds, timeout=None):
-        status = True
-        for transId in transIds:
-            status &= self.waitForTransactionInBlock(transId, timeout)
+        status, _ = self.waitForTransactions(transIds, timeout=timeout)
         return status
 
+    def getTransactionsLowerBoundBlockNum(self, transIds):
+        """Returns the lowest block number any of transIds can be in, without scanning blocks."""
+        # anything not yet in a block can only land after the current head
+        lowerBound=self.getHeadBlockNum()
+        for transId in transIds:
+            trans=self.transCache.get(transId)
+            blockNum=None
+            if trans is not None:
+                try:
+                    blockNum=NodeopQueries.getTransBlockNum(trans)
+                except AssertionError as _:
+                    pass
+            if not isinstance(blockNum, int):
+                trans=self.getTransaction(transId, silentErrors=True, delayedRetry=False)
+                if trans is not None:
+                    try:
+                        blockNum=int(self.fetchRefBlock(trans))
+                    except (TypeError, ValueError, KeyError) as _:
+                        pass
+            if isinstance(blockNum, int):
+                lowerBound=min(lowerBound, blockNum)
+        return lowerBound
+
+    def waitForTransactions(self, transIds, timeout=None, blockType=BlockType.head, startBlockNum=None):
+        """Wait for all transIds to be in a head (or irreversible) block using one forward pass over new blocks.
+        Returns tuple of (all found, dictionary of found trans id -> TransactionFound(blockNum, latency)), where
+        latency is the seconds from the call until the transaction's block was seen."""
+        assert isinstance(blockType, BlockType)
+        if timeout is None:
+            timeout=60
+        start=time.perf_counter()
+        endTime=time.time()+timeout
+        pending=set(transIds)
+        found={}
+
+        def infoBlockNum(info):
+            return int(info["head_block_num"] if blockType==BlockType.head else info["last_irreversible_block_num"])
+
+        def collect(currentBlockNum):
+            for transId in list(pending):
+                blockNum=self.transBlockIndex.get(transId)
+                if blockNum is not None and blockNum <= currentBlockNum:
+                    pending.remove(transId)
+                    found[transId]=Node.TransactionFound(blockNum, time.perf_counter()-start)
+
+        currentBlockNum=infoBlockNum(self.getInfo(exitOnError=True))
+        collect(currentBlockNum)
+        nextBlockNum=startBlockNum if startBlockNum is not None or len(pending) == 0 else self.getTransactionsLowerBoundBlockNum(pending)
+        while len(pending) > 0:
+            for blockNum in range(nextBlockNum, currentBlockNum + 1):
+                self.indexBlock(blockNum)
+            nextBlockNum=max(nextBlockNum, currentBlockNum + 1)
+            collect(currentBlockNum)
+            if len(pending) == 0:
+                break
+            remaining=endTime-time.time()
+            if remaining <= 0 or not self.waitForBlockNumCondition(lambda blockNum: blockNum >= nextBlockNum, remaining, blockType=blockType):
+                break
+            currentBlockNum=infoBlockNum(self.getInfo(exitOnError=True))
+
+        if Utils.Debug:
+            for transId, transFound in found.items():
+                Utils.Print("Found transaction %s in block %d after %.3f sec" % (transId, transFound.blockNum, transFound.latency))
+        if len(pending) > 0:
+            Utils.Print("ERROR: %d of %d transactions not found in a %s block within %.1f sec: %s" %
+                        (len(pending), len(pending) + len(found), blockType.type, timeout, ", ".join(pending)))
+        return (len(pending) == 0, found)
+
     def waitForTransFinalization(self, transId, timeout=None):
         """Wait for trans id to be finalized."""
         assert(isinstance(transId, str))
@@ -191,14 +285,28 @@ class Node(Transactions):
         ret=Utils.waitForBool(lam, timeout)
         return ret
 
+    def waitForBlockNumCondition(self, condition, timeout=None, blockType=BlockType.head, sleepTime=1, reporter=None):
+        """Wait until condition(blockNum) is true for the node's head or LIB block number.  Wakes as soon as the
+        node reports the block through its BlockWatcher, or polls every sleepTime seconds when using clio."""
+        assert isinstance(blockType, BlockType)
+        if self.useClioForQueries:
+            lam = lambda: condition(self.getBlockNum(blockType=blockType))
+            return Utils.waitForBool(lam, timeout, sleepTime=sleepTime, reporter=reporter)
+
+        if blockType==BlockType.head:
+            lam = lambda head, lib: condition(head)
+        elif blockType==BlockType.lib:
+            lam = lambda head, lib: condition(lib)
+        else:
+            unhandledEnumType(blockType)
+        return self.blockWatcher.waitFor(lam, timeout, reporter=reporter, reportInterval=sleepTime)
+
     def waitForNextBlock(self, timeout=None, blockType=BlockType.head):
         num=self.getBlockNum(blockType=blockType)
-        lam = lambda: self.getBlockNum(blockType=blockType) > num
-        ret=Utils.waitForBool(lam, timeout)
+        ret=self.waitForBlockNumCondition(lambda blockNum: blockNum > num, timeout, blockType=blockType)
         return ret
 
     def waitForBlock(self, blockNum, timeout=None, blockType=BlockType.head, reportInterval=None):
-        lam = lambda: self.getBlockNum(blockType=blockType) > blockNum
         blockDesc = "head" if blockType == BlockType.head else "LIB"
         count = 0
 
@@ -215,7 +323,7 @@ class Node(Transactions):
                     Utils.Print("Waiting on %s block num %d, get info = {\n%s\n}" % (blockDesc, blockNum, info))
 
         reporter = WaitReporter(self, reportInterval) if reportInterval is not None else None
-        ret=Utils.waitForBool(lam, timeout, reporter=reporter)
+        ret=self.waitForBlockNumCondition(lambda num: num > blockNum, timeout, blockType=blockType, reporter=reporter)
         return ret
 
     def waitForIrreversibleBlock(self, blockNum, timeout=None, reportInterval=None):
@@ -236,15 +344,15 @@ class Node(Transactions):
         currentHead = self.getHeadBlockNum()
         if timeout is None:
             timeout = 6 + blocksToAdvance / 2
-        def isHeadAdvancing():
-            return self.getHeadBlockNum() >= currentHead + blocksToAdvance
-        return Utils.waitForBool(isHeadAdvancing, timeout, sleepTime=0.5)
+        def isHeadAdvancing(headBlockNum):
+            return headBlockNum >= currentHead + blocksToAdvance
+        return self.waitForBlockNumCondition(isHeadAdvancing, timeout, blockType=BlockType.head, sleepTime=0.5)
 
     def waitForLibToAdvance(self, timeout=30):
         currentLib = self.getIrreversibleBlockNum()
-        def isLibAdvancing():
-            return self.getIrreversibleBlockNum() > currentLib
-        return Utils.waitForBool(isLibAdvancing, timeout)
+        def isLibAdvancing(libBlockNum):
+            return libBlockNum > currentLib
+        return self.waitForBlockNumCondition(isLibAdvancing, timeout, blockType=BlockType.lib)
 
     def waitForProducer(self, producer, timeout=None, exitOnError=False):
         if timeout is None:
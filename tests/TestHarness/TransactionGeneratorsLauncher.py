@@ -3,7 +3,10 @@ import os
 import sys
 import math
 import argparse
+import re
 import subprocess
+import threading
+import time
 
 harnessPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(harnessPath)
@@ -14,6 +17,9 @@ from re import sub
 
 Print = Utils.Print
 
+# logged by each trx_generator every --progress-interval-ms, see trx_tps_tester in trx_provider.hpp
+PROGRESS_PATTERN = re.compile(r'progress - sent (\d+) \| expected (\d+) \| total (\d+)')
+
 class TpsTrxGensConfig:
 
     def __init__(self, targetTps: int, tpsLimitPerGenerator: int, connectionPairList: list):
@@ -38,7 +44,12 @@ class TpsTrxGensConfig:
 class TransactionGeneratorsLauncher:
 
     def __init__(self, trxGenerator: Path, chainId: int, lastIrreversibleBlockId: int, contractOwnerAccount: str, accts: str, privateKeys: str, trxGenDurationSec: int, logDir: str,
-                 abiFile: Path, actionsData, actionsAuths, tpsTrxGensConfig: TpsTrxGensConfig, endpointMode: str, apiEndpoint: str=None):
+                 abiFile: Path, actionsData, actionsAuths, tpsTrxGensConfig: TpsTrxGensConfig, endpointMode: str, apiEndpoint: str=None,
+                 cpus: list=None, rampUpSec: float=0, progressIntervalSec: float=0):
+        """cpus -- when given, the cpus the generators are pinned to, split into a disjoint set per generator (see generatorCpuSets)
+        rampUpSec -- the generators' starts are spread evenly over this many seconds instead of all starting at once
+        progressIntervalSec -- when non-zero, the generators' output is captured to trx_gen_output_<id>.txt in logDir and the
+                               progress they log is aggregated and printed at this interval"""
         self.trxGenerator = trxGenerator
         self.chainId = chainId
         self.lastIrreversibleBlockId = lastIrreversibleBlockId
@@ -53,11 +64,43 @@ class TransactionGeneratorsLauncher:
         self.actionsAuths = actionsAuths
         self.endpointMode = endpointMode
         self.apiEndpoint = apiEndpoint
+        self.cpus = cpus
+        self.rampUpSec = rampUpSec
+        self.progressIntervalSec = progressIntervalSec
+        self.subprocess_ret_codes = []
+        # generator id -> (sent, expected, total) from its latest progress line
+        self.progress = {}
+        self.progressLock = threading.Lock()
+        self.outputReaders = []
+        self.progressMonitor = None
+        self.progressMonitorStop = threading.Event()
+
+    def generatorCpuSets(self) -> list:
+        """Split cpus into a disjoint set of adjacent cpus per generator, as equal in size as possible.  With fewer cpus than
+        generators each generator gets a single cpu, handed out round robin."""
+        cpus = sorted(self.cpus)
+        numGenerators = self.tpsTrxGensConfig.numGenerators
+        if len(cpus) < numGenerators:
+            return [{cpus[id % len(cpus)]} for id in range(numGenerators)]
+        setSize, extra = divmod(len(cpus), numGenerators)
+        cpuSets = []
+        start = 0
+        for id in range(numGenerators):
+            end = start + setSize + (1 if id < extra else 0)
+            cpuSets.append(set(cpus[start:end]))
+            start = end
+        return cpuSets
 
     def launch(self, waitToComplete=True):
         self.subprocess_ret_codes = []
+        self.progress = {}
+        self.outputReaders = []
+        self.progressMonitorStop.clear()
+        cpuSets = self.generatorCpuSets() if self.cpus else None
         connectionPairIter = 0
         for id, targetTps in enumerate(self.tpsTrxGensConfig.targetTpsPerGenList):
+            if id > 0 and self.rampUpSec > 0:
+                time.sleep(self.rampUpSec / self.tpsTrxGensConfig.numGenerators)
             connectionPair = self.tpsTrxGensConfig.connectionPairList[connectionPairIter].rsplit(":")
             popenStringList = [
                                 # './tests/trx_generator/trx_generator',
@@ -80,21 +123,95 @@ class TransactionGeneratorsLauncher:
                                         '--actions-auths', f'{self.actionsAuths}'])
             if self.apiEndpoint is not None:
                 popenStringList.extend(['--api-endpoint', f'{self.apiEndpoint}'])
+            if self.progressIntervalSec > 0:
+                popenStringList.extend(['--progress-interval-ms', f'{max(int(self.progressIntervalSec * 1000), 1)}'])
 
             if Utils.Debug:
                 Print(f"Running transaction generator {self.trxGenerator} : {' '.join(popenStringList)}")
-            self.subprocess_ret_codes.append(subprocess.Popen(popenStringList))
+            if self.progressIntervalSec > 0:
+                popen = subprocess.Popen(popenStringList, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                reader = threading.Thread(target=self.readOutput, args=(id, popen), name=f"TrxGenOutput-{id}", daemon=True)
+                reader.start()
+                self.outputReaders.append(reader)
+            else:
+                popen = subprocess.Popen(popenStringList)
+            if cpuSets is not None:
+                Utils.setProcessAffinity(popen.pid, cpuSets[id])
+            self.subprocess_ret_codes.append(popen)
             connectionPairIter = (connectionPairIter + 1) % len(self.tpsTrxGensConfig.connectionPairList)
+        if self.progressIntervalSec > 0:
+            self.progressMonitor = threading.Thread(target=self.monitorProgress, name="TrxGenProgress", daemon=True)
+            self.progressMonitor.start()
         exitCodes=None
         if waitToComplete:
             exitCodes = [ret_code.wait() for ret_code in self.subprocess_ret_codes]
+            self.stopProgressMonitor()
         return exitCodes
 
+    def readOutput(self, id: int, popen: subprocess.Popen):
+        """Copy a generator's output to its file in logDir, recording the progress it logs."""
+        with open(Path(self.logDir)/f"trx_gen_output_{id}.txt", 'wt') as outputFile:
+            for line in popen.stdout:
+                outputFile.write(line)
+                progress = PROGRESS_PATTERN.search(line)
+                if progress is not None:
+                    with self.progressLock:
+                        self.progress[id] = tuple(int(value) for value in progress.groups())
+
+    def progressSummary(self) -> dict:
+        """Aggregated progress of the generators, with the ids of those more than 1% behind their schedule."""
+        with self.progressLock:
+            progress = dict(self.progress)
+        sent = sum(genSent for genSent, _, _ in progress.values())
+        expected = sum(genExpected for _, genExpected, _ in progress.values())
+        # generators yet to log their progress still count towards the total
+        total = sum(self.tpsTrxGensConfig.targetTpsPerGenList) * int(self.trxGenDurationSec)
+        lagging = [id for id, (genSent, genExpected, _) in sorted(progress.items()) if genExpected - genSent > genExpected / 100]
+        running = sum(1 for ret_code in self.subprocess_ret_codes if ret_code.poll() is None)
+        return {"running": running, "sent": sent, "expected": expected, "total": total, "lagging": lagging}
+
+    def monitorProgress(self):
+        lastSent = 0
+        lastTime = time.monotonic()
+        while not self.progressMonitorStop.wait(self.progressIntervalSec):
+            summary = self.progressSummary()
+            now = time.monotonic()
+            tps = (summary["sent"] - lastSent) / (now - lastTime)
+            lastSent, lastTime = summary["sent"], now
+            lagging = f", lagging generators: {summary['lagging']}" if summary["lagging"] else ""
+            Print(f"Transaction generators: {summary['running']} of {len(self.subprocess_ret_codes)} running, sent {summary['sent']} of {summary['total']} trxs "
+                  f"at {tps:.0f} TPS, {summary['expected'] - summary['sent']} behind schedule{lagging}")
+
+    def stopProgressMonitor(self):
+        """Wait for the generators' output to be read and stop printing their progress."""
+        for reader in self.outputReaders:
+            reader.join()
+        self.outputReaders = []
+        if self.progressMonitor is not None:
+            self.progressMonitorStop.set()
+            self.progressMonitor.join()
+            self.progressMonitor = None
+            summary = self.progressSummary()
+            Print(f"Transaction generators finished, sent {summary['sent']} of {summary['total']} trxs")
+
+    def waitForCompletion(self, abortEvent=None, pollIntervalSec: float=0.5):
+        """Wait for the launched generators to exit and return their exit codes.  If abortEvent (a threading.Event)
+        is set first, the generators are killed and None is returned."""
+        while any(ret_code.poll() is None for ret_code in self.subprocess_ret_codes):
+            if abortEvent is None:
+                time.sleep(pollIntervalSec)
+            elif abortEvent.wait(pollIntervalSec):
+                self.killAll()
+                return None
+        self.stopProgressMonitor()
+        return [ret_code.returncode for ret_code in self.subprocess_ret_codes]
+
     def killAll(self):
         for ret_code in self.subprocess_ret_codes:
             ret_code.kill()
         for ret_code in self.subprocess_ret_codes:
             ret_code.wait()
+        self.stopProgressMonitor()
 
 def parseArgs():
     parser = argparse.ArgumentParser(add_help=False)
@@ -9,6 +9,7 @@ import re
 import sys
 
 from .testUtils import Utils
+from .http_transport import HttpTransport
 
 Wallet=namedtuple("Wallet", "name password host port")
 # pylint: disable=too-many-instance-attributes
@@ -166,12 +167,76 @@ class WalletMgr(object):
 
         return wallet
 
+    def getWalletEndpoint(self):
+        return "http://%s:%d" % (self.host, self.port)
+
+    def processWalletRequest(self, command, payload):
+        """Issue a kiod wallet api request over the kept-alive connection.  Returns HttpResponse."""
+        path="/v1/wallet/%s" % (command)
+        if Utils.Debug: Utils.Print("http: %s%s" % (self.getWalletEndpoint(), path))
+        return HttpTransport.get(self.getWalletEndpoint()).request(path, payload)
+
+    def getWalletPrivateKeys(self, wallet):
+        """Returns the set of private keys held by wallet, or None if they could not be listed."""
+        try:
+            response=self.processWalletRequest("list_keys", [wallet.name, wallet.password])
+        except OSError as ex:
+            Utils.Print("ERROR: Failed to list keys of wallet %s. %s" % (wallet.name, ex))
+            return None
+        if not response.ok():
+            if Utils.Debug: Utils.Print("Failed to list keys of wallet %s. %s" % (wallet.name, response.body))
+            return None
+        return set(privateKey for _, privateKey in response.json())
+
     def importKeys(self, accounts, wallet, ignoreDupKeyWarning=False):
+        """Import owner and active keys of all accounts into wallet through kiod's wallet api, one import_key request
+        per key (kiod has no bulk import) over a single kept-alive connection.  Keys already in the wallet, or repeated
+        across accounts, are skipped."""
+        if not self.isLaunched():
+            for account in accounts:
+                Utils.Print("Importing keys for account %s into wallet %s." % (account.name, wallet.name))
+                if not self.importKey(account, wallet, ignoreDupKeyWarning):
+                    Utils.Print("ERROR: Failed to import key for account %s" % (account.name))
+                    return False
+            return True
+
+        warningMsg="Key already in wallet"
+        keys={}
         for account in accounts:
-            Utils.Print("Importing keys for account %s into wallet %s." % (account.name, wallet.name))
-            if not self.importKey(account, wallet, ignoreDupKeyWarning):
-                Utils.Print("ERROR: Failed to import key for account %s" % (account.name))
+            keys[account.ownerPrivateKey]=account
+            if account.activePrivateKey is None:
+                Utils.Print("WARNING: Active private key is not defined for account \"%s\"" % (account.name))
+            else:
+                keys[account.activePrivateKey]=account
+
+        existingKeys=self.getWalletPrivateKeys(wallet)
+        if existingKeys is not None:
+            duplicates=[key for key in keys if key in existingKeys]
+            if len(duplicates) > 0 and not ignoreDupKeyWarning:
+                Utils.Print("WARNING: %d keys are already imported into the wallet." % (len(duplicates)))
+            for key in duplicates:
+                del keys[key]
+
+        Utils.Print("Importing %d keys for %d accounts into wallet %s." % (len(keys), len(accounts), wallet.name))
+        start=time.perf_counter()
+        for privateKey, account in keys.items():
+            try:
+                response=self.processWalletRequest("import_key", [wallet.name, privateKey])
+            except OSError as ex:
+                Utils.Print("ERROR: Failed to import key for account %s. %s" % (account.name, ex))
                 return False
+            if response.ok():
+                continue
+            msg=response.body.decode("utf-8")
+            if warningMsg in msg:
+                if not ignoreDupKeyWarning:
+                    Utils.Print("WARNING: This key is already imported into the wallet.")
+            else:
+                Utils.Print("ERROR: Failed to import key %s for account %s. %s" % (privateKey, account.name, msg))
+                return False
+        if Utils.Debug: Utils.Print("Imported %d keys in %.3f sec" % (len(keys), time.perf_counter()-start))
+
+        return True
 
     def importKey(self, account, wallet, ignoreDupKeyWarning=False):
         warningMsg="Key already in wallet"
@@ -1,9 +1,8 @@
 import random
-import re
 import string
-import subprocess
 from typing import List
 
+from .keys import generateKeyPairs
 from .testUtils import Utils
 
 # Class for generating distinct names for many accounts
@@ -57,49 +56,22 @@ class Account(object):
     def __repr__(self):
         return "Name: %s" % (self.name)
 
-def createAccountKeys(count: int) -> List[Account]:
+def createAccountKeys(count: int, processes=None) -> List[Account]:
+    """Creates count accounts with random names and new owner and active key pairs.  Keys are generated
+    in-process (see keys.generateKeyPairs, processes controls the pool used for large counts)."""
     accounts=[]
-    p = re.compile('Private key: (.+)\nPublic key: (.+)\n', re.MULTILINE)
-    for _ in range(0, count):
-        try:
-            cmd="%s create key --to-console" % (Utils.SysClientPath)
-            if Utils.Debug: Utils.Print("cmd: %s" % (cmd))
-            keyStr=Utils.checkOutput(cmd.split())
-            m=p.search(keyStr)
-            if m is None:
-                Utils.Print("ERROR: Owner key creation regex mismatch")
-                break
-
-            ownerPrivate=m.group(1)
-            ownerPublic=m.group(2)
-
-            cmd="%s create key --to-console" % (Utils.SysClientPath)
-            if Utils.Debug: Utils.Print("cmd: %s" % (cmd))
-            keyStr=Utils.checkOutput(cmd.split())
-            m=p.match(keyStr)
-            if m is None:
-                Utils.Print("ERROR: Active key creation regex mismatch")
-                break
-
-            activePrivate=m.group(1)
-            activePublic=m.group(2)
-
-            name=''.join(random.choice(string.ascii_lowercase) for _ in range(12))
-            account=Account(name)
-            account.ownerPrivateKey=ownerPrivate
-            account.ownerPublicKey=ownerPublic
-            account.activePrivateKey=activePrivate
-            account.activePublicKey=activePublic
-            accounts.append(account)
-            if Utils.Debug: Utils.Print("name: %s, key(owner): ['%s', '%s], key(active): ['%s', '%s']" % (name, ownerPublic, ownerPrivate, activePublic, activePrivate))
-
-        except subprocess.CalledProcessError as ex:
-            msg=ex.stderr.decode("utf-8")
-            Utils.Print("ERROR: Exception during key creation. %s" % (msg))
-            break
-
-    if count != len(accounts):
-        Utils.Print("Account keys creation failed. Expected %d, actual: %d" % (count, len(accounts)))
-        return None
+    keyPairs=generateKeyPairs(2 * count, processes=processes)
+    for i in range(0, count):
+        ownerPrivate, ownerPublic=keyPairs[2 * i]
+        activePrivate, activePublic=keyPairs[2 * i + 1]
+
+        name=''.join(random.choice(string.ascii_lowercase) for _ in range(12))
+        account=Account(name)
+        account.ownerPrivateKey=ownerPrivate
+        account.ownerPublicKey=ownerPublic
+        account.activePrivateKey=activePrivate
+        account.activePublicKey=activePublic
+        accounts.append(account)
+        if Utils.Debug: Utils.Print("name: %s, key(owner): ['%s', '%s], key(active): ['%s', '%s']" % (name, ownerPublic, ownerPrivate, activePublic, activePrivate))
 
     return accounts
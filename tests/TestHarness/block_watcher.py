@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import http.client
+import json
+import threading
+import time
+
+from sys import stdout
+
+from .http_transport import HttpTransport
+from .testUtils import Utils
+
+class BlockWatcher:
+    """Tracks a node's head and LIB block numbers on a background thread.
+
+    While at least one caller is waiting, the watcher polls chain/get_info on its own kept-alive connection
+    every pollInterval seconds and wakes waiters through a condition variable as soon as the block numbers
+    change, so a wait returns within pollInterval of its target block arriving instead of up to a full sleep
+    period later.  With no waiters the thread parks and issues no requests, until stop() ends it."""
+
+    def __init__(self, endpoint, pollInterval=0.05, unreachableInterval=0.25):
+        self.endpoint=endpoint
+        self.pollInterval=pollInterval
+        self.unreachableInterval=unreachableInterval
+        self.cond=threading.Condition()
+        self.info=None
+        self.headBlockNum=None
+        self.libBlockNum=None
+        self.waiters=0
+        # bumped whenever the watcher resumes from idle so results gathered before that are discarded
+        self.generation=0
+        self.stopping=False
+        self.thread=None
+
+    def __start(self):
+        if self.thread is None:
+            self.thread=threading.Thread(target=self.__watch, name=f"BlockWatcher {self.endpoint}", daemon=True)
+            self.thread.start()
+
+    def __watch(self):
+        # the watcher thread gets its own connection so it never contends with queries issued by the test
+        transport=HttpTransport(self.endpoint)
+        while True:
+            with self.cond:
+                while self.waiters == 0 and not self.stopping:
+                    self.cond.wait()
+                if self.stopping:
+                    transport.close()
+                    return
+                generation=self.generation
+
+            info=None
+            try:
+                response=transport.request("/v1/chain/get_info")
+                if response.ok():
+                    info=response.json()
+            except (OSError, http.client.HTTPException, json.decoder.JSONDecodeError) as _:
+                pass
+
+            with self.cond:
+                if generation != self.generation:
+                    continue
+                self.info=info
+                if info is not None:
+                    headBlockNum=int(info["head_block_num"])
+                    libBlockNum=int(info["last_irreversible_block_num"])
+                    if headBlockNum != self.headBlockNum or libBlockNum != self.libBlockNum:
+                        self.headBlockNum=headBlockNum
+                        self.libBlockNum=libBlockNum
+                        self.cond.notify_all()
+
+            time.sleep(self.pollInterval if info is not None else self.unreachableInterval)
+
+    def stop(self):
+        """End the watcher thread, e.g. once its node's cluster shut down.  A later wait starts a new one."""
+        with self.cond:
+            thread=self.thread
+            if thread is None:
+                return
+            self.stopping=True
+            self.cond.notify_all()
+        thread.join()
+        with self.cond:
+            self.stopping=False
+            self.thread=None
+
+    def waitFor(self, condition, timeout=None, reporter=None, reportInterval=1):
+        """Block until condition(headBlockNum, libBlockNum) is true or timeout (seconds) expires.  Follows the
+        Utils.waitForBool conventions: returns True/False, default timeout of 60 seconds which raises on expiry (an
+        explicit timeout never raises), and reporter is called every reportInterval seconds while waiting."""
+        raiseOnTimeout=timeout is None
+        if timeout is None:
+            timeout=60
+
+        endTime=time.time()+timeout
+        nextReport=time.time()+reportInterval
+        needsNewLine=False
+        with self.cond:
+            if self.waiters == 0:
+                # block numbers seen before going idle may be stale (e.g. node relaunched on a new chain)
+                self.generation+=1
+                self.info=None
+                self.headBlockNum=None
+                self.libBlockNum=None
+            self.waiters+=1
+            self.__start()
+            self.cond.notify_all()
+            try:
+                while True:
+                    if self.info is not None and condition(self.headBlockNum, self.libBlockNum):
+                        return True
+                    now=time.time()
+                    if now >= endTime:
+                        break
+                    if now >= nextReport:
+                        if Utils.Debug:
+                            Utils.Print("waiting on %s, head: %s, lib: %s, remaining time: %d seconds" %
+                                        (self.endpoint, self.headBlockNum, self.libBlockNum, endTime - now))
+                        else:
+                            stdout.write('.')
+                            stdout.flush()
+                            needsNewLine=True
+                        if reporter is not None:
+                            reporter()
+                        nextReport=now+reportInterval
+                    self.cond.wait(min(endTime, nextReport) - now)
+            finally:
+                self.waiters-=1
+                if needsNewLine:
+                    Utils.Print()
+
+        if raiseOnTimeout:
+            raise RuntimeError('BlockWatcher.waitFor reached 60 second timeout')
+        return False
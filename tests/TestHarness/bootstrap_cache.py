@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from collections import namedtuple
+from pathlib import Path
+
+from .testUtils import Utils
+
+###########################################################################################
+# On-disk cache of bootstrapped chains.
+#
+# After Cluster.bootstrap succeeds the bios node's snapshot, the genesis it was started from and the keys
+# every node signed with are stored under a key derived from a content hash of everything the bootstrapped
+# state depends on (topology, protocol feature policy, genesis, contracts, nodeop binary and the bootstrap
+# code itself).  A later launch with the same inputs starts every node from that snapshot instead of
+# repeating the bootstrap from genesis.
+###########################################################################################
+
+BootstrapCacheEntry = namedtuple("BootstrapCacheEntry", ["key", "snapshotPath", "genesis", "nodeKeys", "headBlockNum"])
+
+class BootstrapCache:
+    # bump when the layout of a cache entry changes
+    Version=1
+    ManifestFile="manifest.json"
+    SnapshotFile="snapshot.bin"
+
+    def __init__(self, cacheDir):
+        self.cacheDir=Path(cacheDir)
+
+    @staticmethod
+    def __hashPath(digest, path):
+        path=Path(path)
+        if path.is_dir():
+            for child in sorted(path.iterdir()):
+                BootstrapCache.__hashPath(digest, child)
+            return
+        digest.update(str(path.name).encode())
+        if not path.exists():
+            digest.update(b"<missing>")
+            return
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+    @staticmethod
+    def key(inputs: dict, paths: list) -> str:
+        """Content hash of the launch inputs (json serializable values) and of the files/directories in paths."""
+        digest=hashlib.sha256()
+        digest.update(json.dumps({"version": BootstrapCache.Version, "inputs": inputs}, sort_keys=True, default=str).encode())
+        for path in paths:
+            BootstrapCache.__hashPath(digest, path)
+        return digest.hexdigest()
+
+    def entryDir(self, key):
+        return self.cacheDir / key
+
+    def lookup(self, key):
+        """Returns the BootstrapCacheEntry stored for key or None."""
+        entryDir=self.entryDir(key)
+        try:
+            with open(entryDir / BootstrapCache.ManifestFile, "r") as f:
+                manifest=json.load(f)
+        except (OSError, json.decoder.JSONDecodeError) as _:
+            return None
+        snapshotPath=entryDir / BootstrapCache.SnapshotFile
+        if not snapshotPath.is_file():
+            return None
+        return BootstrapCacheEntry(key, snapshotPath, manifest["genesis"], manifest["nodeKeys"], manifest["headBlockNum"])
+
+    def store(self, key, snapshotPath, genesis, nodeKeys, headBlockNum, inputs=None):
+        """Add an entry for key.  The entry is assembled in a temporary directory and renamed into place, so
+        concurrent test runs never see a partial entry; if another run stored the key first its entry is kept."""
+        entryDir=self.entryDir(key)
+        if entryDir.exists():
+            return True
+        try:
+            self.cacheDir.mkdir(parents=True, exist_ok=True)
+            tmpDir=Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.cacheDir))
+            try:
+                shutil.copyfile(snapshotPath, tmpDir / BootstrapCache.SnapshotFile)
+                manifest={"genesis": genesis, "nodeKeys": nodeKeys, "headBlockNum": headBlockNum, "inputs": inputs}
+                with open(tmpDir / BootstrapCache.ManifestFile, "w") as f:
+                    json.dump(manifest, f, indent=2, sort_keys=True, default=str)
+                os.rename(tmpDir, entryDir)
+            except OSError:
+                shutil.rmtree(tmpDir, ignore_errors=True)
+                if not entryDir.exists():
+                    raise
+        except OSError as ex:
+            Utils.Print("WARNING: Failed to store bootstrap cache entry %s: %s" % (key, ex))
+            return False
+        Utils.Print("Stored bootstrap cache entry %s" % (entryDir))
+        return True
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import http.client
+import json
+import threading
+import urllib.parse
+
+from .testUtils import Utils
+
+class HttpResponse:
+    def __init__(self, code, body, reason=""):
+        self.code=code
+        self.body=body
+        self.reason=reason
+
+    def ok(self):
+        return 200 <= self.code < 300
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+class HttpTransport:
+    """Keep-alive HTTP client for a single endpoint (e.g. http://localhost:8888).
+
+    Connections are kept open between requests so a test issuing thousands of queries does not pay for a
+    new process (clio) or a new TCP connection per query.  Each thread gets its own connection, so one
+    transport can be shared by every caller that targets the same endpoint."""
+
+    __transports={}
+    __transportsLock=threading.Lock()
+    # every open connection of every transport and thread, so closeAll reaches those of other threads
+    __connections=set()
+    __connectionsLock=threading.Lock()
+
+    def __init__(self, endpoint, timeout=None):
+        parsed=urllib.parse.urlsplit(endpoint)
+        assert parsed.scheme == "http", f"Only http endpoints are supported, received: {endpoint}"
+        self.endpoint=endpoint
+        self.host=parsed.hostname
+        self.port=parsed.port if parsed.port is not None else 80
+        self.timeout=timeout
+        self.local=threading.local()
+
+    @staticmethod
+    def get(endpoint):
+        """Returns the shared transport for endpoint, creating it on first use."""
+        with HttpTransport.__transportsLock:
+            transport=HttpTransport.__transports.get(endpoint)
+            if transport is None:
+                transport=HttpTransport(endpoint)
+                HttpTransport.__transports[endpoint]=transport
+            return transport
+
+    @staticmethod
+    def closeAll():
+        """Close the connections of every transport on every thread, not only those of the calling thread.  A thread
+        issuing another request afterwards opens a new connection."""
+        with HttpTransport.__transportsLock:
+            HttpTransport.__transports.clear()
+        with HttpTransport.__connectionsLock:
+            connections=list(HttpTransport.__connections)
+            HttpTransport.__connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def __connection(self):
+        conn=getattr(self.local, "conn", None)
+        if conn is not None:
+            with HttpTransport.__connectionsLock:
+                if conn not in HttpTransport.__connections:
+                    # closed by closeAll
+                    conn=None
+        if conn is None:
+            conn=http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            with HttpTransport.__connectionsLock:
+                HttpTransport.__connections.add(conn)
+            self.local.conn=conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn=getattr(self.local, "conn", None)
+        if conn is not None:
+            with HttpTransport.__connectionsLock:
+                HttpTransport.__connections.discard(conn)
+            conn.close()
+            self.local.conn=None
+
+    def request(self, path, payload=None, method="POST"):
+        """Issue request on the kept-alive connection and return an HttpResponse.  A connection the server
+        has closed since the last request is reopened once; connection failures beyond that are raised."""
+        headers={"Connection": "keep-alive"}
+        body=None
+        if payload is not None:
+            body=payload if isinstance(payload, (bytes, str)) else json.dumps(payload)
+            if isinstance(body, str):
+                body=body.encode()
+            headers["Content-Type"]="application/json"
+        for attempt in range(2):
+            conn=self.__connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response=conn.getresponse()
+                data=response.read()
+                if response.will_close:
+                    self.close()
+                return HttpResponse(response.status, data, response.reason)
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError) as ex:
+                self.close()
+                if attempt > 0:
+                    raise
+                if Utils.Debug: Utils.Print(f"Connection to {self.endpoint} dropped ({type(ex).__name__}), reconnecting")
+            except Exception:
+                self.close()
+                raise
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import hashlib
+import multiprocessing
+import secrets
+
+from typing import List, Tuple
+
+###########################################################################################
+# In-process generation of K1 (secp256k1) key pairs in the same legacy string formats
+# "clio create key --to-console" prints:
+#   private key: WIF, base58(0x80 + key + sha256(sha256(0x80 + key))[:4])
+#   public key:  "SYS" + base58(compressed key + ripemd160(compressed key)[:4])
+###########################################################################################
+
+PublicKeyLegacyPrefix="SYS"
+
+# secp256k1 domain parameters
+_P=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+_N=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+_G=(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+_BASE58_ALPHABET="123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# below this many key pairs a process pool costs more than it saves
+_POOL_THRESHOLD=2000
+
+def _pointAdd(p1, p2):
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    x1, y1=p1
+    x2, y2=p2
+    if x1 == x2:
+        if (y1 + y2) % _P == 0:
+            return None
+        slope=3 * x1 * x1 * pow(2 * y1, -1, _P) % _P
+    else:
+        slope=(y2 - y1) * pow(x2 - x1, -1, _P) % _P
+    x3=(slope * slope - x1 - x2) % _P
+    return (x3, (slope * (x1 - x3) - y1) % _P)
+
+# table[w][d - 1] = d * 16^w * G (affine), so k*G is the sum of one table entry per nibble of k
+_WINDOW_BITS=4
+_baseTable=None
+
+def _getBaseTable():
+    global _baseTable
+    if _baseTable is None:
+        table=[]
+        base=_G
+        for _ in range(256 // _WINDOW_BITS):
+            row=[base]
+            for _ in range((1 << _WINDOW_BITS) - 2):
+                row.append(_pointAdd(row[-1], base))
+            table.append(row)
+            base=_pointAdd(row[-1], base)
+        _baseTable=table
+    return _baseTable
+
+def _jacobianAddAffine(p1, p2):
+    """Adds affine p2 to jacobian p1 (X, Y, Z), returns jacobian."""
+    x1, y1, z1=p1
+    x2, y2=p2
+    if z1 == 0:
+        return (x2, y2, 1)
+    z1z1=z1 * z1 % _P
+    h=(x2 * z1z1 - x1) % _P
+    r=(y2 * z1 * z1z1 - y1) % _P
+    if h == 0:
+        if r != 0:
+            return (1, 1, 0)
+        # doubling, a=0 for secp256k1
+        yy=y1 * y1 % _P
+        s=4 * x1 * yy % _P
+        m=3 * x1 * x1 % _P
+        x3=(m * m - 2 * s) % _P
+        return (x3, (m * (s - x3) - 8 * yy * yy) % _P, 2 * y1 * z1 % _P)
+    hh=h * h % _P
+    hhh=h * hh % _P
+    v=x1 * hh % _P
+    x3=(r * r - hhh - 2 * v) % _P
+    return (x3, (r * (v - x3) - y1 * hhh) % _P, z1 * h % _P)
+
+def _baseMultiply(scalar):
+    """Returns scalar * G in affine coordinates."""
+    table=_getBaseTable()
+    mask=(1 << _WINDOW_BITS) - 1
+    point=(1, 1, 0)
+    window=0
+    while scalar:
+        digit=scalar & mask
+        if digit:
+            point=_jacobianAddAffine(point, table[window][digit - 1])
+        scalar>>=_WINDOW_BITS
+        window+=1
+    x, y, z=point
+    zInv=pow(z, -1, _P)
+    zInv2=zInv * zInv % _P
+    return (x * zInv2 % _P, y * zInv2 * zInv % _P)
+
+def _ripemd160(data: bytes) -> bytes:
+    try:
+        return hashlib.new("ripemd160", data).digest()
+    except ValueError:
+        # OpenSSL 3 builds may not provide ripemd160
+        return _ripemd160Python(data)
+
+def _ripemd160Python(data: bytes) -> bytes:
+    def rol(x, n):
+        return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
+    funcs=[lambda x, y, z: x ^ y ^ z,
+           lambda x, y, z: (x & y) | (~x & z),
+           lambda x, y, z: (x | ~y) ^ z,
+           lambda x, y, z: (x & z) | (y & ~z),
+           lambda x, y, z: x ^ (y | ~z)]
+    kLeft=[0x00000000, 0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xA953FD4E]
+    kRight=[0x50A28BE6, 0x5C4DD124, 0x6D703EF3, 0x7A6D76E9, 0x00000000]
+    rLeft=[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
+           7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+           3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+           1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+           4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13]
+    rRight=[5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+            6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+            15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+            8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+            12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11]
+    sLeft=[11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+           7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+           11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+           11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+           9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6]
+    sRight=[8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+            9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+            9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+            15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+            8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11]
+
+    h=[0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0]
+    msg=data + b"\x80" + b"\x00" * ((55 - len(data)) % 64) + (8 * len(data)).to_bytes(8, "little")
+    for offset in range(0, len(msg), 64):
+        x=[int.from_bytes(msg[offset + 4 * i:offset + 4 * i + 4], "little") for i in range(16)]
+        al, bl, cl, dl, el=h
+        ar, br, cr, dr, er=h
+        for j in range(80):
+            rnd=j // 16
+            t=(rol((al + (funcs[rnd](bl, cl, dl) & 0xFFFFFFFF) + x[rLeft[j]] + kLeft[rnd]) & 0xFFFFFFFF, sLeft[j]) + el) & 0xFFFFFFFF
+            al, bl, cl, dl, el=el, t, bl, rol(cl, 10), dl
+            t=(rol((ar + (funcs[4 - rnd](br, cr, dr) & 0xFFFFFFFF) + x[rRight[j]] + kRight[rnd]) & 0xFFFFFFFF, sRight[j]) + er) & 0xFFFFFFFF
+            ar, br, cr, dr, er=er, t, br, rol(cr, 10), dr
+        t=(h[1] + cl + dr) & 0xFFFFFFFF
+        h[1]=(h[2] + dl + er) & 0xFFFFFFFF
+        h[2]=(h[3] + el + ar) & 0xFFFFFFFF
+        h[3]=(h[4] + al + br) & 0xFFFFFFFF
+        h[4]=(h[0] + bl + cr) & 0xFFFFFFFF
+        h[0]=t
+    return b"".join(v.to_bytes(4, "little") for v in h)
+
+def _base58Encode(data: bytes) -> str:
+    num=int.from_bytes(data, "big")
+    encoded=""
+    while num > 0:
+        num, rem=divmod(num, 58)
+        encoded=_BASE58_ALPHABET[rem] + encoded
+    leadingZeros=len(data) - len(data.lstrip(b"\x00"))
+    return _BASE58_ALPHABET[0] * leadingZeros + encoded
+
+def _base58Decode(encoded: str) -> bytes:
+    num=0
+    for c in encoded:
+        num=num * 58 + _BASE58_ALPHABET.index(c)
+    data=num.to_bytes((num.bit_length() + 7) // 8, "big")
+    leadingZeros=len(encoded) - len(encoded.lstrip(_BASE58_ALPHABET[0]))
+    return b"\x00" * leadingZeros + data
+
+def _privateKeyToWif(secret: int) -> str:
+    data=b"\x80" + secret.to_bytes(32, "big")
+    checksum=hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4]
+    return _base58Encode(data + checksum)
+
+def _wifToPrivateKey(wif: str) -> int:
+    raw=_base58Decode(wif)
+    data, checksum=raw[:-4], raw[-4:]
+    assert checksum == hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4], f"Invalid checksum for private key {wif}"
+    return int.from_bytes(data[1:], "big")
+
+def _publicKeyToString(secret: int) -> str:
+    x, y=_baseMultiply(secret)
+    compressed=(b"\x03" if y & 1 else b"\x02") + x.to_bytes(32, "big")
+    return PublicKeyLegacyPrefix + _base58Encode(compressed + _ripemd160(compressed)[:4])
+
+def publicKeyFromPrivateKey(privateKey: str) -> str:
+    """Derives the SYS public key string for a WIF private key string."""
+    return _publicKeyToString(_wifToPrivateKey(privateKey))
+
+def generateKeyPair() -> Tuple[str, str]:
+    """Returns a new (private key, public key) string pair, formatted as clio create key prints them."""
+    secret=secrets.randbelow(_N - 1) + 1
+    return (_privateKeyToWif(secret), _publicKeyToString(secret))
+
+def _generateKeyPairs(count):
+    return [generateKeyPair() for _ in range(count)]
+
+def generateKeyPairs(count: int, processes=None) -> List[Tuple[str, str]]:
+    """Returns count new (private key, public key) pairs.  Large counts are spread over a process pool of
+    processes workers (defaults to the cpu count); processes=1 always generates in-process."""
+    if processes is None:
+        processes=multiprocessing.cpu_count() if count >= _POOL_THRESHOLD else 1
+    if processes <= 1 or count < processes:
+        return _generateKeyPairs(count)
+
+    chunks=[count // processes + (1 if i < count % processes else 0) for i in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        results=pool.map(_generateKeyPairs, chunks)
+    return [pair for chunk in results for pair in chunk]
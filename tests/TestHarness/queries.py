@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 
+import concurrent.futures
 import decimal
+import http.client
 import json
 import re
 import subprocess
 import time
 
-import urllib.request
-import urllib.parse
 import urllib.error
 
 from .core_symbol import CORE_SYMBOL
 from .accounts import Account
+from .http_transport import HttpTransport
 from .testUtils import EnumType
 from .testUtils import addEnum
 from .testUtils import ReturnType
@@ -27,10 +28,20 @@ addEnum(BlockType, "lib")
 
 
 class NodeopQueries:
+    # upper bound on the http queries a single call issues at once
+    maxConcurrentQueries=8
+
     def __init__(self, host, port, walletMgr=None):
         self.endpointHttp = f'http://{host}:{port}'
         self.endpointArgs = f'--url {self.endpointHttp}'
         self.walletMgr = walletMgr
+        self.httpTransport = HttpTransport.get(self.endpointHttp)
+        # reads go through the keep-alive http transport unless clio is explicitly requested
+        self.useClioForQueries = Utils.UseClioForQueries
+        # trx id -> block number, filled in from every block retrieved through getBlock
+        self.transBlockIndex = {}
+        # block number -> (block id, [trx ids], irreversible when fetched) for the blocks in transBlockIndex
+        self.blockTransIndex = {}
 
     def sysClientArgs(self):
         walletArgs=" " + self.walletMgr.getWalletEndpointArgs() if self.walletMgr is not None else ""
@@ -201,9 +212,52 @@ class NodeopQueries:
         """Given a blockId will return block details."""
         assert(isinstance(blockNum, int))
         cmdDesc="get block"
-        cmd="%s %d" % (cmdDesc, blockNum)
         msg="(block number=%s)" % (blockNum);
-        return self.processClioCmd(cmd, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+        if not self.useClioForQueries:
+            block=self.processHttpQuery("chain", "get_block", {"block_num_or_id":blockNum}, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+        else:
+            cmd="%s %d" % (cmdDesc, blockNum)
+            block=self.processClioCmd(cmd, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+        if block is not None:
+            self.indexBlockTransactions(blockNum, block)
+        return block
+
+    def indexBlockTransactions(self, blockNum, block):
+        """Add the transactions in block to the trx id -> block number index.  If blockNum was indexed from a
+        different block (fork), the transactions of the replaced block are dropped first.  The entry records whether
+        blockNum was already irreversible (at or below the last retrieved LIB) when block was fetched."""
+        blockId=block.get("id")
+        irreversible=self.lastRetrievedLIB is not None and blockNum <= self.lastRetrievedLIB
+        indexed=self.blockTransIndex.get(blockNum)
+        if indexed is not None:
+            if indexed[0] == blockId:
+                if irreversible and not indexed[2]:
+                    self.blockTransIndex[blockNum]=(blockId, indexed[1], True)
+                return
+            for transId in indexed[1]:
+                if self.transBlockIndex.get(transId) == blockNum:
+                    del self.transBlockIndex[transId]
+
+        transIds=[]
+        for trans in block.get("transactions") or []:
+            trx=trans["trx"]
+            # deferred transactions are only referenced by id
+            transId=trx if isinstance(trx, str) else trx["id"]
+            transIds.append(transId)
+            self.transBlockIndex[transId]=blockNum
+        self.blockTransIndex[blockNum]=(blockId, transIds, irreversible)
+
+    def isIndexedIrreversible(self, blockNum):
+        """Was blockNum already irreversible when it was fetched into the trx id index"""
+        indexed=self.blockTransIndex.get(blockNum)
+        return indexed is not None and indexed[2]
+
+    def indexBlock(self, blockNum, exitOnError=True):
+        """Make sure blockNum is in the trx id index.  Blocks that were already irreversible when they were fetched
+        are not fetched again, others are refetched in case they were forked out."""
+        if self.isIndexedIrreversible(blockNum):
+            return True
+        return self.getBlock(blockNum, exitOnError=exitOnError) is not None
 
     def isBlockPresent(self, blockNum, blockType=BlockType.head):
         """Does node have head_block_num/last_irreversible_block_num >= blockNum"""
@@ -245,8 +299,14 @@ class NodeopQueries:
         cmdDesc=self.fetchTransactionCommand()
         cmd="%s %s" % (cmdDesc, transId)
         msg="(transaction id=%s)" % (transId);
+        def fetch(silentErrors, exitOnError):
+            if not self.useClioForQueries:
+                resource, command, payload=self.fetchTransactionRequest(transId)
+                return self.processHttpQuery(resource, command, payload, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+            return self.processClioCmd(cmd, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+
         for i in range(0,(int(60/timeout) - 1)):
-            trans=self.processClioCmd(cmd, cmdDesc, silentErrors=True, exitOnError=exitOnErrorForDelayed, exitMsg=msg)
+            trans=fetch(silentErrors=True, exitOnError=exitOnErrorForDelayed)
             if trans is not None or not delayedRetry:
                 return trans
             if Utils.Debug: Utils.Print("Could not find transaction with id %s, delay and retry" % (transId))
@@ -254,7 +314,7 @@ class NodeopQueries:
 
         self.missingTransaction=True
         # either it is there or the transaction has timed out
-        return self.processClioCmd(cmd, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError, exitMsg=msg)
+        return fetch(silentErrors=silentErrors, exitOnError=exitOnError)
 
     def isTransInBlock(self, transId, blockId):
         """Check if transId is within block identified by blockId"""
@@ -263,33 +323,21 @@ class NodeopQueries:
         assert(blockId)
         assert(isinstance(blockId, int))
 
-        block=self.getBlock(blockId, exitOnError=True)
-
-        transactions=None
-        key=""
-        try:
-            key="[transactions]"
-            transactions=block["transactions"]
-        except (AssertionError, TypeError, KeyError) as _:
-            Utils.Print("block%s not found. Block: %s" % (key,block))
-            raise
-
-        if transactions is not None:
-            for trans in transactions:
-                assert(trans)
-                try:
-                    myTransId=trans["trx"]["id"]
-                    if transId == myTransId:
-                        return True
-                except (TypeError, KeyError) as _:
-                    Utils.Print("transaction%s not found. Transaction: %s" % (key, trans))
-
-        return False
+        self.indexBlock(blockId, exitOnError=True)
+        return self.transBlockIndex.get(transId) == blockId
 
     def getBlockNumByTransId(self, transId, exitOnError=True, delayedRetry=True, blocksAhead=5):
         """Given a transaction Id (string), return the block number (int) containing the transaction"""
         assert(transId)
         assert(isinstance(transId, str))
+        blockNum=self.transBlockIndex.get(transId)
+        if blockNum is not None:
+            if self.isIndexedIrreversible(blockNum):
+                return blockNum
+            # indexed while reversible, refetch the block in case the transaction's block was forked out since
+            if self.getBlock(blockNum, exitOnError=False) is not None and self.transBlockIndex.get(transId) == blockNum:
+                return blockNum
+
         trans=self.getTransaction(transId, exitOnError=exitOnError, delayedRetry=delayedRetry)
 
         refBlockNum=None
@@ -312,7 +360,8 @@ class NodeopQueries:
 
         if Utils.Debug: Utils.Print("Reference block num %d, Head block num: %d" % (refBlockNum, headBlockNum))
         for blockNum in range(refBlockNum, headBlockNum + blocksAhead):
-            self.waitForBlock(blockNum)
+            if blockNum not in self.blockTransIndex:
+                self.waitForBlock(blockNum)
             if self.isTransInBlock(transId, blockNum):
                 if Utils.Debug: Utils.Print("Found transaction %s in block %d" % (transId, blockNum))
                 return blockNum
@@ -340,15 +389,24 @@ class NodeopQueries:
     def getSysioAccount(self, name, exitOnError=False, returnType=ReturnType.json):
         assert(isinstance(name, str))
         cmdDesc="get account"
+        msg="( getSysioAccount(name=%s) )" % (name);
+        # the raw (human readable) account summary is only produced by clio
+        if not self.useClioForQueries and returnType==ReturnType.json:
+            return self.processHttpQuery("chain", "get_account", {"account_name":name}, cmdDesc, silentErrors=False, exitOnError=exitOnError, exitMsg=msg)
         jsonFlag="-j" if returnType==ReturnType.json else ""
         cmd="%s %s %s" % (cmdDesc, jsonFlag, name)
-        msg="( getSysioAccount(name=%s) )" % (name);
         return self.processClioCmd(cmd, cmdDesc, silentErrors=False, exitOnError=exitOnError, exitMsg=msg, returnType=returnType)
 
     def getTable(self, contract, scope, table, exitOnError=False):
         cmdDesc = "get table"
-        cmd=f"{cmdDesc} {self.clioLimit} {contract} {scope} {table}"
         msg=f"contract={contract}, scope={scope}, table={table}"
+        if not self.useClioForQueries:
+            # same defaults clio uses for "get table"
+            payload={"json":True, "code":contract, "scope":scope, "table":table, "limit":10}
+            if self.tableTimeLimitMs is not None:
+                payload["time_limit_ms"]=self.tableTimeLimitMs
+            return self.processHttpQuery("chain", "get_table_rows", payload, cmdDesc, exitOnError=exitOnError, exitMsg=msg)
+        cmd=f"{cmdDesc} {self.clioLimit} {contract} {scope} {table}"
         return self.processClioCmd(cmd, cmdDesc, exitOnError=exitOnError, exitMsg=msg)
 
     def getTableAccountBalance(self, contract, scope):
@@ -382,8 +440,10 @@ class NodeopQueries:
         assert(symbol)
         assert(isinstance(symbol, str))
         cmdDesc = "get currency stats"
-        cmd="%s %s %s" % (cmdDesc, contract, symbol)
         msg="contract=%s, symbol=%s" % (contract, symbol);
+        if not self.useClioForQueries:
+            return self.processHttpQuery("chain", "get_currency_stats", {"code":contract, "symbol":symbol}, cmdDesc, exitOnError=exitOnError, exitMsg=msg)
+        cmd="%s %s %s" % (cmdDesc, contract, symbol)
         return self.processClioCmd(cmd, cmdDesc, exitOnError=exitOnError, exitMsg=msg)
 
     # Verifies account. Returns "get account" json return object
@@ -446,12 +506,14 @@ class NodeopQueries:
         assert(accounts)
         assert(isinstance(accounts, list))
 
-        balances={}
-        for account in accounts:
-            balance = self.getAccountSysBalance(account.name)
-            balances[account]=balance
+        if self.useClioForQueries:
+            return {account: self.getAccountSysBalance(account.name) for account in accounts}
 
-        return balances
+        # each account's balance lives in its own scope of the sysio.token accounts table, so it takes a query per
+        # account; issue them concurrently, every worker thread gets its own kept-alive connection
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(NodeopQueries.maxConcurrentQueries, len(accounts))) as executor:
+            balances=executor.map(lambda account: self.getAccountSysBalance(account.name), accounts)
+            return dict(zip(accounts, balances))
 
     # Gets subjective bill info for an account
     def getAccountSubjectiveInfo(self, account):
@@ -596,29 +658,64 @@ class NodeopQueries:
 
         return trans
 
+    def processHttpQuery(self, resource, command, payload, cmdDesc, silentErrors=True, exitOnError=False, exitMsg=None):
+        """Issue a read against the node's http api over the kept-alive connection.  Mirrors processClioCmd:
+        returns the json payload, or None on failure (exiting instead if exitOnError)."""
+        path=f"/v1/{resource}/{command}"
+        if Utils.Debug: Utils.Print("http: %s%s %s" % (self.endpointHttp, path, payload))
+        if exitMsg is not None:
+            exitMsg="Context: " + exitMsg
+        else:
+            exitMsg=""
+        trans=None
+        errorMsg=None
+        start=time.perf_counter()
+        try:
+            response=self.httpTransport.request(path, payload)
+            if response.ok():
+                trans=response.json()
+            else:
+                errorMsg="HTTP %d %s: %s" % (response.code, response.reason, response.body.decode("utf-8", errors="replace"))
+        except (OSError, http.client.HTTPException, json.decoder.JSONDecodeError) as ex:
+            errorMsg="%s: %s" % (type(ex).__name__, ex)
+        end=time.perf_counter()
+        if Utils.Debug: Utils.Print("http Duration: %.3f sec" % (end-start))
+
+        if errorMsg is not None:
+            if not silentErrors:
+                errorMsg="Exception during \"%s\". %s.  http Duration=%.3f sec. %s" % (cmdDesc, errorMsg, end-start, exitMsg)
+                if exitOnError:
+                    Utils.cmdError(errorMsg)
+                    Utils.errorExit(errorMsg)
+                else:
+                    Utils.Print("ERROR: %s" % (errorMsg))
+            return None
+
+        if exitOnError and trans is None:
+            Utils.cmdError("could not \"%s\". %s" % (cmdDesc,exitMsg))
+            Utils.errorExit("Failed to \"%s\"" % (cmdDesc))
+
+        return trans
+
     def processUrllibRequest(self, resource, command, payload={}, silentErrors=False, exitOnError=False, exitMsg=None, returnType=ReturnType.json, method="POST", endpoint=None, prettyPrint=False, printReturnLimit=1024):
         if not endpoint:
             endpoint = self.endpointHttp
         cmd = f"{endpoint}/v1/{resource}/{command}"
-        req = urllib.request.Request(cmd, method=method)
-        if len(payload):
-            req.add_header('Content-Type', 'application/json')
-            data = payload
-            data = json.dumps(data)
-            data = data.encode()
-        else:
-            data = None
+        data = payload if len(payload) else None
         if Utils.Debug: Utils.Print("cmd: %s %s" % (cmd, payload))
         rtn=None
         start=time.perf_counter()
         try:
-            response = urllib.request.urlopen(req, data=data)
+            response = HttpTransport.get(endpoint).request(f"/v1/{resource}/{command}", data, method=method)
+        except (OSError, http.client.HTTPException) as ex:
+            raise urllib.error.URLError(ex)
+        if response.ok():
             if returnType==ReturnType.json:
                 rtn = {}
-                rtn["code"] = response.getcode()
-                rtn["payload"] = json.load(response)
+                rtn["code"] = response.code
+                rtn["payload"] = response.json()
             elif returnType==ReturnType.raw:
-                rtn = response.read()
+                rtn = response.body
             else:
                 unhandledEnumType(returnType)
 
@@ -629,10 +726,10 @@ class NodeopQueries:
                 separators = (', ',': ') if prettyPrint else (',',':')
                 printReturn=json.dumps(rtn, indent=indent, separators=separators) if returnType==ReturnType.json else rtn
                 Utils.Print("cmd returned: %s" % (printReturn[:printReturnLimit]))
-        except urllib.error.HTTPError as ex:
+        else:
             if not silentErrors:
                 end=time.perf_counter()
-                msg=ex.msg
+                msg=response.reason
                 errorMsg="Exception during \"%s\". %s.  cmd Duration=%.3f sec." % (cmd, msg, end-start)
                 if exitOnError:
                     Utils.cmdError(errorMsg)
@@ -640,13 +737,13 @@ class NodeopQueries:
                 else:
                     Utils.Print("ERROR: %s" % (errorMsg))
                     if returnType==ReturnType.json:
-                        rtn = json.load(ex)
+                        rtn = response.json()
                     elif returnType==ReturnType.raw:
-                        rtn = ex.read()
+                        rtn = response.body
                     else:
                         unhandledEnumType(returnType)
             elif returnType==ReturnType.raw:
-                return ex.code
+                return response.code
             else:
                 return None
 
@@ -662,7 +759,10 @@ class NodeopQueries:
 
     def getInfo(self, silentErrors=False, exitOnError=False):
         cmdDesc = "get info"
-        info=self.processClioCmd(cmdDesc, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError)
+        if not self.useClioForQueries:
+            info=self.processHttpQuery("chain", "get_info", None, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError)
+        else:
+            info=self.processClioCmd(cmdDesc, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError)
         if info is None:
             self.infoValid=False
         else:
@@ -674,6 +774,8 @@ class NodeopQueries:
 
     def getTransactionStatus(self, transId, silentErrors=False, exitOnError=True):
         cmdDesc = f"get transaction-status {transId}"
+        if not self.useClioForQueries:
+            return self.processHttpQuery("chain", "get_transaction_status", {"id":transId}, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError)
         status=self.processClioCmd(cmdDesc, cmdDesc, silentErrors=silentErrors, exitOnError=exitOnError)
         return status
 
@@ -773,6 +875,8 @@ class NodeopQueries:
     def getLatestBlockHeaderState(self):
         headBlockNum = self.getHeadBlockNum()
         cmdDesc = "get block {} --header-state".format(headBlockNum)
+        if not self.useClioForQueries:
+            return self.processHttpQuery("chain", "get_block_header_state", {"block_num_or_id":headBlockNum}, cmdDesc)
         latestBlockHeaderState = self.processClioCmd(cmdDesc, cmdDesc)
         return latestBlockHeaderState
 
@@ -70,6 +70,12 @@ class Utils:
 
     LeapClientPath=str(testBinPath / "sys-util")
 
+    # route NodeopQueries reads through clio instead of the node's http api
+    UseClioForQueries=False
+
+    # directory of bootstrapped chain snapshots reused by Cluster.launch, disabled when not set
+    BootstrapCacheDir=os.environ.get('SYS_TEST_BOOTSTRAP_CACHE_DIR')
+
     SysWalletName="kiod"
     SysWalletPath=str(testBinPath / SysWalletName)
 
@@ -405,6 +411,33 @@ class Utils:
 
         return True
 
+    @staticmethod
+    def parseCpuList(cpuList: str) -> list:
+        """Cpus of a cpu list such as "0-3,8,10-11", the format of taskset -c and /sys/devices/system/cpu/online, in order."""
+        cpus = []
+        for cpuRange in cpuList.split(','):
+            if not cpuRange.strip():
+                continue
+            first, _, last = cpuRange.partition('-')
+            cpus.extend(range(int(first), int(last if last else first) + 1))
+        return sorted(set(cpus))
+
+    @staticmethod
+    def setProcessAffinity(pid: int, cpus) -> bool:
+        """Pin every thread of process pid to cpus, threads started afterwards inherit the affinity of the thread starting
+        them.  Returns False, after printing why, if the affinity could not be set."""
+        try:
+            for task in Path(f"/proc/{pid}/task").iterdir():
+                try:
+                    os.sched_setaffinity(int(task.name), cpus)
+                except ProcessLookupError:
+                    # thread exited since the directory was listed
+                    pass
+        except OSError as e:
+            Utils.Print(f"ERROR: Failed to set cpu affinity of pid {pid} to {sorted(cpus)}: {e}")
+            return False
+        return True
+
     @staticmethod
     def pgrepCmd(serverName):
         # pylint: disable=deprecated-method
@@ -66,6 +66,96 @@ class Transactions(NodeopQueries):
 
         return trans
 
+    @staticmethod
+    def keyAuthority(publicKey):
+        return {"threshold": 1, "keys": [{"key": publicKey, "weight": 1}], "accounts": [], "waits": []}
+
+    def createAccountsBatched(self, accounts, creatorAccount, stakedDeposit=0, nodeOwner=None, stakeNet=100, stakeCPU=100, buyRAM=10000,
+                              maxActionsPerTrx=60, waitForTransBlock=True, silentErrors=False, exitOnError=False):
+        """Create accounts packing the newaccount action of many accounts, along with their initial transfer of stakedDeposit
+        and sysio.roa policy from nodeOwner (as createInitializeAccount does one transaction at a time), into transactions of at
+        most maxActionsPerTrx actions.  The default keeps transactions well within the net/cpu limits of the test genesis and
+        the command line length clio is handed.  Returns the list of transactions or None on failure.
+        waitForTransBlock: wait on all creation transactions to appear in a block."""
+        assert(isinstance(accounts, list))
+        addPolicy = nodeOwner is not None and (stakeNet > 0 or stakeCPU > 0 or buyRAM > 0)
+        actionsPerAccount = 1 + (1 if stakedDeposit > 0 else 0) + (1 if addPolicy else 0)
+        accountsPerTrx = max(1, maxActionsPerTrx // actionsPerAccount)
+        depositStr = NodeopQueries.currencyIntToStr(stakedDeposit, CORE_SYMBOL)
+        timeBlock = self.getHeadBlockNum() if addPolicy else None
+
+        def authorization(account):
+            return [{"actor": account.name, "permission": "active"}]
+
+        transactions=[]
+        for start in range(0, len(accounts), accountsPerTrx):
+            batch=accounts[start:start+accountsPerTrx]
+            actions=[]
+            for account in batch:
+                actions.append({"account": "sysio", "name": "newaccount", "authorization": authorization(creatorAccount),
+                                "data": {"creator": creatorAccount.name, "name": account.name,
+                                         "owner": Transactions.keyAuthority(account.ownerPublicKey),
+                                         "active": Transactions.keyAuthority(account.activePublicKey)}})
+                if stakedDeposit > 0:
+                    actions.append({"account": "sysio.token", "name": "transfer", "authorization": authorization(creatorAccount),
+                                    "data": {"from": creatorAccount.name, "to": account.name, "quantity": depositStr, "memo": "init"}})
+                if addPolicy:
+                    actions.append({"account": "sysio.roa", "name": "addpolicy", "authorization": authorization(nodeOwner),
+                                    "data": {"issuer": nodeOwner.name, "owner": account.name, "net_weight": f"{stakeNet} SYS",
+                                             "cpu_weight": f"{stakeCPU} SYS", "ram_weight": f"{buyRAM} SYS", "time_block": timeBlock,
+                                             "network_gen": 0}})
+            msg="(creator account=%s, accounts=%s..%s)" % (creatorAccount.name, batch[0].name, batch[-1].name)
+            if Utils.Debug: Utils.Print("Create %d accounts in one transaction %s" % (len(batch), msg))
+            success, trans=self.pushTransaction({"actions": actions}, opts=None, silentErrors=silentErrors)
+            if not success:
+                if exitOnError:
+                    Utils.cmdError("create accounts %s" % (msg))
+                    Utils.errorExit("Failed to create accounts %s" % (msg))
+                return None
+            transactions.append(trans)
+
+        if waitForTransBlock and len(transactions) > 0:
+            transIds=[NodeopQueries.getTransId(trans) for trans in transactions]
+            if not self.waitForTransactionsInBlock(transIds):
+                if exitOnError:
+                    Utils.cmdError("account creation transactions never made it into a block")
+                    Utils.errorExit("Failed to find account creation transactions in a block before timeout")
+                return None
+
+        return transactions
+
+    def transferFundsBatched(self, source, destinations, amountStr, memo="memo", maxActionsPerTrx=100, waitForTransBlock=False, silentErrors=False, exitOnError=True):
+        """Transfer amountStr from source to each account in destinations, packing up to maxActionsPerTrx transfer actions into
+        each transaction.  Returns the list of transactions or None on failure.
+        waitForTransBlock: wait on all transfer transactions to appear in a block."""
+        assert isinstance(amountStr, str)
+        assert(isinstance(source, Account))
+        assert(isinstance(destinations, list))
+        transactions=[]
+        for start in range(0, len(destinations), maxActionsPerTrx):
+            batch=destinations[start:start+maxActionsPerTrx]
+            actions=[{"account": "sysio.token", "name": "transfer", "authorization": [{"actor": source.name, "permission": "active"}],
+                      "data": {"from": source.name, "to": destination.name, "quantity": amountStr, "memo": memo}} for destination in batch]
+            msg="\"%s\" from %s to %s..%s" % (amountStr, source.name, batch[0].name, batch[-1].name)
+            if Utils.Debug: Utils.Print("Transfer %s in one transaction" % (msg))
+            success, trans=self.pushTransaction({"actions": actions}, opts=None, silentErrors=silentErrors)
+            if not success:
+                if exitOnError:
+                    Utils.cmdError("could not transfer %s" % (msg))
+                    Utils.errorExit("Failed to transfer %s" % (msg))
+                return None
+            transactions.append(trans)
+
+        if waitForTransBlock and len(transactions) > 0:
+            transIds=[NodeopQueries.getTransId(trans) for trans in transactions]
+            if not self.waitForTransactionsInBlock(transIds):
+                if exitOnError:
+                    Utils.cmdError("transfer transactions never made it into a block")
+                    Utils.errorExit("Failed to find transfer transactions in a block before timeout")
+                return None
+
+        return transactions
+
     def transferFundsCmdArr(self, source, destination, amountStr, memo, force, retry, sign, dontSend, expiration, skipSign):
         assert isinstance(amountStr, str)
         assert(source)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import time
+
+from TestHarness import Cluster, TestHelper, Utils, WalletMgr
+from TestHarness.TestHelper import AppArgs
+
+###############################################################
+# query_transport_benchmark
+#
+# Micro-benchmark comparing NodeopQueries reads issued through the kept-alive
+# http transport against the same reads issued by spawning clio.  Verifies both
+# paths return the same data and reports queries/sec for each.
+#
+###############################################################
+
+Print=Utils.Print
+errorExit=Utils.errorExit
+
+appArgs=AppArgs()
+appArgs.add(flag="--iterations", type=int, help="number of times each query is issued per transport", default=50)
+args=TestHelper.parse_args({"-v","--dump-error-details","--leave-running","--keep-logs","--unshared"}, applicationSpecificArgs=appArgs)
+
+Utils.Debug=args.v
+iterations=args.iterations
+dumpErrorDetails=args.dump_error_details
+
+testSuccessful=False
+
+cluster=Cluster(unshared=args.unshared, keepRunning=args.leave_running, keepLogs=args.keep_logs)
+walletMgr=WalletMgr(True)
+
+def runQueries(node, blockNum, useClio):
+    node.useClioForQueries=useClio
+    queries={
+        "get info": lambda: node.getInfo(exitOnError=True),
+        "get block": lambda: node.getBlock(blockNum, exitOnError=True),
+        "get account": lambda: node.getSysioAccount("sysio", exitOnError=True),
+        "get table": lambda: node.getTable("sysio.token", "sysio", "accounts", exitOnError=True),
+    }
+    results={}
+    for desc, query in queries.items():
+        start=time.perf_counter()
+        for _ in range(iterations):
+            ret=query()
+        duration=time.perf_counter()-start
+        results[desc]=(ret, iterations/duration)
+    return results
+
+try:
+    TestHelper.printSystemInfo("BEGIN")
+    cluster.setWalletMgr(walletMgr)
+
+    Print("Stand up cluster")
+    if cluster.launch(pnodes=1, totalNodes=1, useBootstrapCache=True) is False:
+        errorExit("Failed to stand up cluster.")
+
+    node=cluster.getNode(0)
+
+    # block log may start after the bootstrap blocks when launched from the bootstrap cache
+    blockNum=node.getIrreversibleBlockNum()
+    Print("Running %d iterations of each query" % (iterations))
+    httpResults=runQueries(node, blockNum, useClio=False)
+    clioResults=runQueries(node, blockNum, useClio=True)
+    node.useClioForQueries=Utils.UseClioForQueries
+
+    Print("%-12s %14s %14s %8s" % ("query", "http q/s", "clio q/s", "speedup"))
+    for desc, (httpRet, httpRate) in httpResults.items():
+        clioRet, clioRate=clioResults[desc]
+        Print("%-12s %14.1f %14.1f %7.1fx" % (desc, httpRate, clioRate, httpRate/clioRate))
+        # get info and get account move with the chain, compare something stable
+        if desc == "get info":
+            httpRet, clioRet=httpRet["chain_id"], clioRet["chain_id"]
+        elif desc == "get account":
+            httpRet, clioRet=httpRet["permissions"], clioRet["permissions"]
+        if httpRet != clioRet:
+            errorExit("Mismatch between http and clio results for \"%s\".\nhttp: %s\nclio: %s" % (desc, httpRet, clioRet))
+
+    testSuccessful=True
+finally:
+    TestHelper.shutdown(cluster, walletMgr, testSuccessful=testSuccessful, dumpErrorDetails=dumpErrorDetails)
+
+exitCode = 0 if testSuccessful else 1
+exit(exitCode)
@@ -57,6 +57,7 @@ int main(int argc, char** argv) {
          ("monitor-spinup-time-us", bpo::value<int64_t>(&spinup_time_us)->default_value(1000000), "Number of microseconds to wait before monitoring TPS. Defaults to 1000000 (1s).")
          ("monitor-max-lag-percent", bpo::value<uint32_t>(&max_lag_per)->default_value(5), "Max percentage off from expected transactions sent before being in violation. Defaults to 5.")
          ("monitor-max-lag-duration-us", bpo::value<int64_t>(&max_lag_duration_us)->default_value(1000000), "Max microseconds that transaction generation can be in violation before quitting. Defaults to 1000000 (1s).")
+         ("progress-interval-ms", bpo::value<uint32_t>(&tester_config._progress_interval_ms)->default_value(0), "Interval in milliseconds at which the transactions sent so far are logged. Defaults to 0, which disables progress logging.")
          ("log-dir", bpo::value<std::string>(&trx_gen_base_config._log_dir), "set the logs directory")
          ("stop-on-trx-failed", bpo::value<bool>(&trx_gen_base_config._stop_on_trx_failed)->default_value(true), "stop transaction generation if sending fails.")
          ("abi-file", bpo::value<std::string>(&user_trx_config._abi_data_file_path), "The path to the contract abi file to use for the supplied transaction action data")
@@ -331,11 +331,13 @@ namespace sysio::testing {
 
    void trx_generator_base::push_transaction(signed_transaction_w_signer& trx, uint64_t& nonce_prefix, uint64_t& nonce,
                                              const fc::microseconds& trx_expiration, const chain::chain_id_type& chain_id, const chain::block_id_type& last_irr_block_id) {
+      const fc::time_point sign_start = fc::time_point::now();
       update_resign_transaction(trx._trx, trx._signer, ++nonce_prefix, nonce, trx_expiration, chain_id, last_irr_block_id);
+      const fc::microseconds sign_duration = fc::time_point::now() - sign_start;
       if (_txcount == 0) {
          log_first_trx(_config._log_dir, trx._trx);
       }
-      _provider.send(trx._trx);
+      _provider.send(trx._trx, sign_duration);
    }
 
    void trx_generator_base::stop_generation() {
@@ -247,10 +247,12 @@ namespace sysio::testing {
 
    void trx_provider::setup() { _peer_connection->init_and_connect(); }
 
-   void trx_provider::send(const chain::signed_transaction& trx) {
+   void trx_provider::send(const chain::signed_transaction& trx, const fc::microseconds& sign_duration) {
+      const fc::time_point send_start = fc::time_point::now();
       chain::packed_transaction pt(trx);
       _peer_connection->send_transaction(pt);
-      _sent_trx_data.push_back(logged_trx_data(trx.id()));
+      const fc::time_point sent = fc::time_point::now();
+      _sent_trx_data.push_back(logged_trx_data(trx.id(), sent, sign_duration, sent - send_start));
    }
 
    void trx_provider::log_trxs(const std::string& log_dir) {
@@ -270,7 +272,7 @@ namespace sysio::testing {
             ack_round_trip_us = acked - data._timestamp;
          }
          out << std::string(data._trx_id) << "," << data._timestamp.to_iso_string() << "," << acked_str << ","
-             << ack_round_trip_us.count();
+             << ack_round_trip_us.count() << "," << data._sign_duration.count() << "," << data._send_duration.count();
 
          acked_trx_trace_info info = _peer_connection->get_acked_trx_trace_info(data._trx_id);
          if (info._valid) {
@@ -21,9 +21,14 @@ namespace sysio::testing {
    struct logged_trx_data {
       sysio::chain::transaction_id_type _trx_id;
       fc::time_point _timestamp;
-
-      explicit logged_trx_data(sysio::chain::transaction_id_type trx_id, fc::time_point time_of_interest=fc::time_point::now()) :
-         _trx_id(trx_id), _timestamp(time_of_interest) {}
+      // time spent re-signing the transaction before it was sent, -1 when not measured
+      fc::microseconds _sign_duration;
+      // time spent packing and handing the transaction to the peer connection, ending at _timestamp
+      fc::microseconds _send_duration;
+
+      explicit logged_trx_data(sysio::chain::transaction_id_type trx_id, fc::time_point time_of_interest=fc::time_point::now(),
+                               fc::microseconds sign_duration=fc::microseconds(-1), fc::microseconds send_duration=fc::microseconds(-1)) :
+         _trx_id(trx_id), _timestamp(time_of_interest), _sign_duration(sign_duration), _send_duration(send_duration) {}
    };
 
    struct provider_base_config {
@@ -130,7 +135,7 @@ namespace sysio::testing {
       explicit trx_provider(const provider_base_config& provider_config);
 
       void setup();
-      void send(const chain::signed_transaction& trx);
+      void send(const chain::signed_transaction& trx, const fc::microseconds& sign_duration=fc::microseconds(-1));
       void log_trxs(const std::string& log_dir);
       void teardown();
 
@@ -151,6 +156,7 @@ namespace sysio::testing {
       int64_t          time_to_next_trx_us = 0;
       fc::microseconds trx_interval;
       uint32_t         expected_sent;
+      fc::time_point   next_progress;
    };
 
    constexpr int64_t min_sleep_us                  = 1;
@@ -180,10 +186,12 @@ namespace sysio::testing {
    struct trx_tps_tester_config {
       uint32_t _gen_duration_seconds;
       uint32_t _target_tps;
+      uint32_t _progress_interval_ms = 0;
 
       std::string to_string() const {
          std::ostringstream ss;
-         ss << "Trx Tps Tester Config: duration: " << _gen_duration_seconds << " target tps: " << _target_tps;
+         ss << "Trx Tps Tester Config: duration: " << _gen_duration_seconds << " target tps: " << _target_tps
+            << " progress interval ms: " << _progress_interval_ms;
          return ss.str();
       };
    };
@@ -216,6 +224,8 @@ namespace sysio::testing {
          stats.start_time = fc::time_point::now();
          stats.expected_end_time = stats.start_time + fc::microseconds{_config._gen_duration_seconds * std::chrono::microseconds(1s).count()};
          stats.time_to_next_trx_us = 0;
+         const fc::microseconds progress_interval = fc::milliseconds(_config._progress_interval_ms);
+         stats.next_progress = stats.start_time + progress_interval;
 
          bool keep_running = true;
 
@@ -236,6 +246,12 @@ namespace sysio::testing {
             stats.expected_sent = ((stats.last_run - stats.start_time).count() / stats.trx_interval.count()) +1;
             stats.trxs_left--;
 
+            if (_config._progress_interval_ms > 0 && (stats.last_run >= stats.next_progress || !stats.trxs_left)) {
+               // parsed by TransactionGeneratorsLauncher for its live view of the generators' progress
+               ilog("progress - sent ${s} | expected ${e} | total ${t}", ("s", stats.trxs_sent)("e", stats.expected_sent)("t", stats.total_trxs));
+               stats.next_progress = stats.last_run + progress_interval;
+            }
+
             keep_running = ((_monitor == nullptr || _monitor->monitor_test(stats)) && stats.trxs_left);
 
             if (keep_running) {